@@ -23,17 +23,20 @@ from watchdog.events    import FileSystemEventHandler
 
 from modules.ai_handler import AIHandler
 from modules.data_indexer import DataIndexer
+from modules.fs_events import FSEventPipeline, app_output_filter
 from modules.memory_store import MemoryStore, set_default_store
 from modules.config_manager import ConfigManager
 from modules.model_registry import detect_local_models
 from modules.toast import ToastManager
 from modules.path_policies import (
+    PathPolicy,
     default_allowed_roots,
     default_excluded_paths,
     normalise_paths,
-    is_allowed,
 )
+from modules.extractors import read_text
 from modules.telemetry import log_event
+from modules.vector_index import DEFAULT_EMBEDDING_MODEL, VectorIndex, vectors_available
 
 
 def _coerce_list(value):
@@ -43,39 +46,39 @@ def _coerce_list(value):
         return [value] if value else []
     return []
 
+# Watcher toasts are merged so a burst of changes shows one notification.
+FS_TOAST_INTERVAL_SECONDS = 3.0
+
 class FSHandler(FileSystemEventHandler):
-    def __init__(self, app):
-        self.app = app
-        self.fm = app.views["files"].file_manager
+    """Forwards watchdog events to the coalescing pipeline; no work on this thread."""
 
-    def _notify(self, message: str) -> None:
-        if not message:
-            return
-        self.app.root.after(0, lambda: self.app.show_toast(message))
+    def __init__(self, pipeline: FSEventPipeline):
+        self.pipeline = pipeline
+
+    @staticmethod
+    def _path(raw) -> str:
+        return str(Path(raw).resolve())
 
     def on_created(self, event):
         if event.is_directory:
             return
-        path = Path(event.src_path).resolve()
-        self._notify(f"File created: {path.name}")
-        self.fm._summary_queue.put(str(path))
+        self.pipeline.created(self._path(event.src_path))
 
     def on_modified(self, event):
         if event.is_directory:
             return
-        path = Path(event.src_path).resolve()
-        self._notify(f"File modified: {path.name}")
-        self.fm._summary_queue.put(str(path))
+        self.pipeline.modified(self._path(event.src_path))
 
     def on_deleted(self, event):
         if event.is_directory:
             return
-        path = Path(event.src_path).resolve()
-        fid = str(path)
-        self.fm.index["files"].pop(fid, None)
-        self.fm._save_index()
-        self._notify(f"File deleted: {path.name}")
-        self.app.root.after(0, self.app._update_index_status)
+        self.pipeline.deleted(self._path(event.src_path))
+
+    def on_moved(self, event):
+        if event.is_directory:
+            # Watchdog reports the contained files as their own moves.
+            return
+        self.pipeline.moved(self._path(event.src_path), self._path(event.dest_path))
 
 class NousApp:
     def __init__(self, root):
@@ -95,6 +98,18 @@ class NousApp:
             self.config.get("index_db_path", str(self.app_data_dir / "knowledge_index.db"))
         ).expanduser().resolve()
         self.max_index_file_size_mb = float(self.config.get("max_index_file_size_mb", 8.0))
+        # None lets the indexer pick cpu_count - 1; with 0 or 1, text files are
+        # extracted on the walker thread and PDF/Office files in one worker process.
+        self.index_extraction_workers = self.config.get("index_extraction_workers")
+        # PDF and Office files are parsed in worker processes that are killed after this long.
+        self.index_extraction_timeout = float(self.config.get("index_extraction_timeout", 120) or 120)
+        # Live mode: watcher events update the knowledge index, and a periodic
+        # reconcile pass catches anything the watcher missed.
+        self.index_live_updates = bool(self.config.get("index_live_updates", True))
+        self.index_reconcile_minutes = float(self.config.get("index_reconcile_minutes", 30) or 0)
+        # Optional embedding-based retrieval; needs NumPy and a local embedding model.
+        self.semantic_search = bool(self.config.get("semantic_search", False))
+        self.embedding_model = self.config.get("embedding_model", DEFAULT_EMBEDDING_MODEL)
         self.memory_enabled = bool(self.config.get("memory_enabled", True))
 
         default_base = self.app_data_dir
@@ -108,12 +123,12 @@ class NousApp:
         self.default_excluded = default_excluded_paths()
         self.excluded_paths = []
         self._rebuild_exclusion_list()
+        self.path_policy = PathPolicy(self.allowed_roots, self.excluded_paths)
         downloads_path = Path.home() / "Downloads"
         if downloads_path.exists() and downloads_path not in self.allowed_roots:
             self.allowed_roots.append(downloads_path)
             self._persist_allowed_roots()
-        allowed, _ = is_allowed(self.index_root, self.allowed_roots, self.excluded_paths)
-        if not allowed:
+        if not self.path_policy.is_allowed(self.index_root):
             self.allowed_roots.append(self.index_root)
             self._persist_allowed_roots()
 
@@ -150,12 +165,20 @@ class NousApp:
 
         # AI handler + knowledge systems
         self.ai_handler = AIHandler(model=self.selected_model, app_core=self)
+        self.vector_index = None
+        if self.semantic_search and vectors_available():
+            self.vector_index = VectorIndex(
+                self.index_db_path.with_name("knowledge_vectors.db"), model=self.embedding_model
+            )
         self.data_indexer = DataIndexer(
             base_path=self.index_root,
             db_path=self.index_db_path,
             allowed_roots=[str(p) for p in self.allowed_roots],
             excluded_paths=[str(p) for p in self.excluded_paths],
             max_file_size_mb=self.max_index_file_size_mb,
+            extraction_workers=self.index_extraction_workers,
+            extraction_timeout=self.index_extraction_timeout,
+            vector_index=self.vector_index,
         )
         self.base_memory_path = Path(__file__).parent / "data" / "base_memory.txt"
         self.memory_store = MemoryStore(Path(__file__).parent / "data" / "memory_store.db")
@@ -182,6 +205,13 @@ class NousApp:
 
         # Threads and indexing tracking
         self._manual_index_thread = None
+        self._fs_pipeline         = None
+        self._fs_handler          = None
+        self._reconcile_stop      = threading.Event()
+        self._fs_toast_count      = 0
+        self._fs_toast_message    = None
+        self._fs_toast_job        = None
+        self._fs_toast_last       = 0.0
 
         # Build UI
         self.setup_main_frame()
@@ -196,6 +226,8 @@ class NousApp:
 
         # Filesystem watcher
         self._start_fs_watcher()
+        self._start_index_reconciler()
+        self._sync_vectors()
 
         self.root.protocol("WM_DELETE_WINDOW", self._on_close)
 
@@ -274,19 +306,98 @@ class NousApp:
         self.show_home()
 
     def _start_fs_watcher(self):
-        handler  = FSHandler(self)
+        # The app's own log and databases live in data/, the default index root.
+        self._fs_pipeline = FSEventPipeline(self._on_fs_batch, ignore=app_output_filter(self.app_data_dir))
+        self._fs_handler  = FSHandler(self._fs_pipeline)
         observer = Observer()
         self._observer = observer
-        fm = self.views['files'].file_manager
-        for p in fm.include_paths:
-            if os.path.isdir(p):
-                try:
-                    observer.schedule(handler, p, recursive=True)
-                except:
-                    pass
+        self._schedule_fs_watches()
         observer.daemon = True
         observer.start()
 
+    def _watch_roots(self):
+        roots = [Path(p) for p in self.views['files'].file_manager.include_paths if os.path.isdir(p)]
+        if self.index_live_updates:
+            base = self.data_indexer.get_base_path()
+            if base.is_dir() and not any(base.is_relative_to(root) for root in roots):
+                roots.append(base)
+        return roots
+
+    def _schedule_fs_watches(self):
+        self._observer.unschedule_all()
+        for root in self._watch_roots():
+            try:
+                self._observer.schedule(self._fs_handler, str(root), recursive=True)
+            except:
+                pass
+
+    def _start_index_reconciler(self):
+        if not self.index_live_updates or self.index_reconcile_minutes <= 0:
+            return
+
+        def loop():
+            interval = self.index_reconcile_minutes * 60
+            while not self._reconcile_stop.wait(interval):
+                if self._manual_index_thread and self._manual_index_thread.is_alive():
+                    continue
+                try:
+                    result = self.data_indexer.reconcile(cancel_event=self._reconcile_stop)
+                except Exception as exc:
+                    log_event("index.reconcile_failed", error=str(exc))
+                    continue
+                if result["updated"] or result["removed"] or result["renamed"]:
+                    self.root.after(0, self._update_index_status)
+
+        threading.Thread(target=loop, name="index-reconcile", daemon=True).start()
+
+    def _sync_vectors(self):
+        """Embed whatever the vector index is missing, in the background."""
+        if self.vector_index is None:
+            return
+
+        def task():
+            try:
+                self.data_indexer.sync_vectors()
+            except Exception as exc:
+                log_event("vectors.sync_failed", error=str(exc))
+
+        threading.Thread(target=task, name="vector-sync", daemon=True).start()
+
+    def _on_fs_batch(self, batch):
+        """Apply a coalesced batch of file changes (runs on the pipeline thread)."""
+        result = self.views['files'].file_manager.apply_changes(batch.upserts, batch.deletes, batch.moves)
+        changed = any(result.values())
+        rebuilding = self._manual_index_thread and self._manual_index_thread.is_alive()
+        if self.index_live_updates and not rebuilding:
+            result = self.data_indexer.apply_changes(batch.upserts, batch.deletes, batch.moves)
+            changed = changed or any(result.values())
+        # Batches that touched nothing tracked (e.g. unindexed files) stay silent.
+        if changed:
+            self.root.after(0, lambda: self._queue_fs_toast(batch))
+
+    def _queue_fs_toast(self, batch):
+        message = None
+        if len(batch) == 1:
+            if batch.deletes:
+                message = f"File deleted: {Path(batch.deletes[0]).name}"
+            elif batch.moves:
+                message = f"File moved: {Path(batch.moves[0][1]).name}"
+            else:
+                message = f"File changed: {Path(batch.upserts[0]).name}"
+        self._fs_toast_count += len(batch)
+        self._fs_toast_message = message if self._fs_toast_count == 1 else None
+        if self._fs_toast_job is None:
+            wait = self._fs_toast_last + FS_TOAST_INTERVAL_SECONDS - time.monotonic()
+            self._fs_toast_job = self.root.after(max(0, int(wait * 1000)), self._flush_fs_toast)
+
+    def _flush_fs_toast(self):
+        count, message = self._fs_toast_count, self._fs_toast_message
+        self._fs_toast_count, self._fs_toast_message, self._fs_toast_job = 0, None, None
+        self._fs_toast_last = time.monotonic()
+        if count:
+            self.show_toast(message or f"{count} files changed")
+            self._update_index_status()
+
     def _on_close(self):
         if self._manual_index_thread and self._manual_index_thread.is_alive():
             if not messagebox.askyesno("Index in progress", "Close anyway?"):
@@ -296,11 +407,18 @@ class NousApp:
             self._observer.join(timeout=1)
         except:
             pass
+        if self._fs_pipeline is not None:
+            self._fs_pipeline.close()
+        self._reconcile_stop.set()
         if self.file_ai_popout:
             try: self.file_ai_popout.destroy()
             except: pass
+        self.views["files"].file_manager.close()
         self.data_indexer.close()
+        if self.vector_index is not None:
+            self.vector_index.close()
         self.memory_store.close()
+        self.ai_handler.close()
         self.root.destroy()
 
     def show_home(self):
@@ -482,6 +600,7 @@ class NousApp:
         ]
 
     def _sync_indexer_policy(self):
+        self.path_policy = PathPolicy(self.allowed_roots, self.excluded_paths)
         if hasattr(self, "data_indexer"):
             self.data_indexer.update_policy(
                 allowed_roots=[str(p) for p in self.allowed_roots],
@@ -489,8 +608,8 @@ class NousApp:
                 max_file_size_mb=self.max_index_file_size_mb,
             )
 
-    def is_path_allowed(self, path: Path) -> bool:
-        return is_allowed(path, self.allowed_roots, self.excluded_paths)[0]
+    def is_path_allowed(self, path: Path, resolve: bool = True) -> bool:
+        return self.path_policy.is_allowed(path, resolve=resolve)
 
     def resolve_user_path(self, text: str) -> Path | None:
         candidate = Path(text.strip().strip("\"").strip("'"))
@@ -499,14 +618,14 @@ class NousApp:
                 candidate = candidate.resolve()
             except OSError:
                 return None
-            return candidate if self.is_path_allowed(candidate) else None
-        for root in self.allowed_roots:
+            return candidate if self.is_path_allowed(candidate, resolve=False) else None
+        for root in self.path_policy.allowed_roots:
             attempt = Path(root) / candidate
             try:
                 resolved = attempt.resolve()
             except OSError:
                 continue
-            if self.is_path_allowed(resolved):
+            if self.is_path_allowed(resolved, resolve=False):
                 return resolved
         return None
 
@@ -517,15 +636,11 @@ class NousApp:
         if not path.exists() or not path.is_file():
             return None
         try:
-            text = path.read_text(encoding="utf-8")
-        except UnicodeDecodeError:
-            try:
-                text = path.read_text(encoding="utf-8", errors="ignore")
-            except Exception:
-                return None
+            # Reads only the first ``limit`` characters, however large the file is.
+            text, _ = read_text(path, limit)
         except Exception:
             return None
-        return text[:limit]
+        return text
 
     def _initialize_mode_state(self):
         self._advanced_search_pref = bool(self.internet_search_enabled)
@@ -759,9 +874,15 @@ class NousApp:
         settings.set_index_running(True)
         settings.reset_progress()
         settings.update_status("Indexing knowledge base...")
+        # Background summaries compete with the rebuild for disk and CPU.
+        file_manager = self.views['files'].file_manager
+        file_manager.pause_summaries()
 
         def task():
-            stats = self.data_indexer.rebuild_index(on_progress=self._index_progress_callback)
+            try:
+                stats = self.data_indexer.rebuild_index(on_progress=self._index_progress_callback)
+            finally:
+                file_manager.resume_summaries()
             self.root.after(0, lambda: self._on_index_complete(stats))
 
         self._manual_index_thread = threading.Thread(target=task, daemon=True)
@@ -776,6 +897,7 @@ class NousApp:
         summary = f"Indexed {stats['documents']} of {stats['total_scanned']} files."
         settings.update_status(summary)
         self._update_index_status()
+        self._sync_vectors()
         self.file_chat_view.display_message(
             f"Knowledge base refreshed with {stats['documents']} documents.",
             "system"
@@ -791,14 +913,14 @@ class NousApp:
         except OSError as exc:
             messagebox.showerror("Knowledge Index", f"Unable to use that folder: {exc}")
             return
-        allowed, _ = is_allowed(path, self.allowed_roots, self.excluded_paths)
-        if not allowed:
+        if not self.path_policy.is_allowed(path):
             self.add_allowed_root(path)
         try:
             self.data_indexer.set_base_path(path)
             self.index_root = path
             self.config.set("index_root", str(self.index_root))
             self._sync_indexer_policy()
+            self._schedule_fs_watches()
             self.views['settings'].update_status(f"Index folder updated to {path}.")
             self._update_index_status()
         except (FileNotFoundError, PermissionError) as exc:
@@ -836,7 +958,7 @@ class NousApp:
         self.views['settings'].refresh_stats(stats)
 
     def get_knowledge_context(self, prompt: str, limit: int = 3):
-        results = self.data_indexer.search(prompt, limit=limit)
+        results = self.data_indexer.hybrid_search(prompt, limit=limit)
         if not results:
             return "", []
         blocks = []
@@ -845,7 +967,12 @@ class NousApp:
             raw_path = hit.get('path')
             path = Path(raw_path) if raw_path else Path()
             preview = (hit.get('snippet') or hit.get('preview') or "").strip()
-            blocks.append(f"File: {path.name}\nLocation: {raw_path}\nExcerpt: {preview}")
+            # The model gets the best-matching passage; the source list keeps the short snippet.
+            excerpt = (hit.get('passage') or preview).strip()
+            block = f"File: {path.name}\nLocation: {raw_path}"
+            if hit.get('summary'):
+                block += f"\nSummary: {hit['summary']}"
+            blocks.append(f"{block}\nExcerpt: {excerpt}")
             sources.append({'path': raw_path, 'preview': preview})
         return "\n\n".join(blocks), sources
 
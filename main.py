@@ -1,8 +1,11 @@
 import tkinter as tk
+import multiprocessing
 from app_core import NousApp
 import os
 
 if __name__ == "__main__":
+    # Required for the indexer's extraction process pool in frozen builds.
+    multiprocessing.freeze_support()
     root = tk.Tk()
     root.title("Nous AI – Demo")
 
@@ -8,12 +8,22 @@ import platform
 import urllib.request
 import tkinter as tk
 import re
-from difflib import SequenceMatcher
 
 from tkinter import messagebox
 from pathlib import Path
 from datetime import datetime
 
+from modules.context_budget import ContextBudget, ContextSection, estimate_tokens
+from modules.interaction_store import InteractionStore, tokenize
+from modules.memory_store import BASE_POLICY_KEY
+from modules.telemetry import log_event
+from modules.ollama_client import (
+    DEFAULT_KEEP_ALIVE,
+    OllamaUnavailable,
+    generate_via_cli,
+    get_client,
+)
+
 # ========== GPU Monitoring ==========
 
 # Requires: pip install nvidia-ml-py3
@@ -72,6 +82,21 @@ class AIHandler:
         settings = load_gpu_settings()
         self.max_vram_usage = settings.get("max_vram_usage", MAX_VRAM_USAGE)
 
+        # Shared keep-alive HTTP client; keep_alive holds the model in memory
+        # between chat turns so back-to-back queries skip the reload.
+        self.ollama = get_client()
+        config = getattr(app_core, "config", None)
+        if config is not None and hasattr(config, "get"):
+            self.ollama.keep_alive = config.get("ollama_keep_alive", DEFAULT_KEEP_ALIVE)
+
+        # (cache key, text) of the static system prefix; see _static_prefix.
+        self._prefix_cache = None
+
+        self.interactions = InteractionStore(
+            self._interactions_path().with_suffix(".db"),
+            legacy_json=self._interactions_path(),
+        )
+
         self.ensure_ollama_installed()
         # Install any bundled Ollama models so they're ready for use.
         self.install_ollama_plugins()
@@ -141,12 +166,15 @@ class AIHandler:
             except Exception as e:
                 print(f"⚠️ Failed to install model {name}: {e}")
 
+    def _base_memory_path(self):
+        return Path(__file__).parent.parent / "data" / "base_memory.txt"
+
     def load_base_memory(self):
         if self.app_core and hasattr(self.app_core, "memory_store"):
-            stored_base = self.app_core.memory_store.get_memory("base_policy")
+            stored_base = self.app_core.memory_store.get_memory(BASE_POLICY_KEY)
             if stored_base:
                 return stored_base
-        path = Path(__file__).parent.parent / "data" / "base_memory.txt"
+        path = self._base_memory_path()
         if path.exists():
             try:
                 return path.read_text(encoding="utf-8").strip()
@@ -181,28 +209,6 @@ class AIHandler:
     def _interactions_path(self):
         return Path(__file__).parent.parent / "data" / "ai_interactions.json"
 
-    def _read_interactions(self):
-        path = self._interactions_path()
-        if not path.exists():
-            return []
-
-        try:
-            with open(path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            if isinstance(data, list):
-                return data
-        except json.JSONDecodeError:
-            print("Warning: ai_interactions.json is not valid JSON; starting fresh.")
-        except Exception as e:
-            print(f"Warning: Failed to read interactions: {e}")
-        return []
-
-    def _write_interactions(self, data):
-        path = self._interactions_path()
-        path.parent.mkdir(parents=True, exist_ok=True)
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2)
-
     def save_interaction(self, prompt, response):
         from uuid import uuid4
 
@@ -213,69 +219,40 @@ class AIHandler:
             "response": response
         }
 
-        data = self._read_interactions()
-        data.append(interaction)
-
         try:
-            self._write_interactions(data)
+            self.interactions.append(interaction)
         except Exception as e:
             print(f'[storage] Failed to save interaction: {e}')
         else:
             self._update_profile_from_message(prompt, response)
 
     def forget_by_keyword(self, keyword):
-        path = self._interactions_path()
-        data = self._read_interactions()
-
-        if not data:
-            return 0
-
-        new_data = [
-            entry for entry in data
-            if keyword.lower() not in entry['prompt'].lower()
-            and keyword.lower() not in entry['response'].lower()
-        ]
-
-        if len(new_data) == len(data):
-            return 0
-
         try:
-            self._write_interactions(new_data)
+            return self.interactions.forget_by_keyword(keyword)
         except Exception as e:
             print(f"Error deleting interactions: {e}")
             return 0
 
-        return len(data) - len(new_data)
-
     def load_recent_history(self, limit=5):
-        data = self._read_interactions()
-        return data[-limit:] if data else []
+        try:
+            return self.interactions.tail(limit)
+        except Exception as e:
+            print(f"Warning: Failed to read interactions: {e}")
+            return []
+
+    def close(self):
+        self.interactions.close()
 
     def _tokenize(self, text: str) -> set[str]:
-        if not text:
-            return set()
-        return {token for token in re.findall(r"[a-zA-Z0-9]+", text.lower()) if len(token) > 2}
+        return tokenize(text)
 
-    def _select_relevant_history(self, prompt: str, history) -> list:
-        prompt_text = (prompt or "").strip()
-        prompt_tokens = self._tokenize(prompt_text)
-        if not prompt_tokens:
+    def _select_relevant_history(self, prompt: str, limit: int = 2) -> list:
+        """Top past exchanges for ``prompt``, ranked over the whole log."""
+        try:
+            return self.interactions.relevant((prompt or "").strip(), limit=limit)
+        except Exception as e:
+            print(f"Warning: Failed to search interactions: {e}")
             return []
-        relevant = []
-        for entry in reversed(history):
-            candidate = (entry.get('prompt') or '').strip()
-            if not candidate:
-                continue
-            candidate_tokens = self._tokenize(candidate)
-            if not candidate_tokens:
-                continue
-            token_overlap = prompt_tokens & candidate_tokens
-            similarity = SequenceMatcher(None, prompt_text.lower(), candidate.lower()).ratio()
-            if len(token_overlap) >= 2 or similarity >= 0.55:
-                relevant.append(entry)
-            if len(relevant) >= 2:
-                break
-        return list(reversed(relevant))
 
     def _build_profile_context(self, limit: int = 6) -> str:
         store = self._memory_store()
@@ -350,7 +327,8 @@ class AIHandler:
         store = self._memory_store()
         if not store:
             return ""
-        matches = store.search_memory(prompt, limit=limit)
+        # The base policy is already in the cached system prefix.
+        matches = store.search_memory(prompt, limit=limit, exclude=(BASE_POLICY_KEY,))
         if not matches:
             return ""
         lines = [
@@ -383,70 +361,109 @@ class AIHandler:
         self.model = model_name
         self.ensure_model_pulled()
 
-    def query(self, prompt, timeout=120, save=True, memory=True):
-        self._check_and_throttle()
+    def context_budget(self):
+        config = getattr(self.app_core, "config", None)
+        return ContextBudget.for_model(self.model, config)
 
+    @staticmethod
+    def _headed_section(name, text, priority):
+        """Split a "Header:\nline\nline" context string into a budget section."""
+        header, _, body = text.partition("\n")
+        return ContextSection.from_text(name, body, header=header, priority=priority, separator="\n")
+
+    def _static_prefix(self):
+        """Base memory and profile facts, rebuilt only when their sources change.
+
+        The text is sent as the system message and stays byte-identical across
+        turns, so Ollama's runner reuses the KV cache for it (kept warm by
+        keep_alive) and only evaluates the per-turn part of the prompt.
+        """
+        store = self._memory_store()
+        try:
+            file_mtime = self._base_memory_path().stat().st_mtime
+        except OSError:
+            file_mtime = None
+        key = (id(store), getattr(store, "revision", None), file_mtime)
+        if self._prefix_cache is not None and self._prefix_cache[0] == key:
+            return self._prefix_cache[1]
+
+        parts = []
+        base_memory = self.load_base_memory()
+        if base_memory:
+            parts.append(base_memory)
+        profile_context = self._build_profile_context()
+        if profile_context:
+            parts.append(profile_context)
+        text = "\n\n".join(parts)
+        self._prefix_cache = (key, text)
+        log_event("prompt.prefix_rebuilt", model=self.model, tokens=estimate_tokens(text))
+        return text
+
+    def _compose_prompt(self, prompt, memory=True, context=None):
+        """Return ``(system, prompt)`` for the model.
+
+        ``system`` is the cached static prefix. The per-turn prompt is fitted
+        to what remains of the model's context budget; ``context`` holds extra
+        ContextSection objects from the caller (e.g. knowledge excerpts from
+        the chat view). The user prompt is never trimmed.
+        """
+        sections = []
+        system = ""
         if memory:
-            sections = []
-            base_memory = self.load_base_memory()
-            if base_memory:
-                sections.append(base_memory)
+            system = self._static_prefix()
 
             memory_context = self._build_memory_context(prompt)
             if memory_context:
-                sections.append(memory_context)
+                sections.append(self._headed_section("memory", memory_context, 20))
 
-            profile_context = self._build_profile_context()
-            if profile_context:
-                sections.append(profile_context)
-
-        history = self.load_recent_history(limit=5)
-        relevant_history = []
-        if history:
-            relevant_history = self._select_relevant_history(prompt, history)
-            if relevant_history:
-                history_lines = [
-                    f"User previously said: {entry['prompt']}"
-                    for entry in relevant_history
-                ]
-                sections.append("Conversation Context:\n" + "\n".join(history_lines))
+        relevant_history = self._select_relevant_history(prompt)
+        if relevant_history:
+            history_lines = [
+                f"User previously said: {entry['prompt']}"
+                for entry in relevant_history
+            ]
+            sections.append(ContextSection(
+                "history", history_lines, header="Conversation Context:", priority=40, separator="\n"
+            ))
 
+        sections.extend(context or [])
 
         fallback_history = []
-        if not relevant_history and history:
-            fallback_history = history[-1:]
+        if not relevant_history and not sections and not system:
+            fallback_history = self.load_recent_history(limit=1)
 
 
         if not sections and fallback_history:
-            sections.append("Conversation Context:\n" + "\n".join(entry['prompt'] for entry in fallback_history))
-
-        if sections:
-            context = "\n\n".join(sections)
-            full_prompt = f"{context}\n\nUser: {prompt}"
-        else:
-            full_prompt = prompt
-
-
+            sections.append(ContextSection(
+                "history",
+                [entry['prompt'] for entry in fallback_history],
+                header="Conversation Context:",
+                priority=40,
+                separator="\n",
+            ))
+
+        if not sections:
+            return system, prompt
+        sections.append(ContextSection("prompt", [f"User: {prompt}"], required=True))
+        budget = self.context_budget()
+        budget.max_tokens = max(1, budget.max_tokens - estimate_tokens(system))
+        return system, "\n\n".join(section.render() for section in budget.fit(sections))
+
+    def query(self, prompt, timeout=120, save=True, memory=True, context=None):
+        self._check_and_throttle()
+        system, full_prompt = self._compose_prompt(prompt, memory, context)
 
         try:
             self.set_status("Querying AI…")
-            result = subprocess.run(
-                ["ollama", "run", self.model, full_prompt],
-                capture_output=True,
-                text=True,
-                timeout=timeout,
-                encoding='utf-8',
-                errors='replace'
-            )
+            response = self._generate(system, full_prompt, timeout)
             self.set_status("AI responded.")
-            response = result.stdout.strip()
 
             if save:
                 self.save_interaction(prompt, response)
 
             return {'success': True, 'response': response, 'error': None}
 
-        except subprocess.TimeoutExpired:
+        except (subprocess.TimeoutExpired, TimeoutError):
             self.set_status("AI timed out.")
             return {'success': False, 'response': None, 'error': f"Timeout after {timeout}s"}
         except FileNotFoundError:
@@ -456,10 +473,81 @@ class AIHandler:
             self.set_status("AI failed.")
             return {'success': False, 'response': None, 'error': str(e)}
 
-    def query_with_retry(self, prompt, max_retries=3, initial_timeout=60):
+    def _generate(self, system, full_prompt, timeout):
+        """Complete ``full_prompt`` over the HTTP API, falling back to the CLI."""
+        try:
+            result = self.ollama.generate(self.model, full_prompt, system=system, timeout=timeout)
+            return (result.get("response") or "").strip()
+        except OllamaUnavailable:
+            result = generate_via_cli(self.model, self._inline_system(system, full_prompt), timeout=timeout)
+            return result.stdout.strip()
+
+    @staticmethod
+    def _inline_system(system, full_prompt):
+        """The CLI has no system field; prepend the prefix as before."""
+        return f"{system}\n\n{full_prompt}" if system else full_prompt
+
+    def query_with_retry(self, prompt, max_retries=3, initial_timeout=60, context=None, save=True, memory=True):
         for i in range(max_retries):
-            res = self.query(prompt, initial_timeout * (i + 1))
+            res = self.query(prompt, initial_timeout * (i + 1), save=save, memory=memory, context=context)
             if res['success']:
                 return res
             time.sleep(2)
         return res
+
+    def stream_query(self, prompt, timeout=120, save=True, memory=True, cancel_event=None, context=None):
+        """Yield response text as Ollama generates it.
+
+        ``timeout`` applies per chunk. The interaction is saved once the stream
+        completes; a cancelled stream is not saved. Errors are raised.
+        """
+        self._check_and_throttle()
+        system, full_prompt = self._compose_prompt(prompt, memory, context)
+
+        self.set_status("Querying AI…")
+        pieces = []
+        try:
+            for chunk in self.ollama.generate_stream(
+                self.model, full_prompt, system=system, timeout=timeout, cancel_event=cancel_event
+            ):
+                text = chunk.get("response") or ""
+                if text:
+                    pieces.append(text)
+                    yield text
+        except OllamaUnavailable:
+            result = generate_via_cli(self.model, self._inline_system(system, full_prompt), timeout=timeout)
+            text = result.stdout.strip()
+            if text:
+                pieces.append(text)
+                yield text
+
+        if cancel_event is not None and cancel_event.is_set():
+            self.set_status("AI response stopped.")
+            return
+        self.set_status("AI responded.")
+        if save:
+            self.save_interaction(prompt, "".join(pieces).strip())
+
+    def stream_with_retry(self, prompt, max_retries=3, initial_timeout=60, cancel_event=None, context=None):
+        """Streaming counterpart of ``query_with_retry``.
+
+        Only retries while nothing has been yielded, so callers never see a
+        response restart part-way through.
+        """
+        for i in range(max_retries):
+            produced = False
+            try:
+                for text in self.stream_query(
+                    prompt,
+                    timeout=initial_timeout * (i + 1),
+                    cancel_event=cancel_event,
+                    context=context,
+                ):
+                    produced = True
+                    yield text
+                return
+            except Exception:
+                cancelled = cancel_event is not None and cancel_event.is_set()
+                if produced or cancelled or i == max_retries - 1:
+                    raise
+                time.sleep(2)
@@ -3,12 +3,14 @@
 Detects available AI backends and exposes a small uniform interface.
 
 Supported providers (auto-detected):
-- Ollama CLI (recommended when available)
+- Ollama HTTP API, falling back to the CLI (recommended when available)
 - OpenAI via REST (when OPENAI_API_KEY is set)
 - Local CLI named `llama` or `llama.cpp` (best-effort)
 
 The module exposes `get_provider(preferred=None)` which returns an
-instance implementing `is_available()` and `query(prompt, model, timeout)`.
+instance implementing `is_available()`, `query(prompt, model, timeout)` and
+`stream(prompt, model, timeout, cancel_event)`; the latter yields response
+text as it arrives and raises RuntimeError on failure.
 If no provider is available, `get_provider()` returns None.
 """
 
@@ -18,10 +20,13 @@ import os
 import shutil
 import subprocess
 import json
+import threading
 import time
 import urllib.request
 import urllib.error
-from typing import Optional
+from typing import Iterator, Optional
+
+from modules.ollama_client import OllamaError, OllamaUnavailable, generate_via_cli, get_client
 
 
 class BaseProvider:
@@ -33,18 +38,42 @@ class BaseProvider:
     def query(self, prompt: str, model: str = "mistral", timeout: int = 120) -> dict:
         raise NotImplementedError()
 
+    def stream(
+        self,
+        prompt: str,
+        model: str = "mistral",
+        timeout: int = 120,
+        cancel_event: Optional[threading.Event] = None,
+    ) -> Iterator[str]:
+        """Yield response text; backends without streaming yield it in one piece."""
+        res = self.query(prompt, model=model, timeout=timeout)
+        if not res.get("success"):
+            raise RuntimeError(res.get("error") or "Query failed")
+        if res.get("response"):
+            yield res["response"]
+
 
 class OllamaProvider(BaseProvider):
     name = "ollama"
 
     def is_available(self) -> bool:
-        return shutil.which("ollama") is not None
+        return shutil.which("ollama") is not None or get_client().is_available()
 
     def query(self, prompt: str, model: str = "mistral", timeout: int = 120) -> dict:
         try:
-            proc = subprocess.run([
-                "ollama", "run", model, prompt
-            ], capture_output=True, text=True, timeout=timeout)
+            result = get_client().generate(model, prompt, timeout=timeout)
+            return {"success": True, "response": (result.get("response") or "").strip(), "error": None}
+        except OllamaUnavailable:
+            pass
+        except OllamaError as e:
+            return {"success": False, "response": None, "error": str(e)}
+        except TimeoutError:
+            return {"success": False, "response": None, "error": f"Timeout after {timeout}s"}
+        except Exception as e:
+            return {"success": False, "response": None, "error": str(e)}
+
+        try:
+            proc = generate_via_cli(model, prompt, timeout=timeout)
             return {"success": proc.returncode == 0, "response": proc.stdout.strip(), "error": None if proc.returncode == 0 else proc.stderr}
         except FileNotFoundError:
             return {"success": False, "response": None, "error": "ollama not found"}
@@ -53,6 +82,25 @@ class OllamaProvider(BaseProvider):
         except Exception as e:
             return {"success": False, "response": None, "error": str(e)}
 
+    def stream(
+        self,
+        prompt: str,
+        model: str = "mistral",
+        timeout: int = 120,
+        cancel_event: Optional[threading.Event] = None,
+    ) -> Iterator[str]:
+        try:
+            for chunk in get_client().generate_stream(model, prompt, timeout=timeout, cancel_event=cancel_event):
+                if chunk.get("response"):
+                    yield chunk["response"]
+            return
+        except OllamaUnavailable:
+            pass
+        except OllamaError as e:
+            raise RuntimeError(str(e)) from e
+        # HTTP API unreachable: the CLI has no streaming output worth parsing.
+        yield from super().stream(prompt, model=model, timeout=timeout, cancel_event=cancel_event)
+
 
 class OpenAIProvider(BaseProvider):
     name = "openai"
@@ -99,6 +147,50 @@ class OpenAIProvider(BaseProvider):
         except Exception as e:
             return {"success": False, "response": None, "error": str(e)}
 
+    def stream(
+        self,
+        prompt: str,
+        model: str = "gpt-3.5-turbo",
+        timeout: int = 120,
+        cancel_event: Optional[threading.Event] = None,
+    ) -> Iterator[str]:
+        if not self.api_key:
+            raise RuntimeError("OPENAI_API_KEY not set")
+
+        url = "https://api.openai.com/v1/chat/completions"
+        headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {self.api_key}"
+        }
+        body = {
+            "model": model,
+            "messages": [{"role": "user", "content": prompt}],
+            "max_tokens": 1024,
+            "stream": True,
+        }
+
+        data = json.dumps(body).encode("utf-8")
+        req = urllib.request.Request(url, data=data, headers=headers, method="POST")
+        try:
+            with urllib.request.urlopen(req, timeout=timeout) as resp:
+                # Server-sent events: one "data: {json}" line per delta.
+                for raw in resp:
+                    if cancel_event is not None and cancel_event.is_set():
+                        return
+                    line = raw.decode("utf-8").strip()
+                    if not line.startswith("data:"):
+                        continue
+                    payload = line[len("data:"):].strip()
+                    if payload == "[DONE]":
+                        return
+                    choices = json.loads(payload).get("choices") or []
+                    if choices:
+                        text = (choices[0].get("delta") or {}).get("content")
+                        if text:
+                            yield text
+        except urllib.error.HTTPError as e:
+            raise RuntimeError(f"HTTPError: {e.code}") from e
+
 
 class LocalCLIProvider(BaseProvider):
     name = "local_cli"
@@ -11,12 +11,11 @@ class AISorter:
         self.app_core = app_core
         self.file_manager = FileManager()
         self.ai = AIHandler(app_core=app_core)
-        self.summary_cache = {}
         self.sort_plan_path = Path("data/ai_sort_plan.json")
         self.sort_log_path = Path("data/ai_sort_log.json")
 
     def run_summary_phase(self):
-        files = list(self.file_manager.file_index.get("files", {}).values())
+        files = self.file_manager.snapshot_entries()
         summaries = []
 
         for f in files:
@@ -26,17 +25,9 @@ class AISorter:
             if not os.path.exists(path):
                 continue
 
-            summary = self.file_manager.load_file_summary(path)
-            if not summary:
-                try:
-                    with open(path, "r", encoding="utf-8", errors="ignore") as file:
-                        content = file.read()[:2000]
-                    prompt = f"Summarize this file and determine its main topic:\n\n{content}"
-                    result = self.ai.query_with_retry(prompt)
-                    summary = result["response"] if result["success"] else "Miscellaneous"
-                    self.file_manager.save_file_summary(path, summary)
-                except:
-                    summary = "Unreadable"
+            # Shared content-hash cache: files FileManager (or an earlier sort)
+            # already summarised, including copies and moves, cost no model call.
+            summary = f.get("summary") or self.file_manager.summary_for(path) or "Unreadable"
             summaries.append((path, summary))
         return summaries
 
@@ -0,0 +1,189 @@
+"""Token budgeting for prompt assembly.
+
+Prompt context is described as prioritised sections made of blocks (one
+knowledge excerpt, one memory line, ...). ``ContextBudget.fit`` drops blocks
+that repeat higher-priority content, then fills the model's token budget in
+priority order, truncating the section that crosses the limit and dropping
+the rest. What was removed is reported through telemetry.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from modules.telemetry import log_event
+
+CHARS_PER_TOKEN = 4
+DEFAULT_CONTEXT_TOKENS = 3000
+# A section squeezed below this many tokens is dropped rather than truncated.
+MIN_SECTION_TOKENS = 48
+# Blocks whose word-trigram sets overlap at least this much count as duplicates.
+DUPLICATE_JACCARD = 0.8
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English text)."""
+    if not text:
+        return 0
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+@dataclass
+class ContextSection:
+    """One prompt section; lower ``priority`` values are kept first."""
+
+    name: str
+    blocks: List[str]
+    header: str = ""
+    priority: int = 50
+    required: bool = False
+    separator: str = "\n\n"
+
+    @classmethod
+    def from_text(cls, name: str, text: str, **kwargs: Any) -> "ContextSection":
+        separator = kwargs.get("separator", "\n\n")
+        return cls(name=name, blocks=[b for b in (text or "").split(separator) if b.strip()], **kwargs)
+
+    def render(self) -> str:
+        body = self.separator.join(self.blocks)
+        return f"{self.header}\n{body}" if self.header else body
+
+    def tokens(self) -> int:
+        return estimate_tokens(self.render())
+
+
+@dataclass
+class _Seen:
+    normalised: List[str] = field(default_factory=list)
+    shingles: List[Set[Tuple[str, ...]]] = field(default_factory=list)
+
+
+def _normalise(text: str) -> str:
+    return " ".join(re.findall(r"\w+", text.lower()))
+
+
+def _shingles(normalised: str) -> Set[Tuple[str, ...]]:
+    words = normalised.split()
+    return {tuple(words[i:i + 3]) for i in range(len(words) - 2)}
+
+
+def _truncate(text: str, tokens: int) -> str:
+    limit = max(0, tokens * CHARS_PER_TOKEN - 2)
+    if len(text) <= limit:
+        return text
+    cut = text.rfind(" ", 0, limit)
+    return text[: cut if cut > limit // 2 else limit].rstrip() + " …"
+
+
+class ContextBudget:
+    """Fit prompt sections into ``max_tokens``."""
+
+    def __init__(self, max_tokens: int = DEFAULT_CONTEXT_TOKENS, model: Optional[str] = None) -> None:
+        self.max_tokens = max(1, int(max_tokens))
+        self.model = model
+        self.last_report: List[Dict[str, Any]] = []
+
+    @classmethod
+    def for_model(cls, model: Optional[str], config: Any = None) -> "ContextBudget":
+        """Budget from ``context_budgets`` (per model, or per family before ':'),
+        falling back to ``context_budget_tokens`` and then the default."""
+        budgets: Dict[str, Any] = {}
+        default = DEFAULT_CONTEXT_TOKENS
+        if config is not None and hasattr(config, "get"):
+            budgets = config.get("context_budgets", {}) or {}
+            default = config.get("context_budget_tokens", default) or default
+        name = (model or "").strip()
+        value = budgets.get(name) or budgets.get(name.split(":", 1)[0]) or default
+        try:
+            return cls(int(value), model=model)
+        except (TypeError, ValueError):
+            return cls(DEFAULT_CONTEXT_TOKENS, model=model)
+
+    @staticmethod
+    def _is_duplicate(block: str, seen: _Seen) -> bool:
+        normalised = _normalise(block)
+        if not normalised:
+            return True
+        shingles = _shingles(normalised)
+        for earlier, earlier_shingles in zip(seen.normalised, seen.shingles):
+            if normalised in earlier:
+                return True
+            if shingles and earlier_shingles:
+                overlap = len(shingles & earlier_shingles) / len(shingles | earlier_shingles)
+                if overlap >= DUPLICATE_JACCARD:
+                    return True
+        seen.normalised.append(normalised)
+        seen.shingles.append(shingles)
+        return False
+
+    def fit(self, sections: Sequence[ContextSection]) -> List[ContextSection]:
+        """Return the sections that fit, in their original order."""
+        order = sorted(
+            range(len(sections)),
+            key=lambda i: (not sections[i].required, sections[i].priority, i),
+        )
+        remaining = self.max_tokens
+        seen = _Seen()
+        kept: Dict[int, ContextSection] = {}
+        report: List[Dict[str, Any]] = []
+        total_before = 0
+
+        for i in order:
+            section = sections[i]
+            if not section.blocks:
+                continue
+            header_cost = estimate_tokens(section.header) + 1 if section.header else 0
+            sep_cost = estimate_tokens(section.separator)
+            blocks: List[str] = []
+            deduped = 0
+            truncated = False
+            original_tokens = section.tokens()
+            total_before += original_tokens
+
+            for block in section.blocks:
+                if not section.required and self._is_duplicate(block, seen):
+                    deduped += 1
+                    continue
+                cost = estimate_tokens(block) + sep_cost + (0 if blocks else header_cost)
+                if section.required or cost <= remaining:
+                    blocks.append(block)
+                    remaining -= cost
+                    continue
+                room = remaining - sep_cost - (0 if blocks else header_cost)
+                if room >= MIN_SECTION_TOKENS:
+                    blocks.append(_truncate(block, room))
+                    remaining = 0
+                truncated = True
+                break
+
+            if blocks:
+                kept[i] = replace(section, blocks=blocks)
+            if deduped or truncated or not blocks:
+                kept_tokens = kept[i].tokens() if blocks else 0
+                report.append(
+                    {
+                        "section": section.name,
+                        "tokens": original_tokens,
+                        "kept_tokens": kept_tokens,
+                        "deduped_blocks": deduped,
+                        "truncated": truncated,
+                    }
+                )
+
+        self.last_report = report
+        if report:
+            used = sum(section.tokens() for section in kept.values())
+            log_event(
+                "context.trimmed",
+                model=self.model,
+                budget=self.max_tokens,
+                tokens_before=total_before,
+                tokens_after=used,
+                sections=report,
+            )
+        return [kept[i] for i in range(len(sections)) if i in kept]
+
+
+__all__ = ["ContextBudget", "ContextSection", "estimate_tokens"]
@@ -2,77 +2,103 @@
 
 from __future__ import annotations
 
-import json
+import heapq
 import os
+import queue
 import re
 import sqlite3
 import threading
 import time
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
+from concurrent.futures import Future
 from datetime import datetime
 from difflib import SequenceMatcher
 from pathlib import Path
-from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
 import humanize
 
+from modules.sqlite_pool import SQLitePool
+from modules.extraction_pool import EXTRACTION_TIMEOUT_SECONDS, ExtractionPool, get_extraction_pool
+from modules.extractors import COST_HEAVY, REGISTRY, ExtractionUnavailable, get_extractor, iter_document_text
+from modules.summary_cache import SummaryCache, get_summary_cache
+from modules.text_chunks import iter_chunks
+from modules.vector_index import VectorIndex, reciprocal_rank_fusion
 from modules.path_policies import (
+    PathPolicy,
     default_allowed_roots,
     default_excluded_paths,
-    is_allowed,
     normalise_paths,
 )
 from modules.telemetry import log_event
 
-ALLOWED_EXTENSIONS = {
-    ".txt",
-    ".md",
-    ".markdown",
-    ".rst",
-    ".py",
-    ".json",
-    ".cfg",
-    ".ini",
-    ".yaml",
-    ".yml",
-    ".csv",
-    ".toml",
-    ".js",
-    ".ts",
-    ".jsx",
-    ".tsx",
-    ".html",
-    ".css",
-    ".scss",
-    ".less",
-    ".pdf",
-    ".docx",
-    ".log",
-    ".ipynb",
-}
-
-TEXT_EXTENSIONS = {
-    ".txt",
-    ".md",
-    ".markdown",
-    ".rst",
-    ".json",
-    ".cfg",
-    ".ini",
-    ".yaml",
-    ".yml",
-    ".csv",
-    ".toml",
-    ".log",
-    ".html",
-    ".css",
-    ".scss",
-    ".less",
-}
-
-CODE_EXTENSIONS = {".py", ".js", ".ts", ".jsx", ".tsx"}
-
-MAX_SNIPPET_CHARS = 6000
+# Every format the extractor registry can read; the registry is the one list.
+ALLOWED_EXTENSIONS = REGISTRY.extensions()
+
+# Documents are indexed as overlapping passages, up to this much text each.
+MAX_DOCUMENT_CHARS = 1_000_000
+# Passage rowids are (files.id << CHUNK_ROWID_BITS) | passage number, so a
+# file's passages form one rowid range.
+CHUNK_ROWID_BITS = 20
+# Passage matches fetched per requested result before keeping the best per file.
+PASSAGES_PER_RESULT = 8
+
+# Filename candidates pulled from the trigram index per search.
+NAME_CANDIDATES_PER_RESULT = 10
+MAX_QUERY_TRIGRAMS = 32
+
+# reconcile() sleeps briefly every this many files to stay in the background.
+RECONCILE_YIELD_EVERY = 256
+RECONCILE_YIELD_SECONDS = 0.01
+
+# Sentinel that tells the rebuild writer thread the walk is finished.
+_END_OF_WORK = object()
+
+
+def _path_depth(raw_path: str) -> int:
+    """Equivalent to ``len(Path(raw_path).parts)`` for absolute paths, without a Path."""
+    return raw_path.rstrip(os.sep).count(os.sep) + 1
+
+
+def default_extraction_workers() -> int:
+    """Leave one core for the UI and the writer thread."""
+    return max(1, (os.cpu_count() or 1) - 1)
+
+
+def _chunk_bounds(file_id: int) -> Tuple[int, int]:
+    """First and last passage rowid belonging to ``file_id``."""
+    low = file_id << CHUNK_ROWID_BITS
+    return low, low + (1 << CHUNK_ROWID_BITS) - 1
+
+
+def extract_text_chunks(
+    path: Path, size: int, max_file_size_mb: float
+) -> Tuple[Optional[List[str]], Optional[str]]:
+    """Return (passages, note) tuple for a file.
+
+    Extractors stream blocks, pages or paragraphs into the chunker, which
+    stops reading at ``MAX_DOCUMENT_CHARS``, so memory is bounded by that
+    budget rather than by the file. Lives at module level so it can be
+    shipped to extraction worker processes.
+    """
+    note = None
+
+    if size > int(max_file_size_mb * 1024 * 1024):
+        note = f"Skipped content (>{max_file_size_mb:.1f} MB)"
+        return ([path.name], note)
+
+    pieces = iter_document_text(path)
+    if pieces is None:
+        return (None, "Unsupported format")
+    try:
+        return (list(iter_chunks(pieces, max_chars=MAX_DOCUMENT_CHARS)), note)
+    except ExtractionUnavailable as exc:
+        return ([path.name], str(exc))
+    except Exception as exc:
+        note = f"Read error: {exc}"
+        return (None, note)
+    finally:
+        pieces.close()
 
 
 class DataIndexer:
@@ -85,6 +111,14 @@ class DataIndexer:
         allowed_roots: Sequence[str | Path] | None = None,
         excluded_paths: Sequence[str | Path] | None = None,
         max_file_size_mb: float = 8.0,
+        extraction_workers: Optional[int] = None,
+        extraction_timeout: float = EXTRACTION_TIMEOUT_SECONDS,
+        queue_size: int = 256,
+        write_batch_size: int = 200,
+        write_batch_age: float = 2.0,
+        search_cache_size: int = 128,
+        summary_cache: Optional[SummaryCache] = None,
+        vector_index: Optional[VectorIndex] = None,
     ) -> None:
         project_root = Path(__file__).parent.parent
         self.base_path = Path(base_path or (project_root / "data")).expanduser().resolve()
@@ -92,19 +126,47 @@ class DataIndexer:
         self.db_path = Path(db_path or default_db).expanduser().resolve()
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
 
-        self.allowed_extensions = {ext.lower() for ext in ALLOWED_EXTENSIONS}
+        # Read at construction so extractors registered after import count too.
+        self.allowed_extensions = REGISTRY.extensions()
 
         self.allowed_roots = normalise_paths(allowed_roots) or default_allowed_roots()
         self.excluded_paths = normalise_paths(excluded_paths) or default_excluded_paths()
+        self.policy = PathPolicy(self.allowed_roots, self.excluded_paths)
         self.max_file_size_mb = max(1.0, float(max_file_size_mb))
         self.max_file_size_bytes = int(self.max_file_size_mb * 1024 * 1024)
+        self.extraction_workers = (
+            default_extraction_workers() if extraction_workers is None else max(0, int(extraction_workers))
+        )
+        self.extraction_timeout = max(1.0, float(extraction_timeout))
+        self.queue_size = max(1, int(queue_size))
+        self.write_batch_size = max(1, int(write_batch_size))
+        self.write_batch_age = max(0.0, float(write_batch_age))
+        self.search_cache_size = max(0, int(search_cache_size))
 
         self._lock = threading.RLock()
+        self._pool: Optional[SQLitePool] = None
         self._conn: Optional[sqlite3.Connection] = None
         self._fts_available = True
+        self._names_available = True
         self._cancel_event = threading.Event()
         self._last_skipped: List[Dict[str, str]] = []
         self._last_errors: List[Dict[str, str]] = []
+        # path -> pending row (None marks a delete); flushed by flush_writes().
+        self._pending_writes: Dict[str, Optional[Tuple]] = {}
+        self._batch_started: Optional[float] = None
+        # Bumped on every index mutation; cached searches from older generations are stale.
+        self._generation = 0
+        # (query, limit) -> ((generation, summary revision), hits)
+        self._search_cache: "OrderedDict[Tuple[str, int], Tuple[Tuple[int, int], List[Dict[str, str]]]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._cache_hits = 0
+        self._cache_misses = 0
+        # Opened on first use so indexers that never search don't touch it.
+        self._summary_cache = summary_cache
+        # Optional semantic layer; fed from flush_writes, queried by hybrid_search.
+        self.vector_index = vector_index
+        if vector_index is not None and vector_index.passage_source is None:
+            vector_index.passage_source = self.indexed_passages
 
         self._connect()
         self._prepare_schema()
@@ -116,6 +178,7 @@ class DataIndexer:
         allowed_roots: Sequence[str | Path] | None = None,
         excluded_paths: Sequence[str | Path] | None = None,
         max_file_size_mb: Optional[float] = None,
+        extraction_workers: Optional[int] = None,
     ) -> None:
         if allowed_roots is not None:
             self.allowed_roots = normalise_paths(allowed_roots) or default_allowed_roots()
@@ -124,9 +187,13 @@ class DataIndexer:
             extras = normalise_paths(excluded_paths)
             merged = base + [path for path in extras if path not in base]
             self.excluded_paths = merged
+        if allowed_roots is not None or excluded_paths is not None:
+            self.policy = PathPolicy(self.allowed_roots, self.excluded_paths)
         if max_file_size_mb is not None:
             self.max_file_size_mb = max(1.0, float(max_file_size_mb))
             self.max_file_size_bytes = int(self.max_file_size_mb * 1024 * 1024)
+        if extraction_workers is not None:
+            self.extraction_workers = max(0, int(extraction_workers))
 
     def cancel_indexing(self) -> None:
         self._cancel_event.set()
@@ -136,10 +203,10 @@ class DataIndexer:
     def _connect(self) -> None:
         if self._conn:
             return
-        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
-        self._conn.row_factory = sqlite3.Row
-        self._conn.execute("PRAGMA journal_mode=WAL;")
-        self._conn.execute("PRAGMA synchronous=NORMAL;")
+        # Writes go through the pool's writer under self._lock; searches and
+        # stats use per-thread read-only connections so a rebuild never blocks them.
+        self._pool = SQLitePool(self.db_path)
+        self._conn = self._pool.writer
 
     def _prepare_schema(self) -> None:
         with self._lock:
@@ -164,24 +231,80 @@ class DataIndexer:
                 """
             )
             try:
+                # One row per passage; see CHUNK_ROWID_BITS for the rowid layout.
                 cur.execute(
                     """
-                    CREATE VIRTUAL TABLE IF NOT EXISTS file_content
-                    USING fts5(path UNINDEXED, content, tokenize = 'porter');
+                    CREATE VIRTUAL TABLE IF NOT EXISTS file_chunks
+                    USING fts5(content, tokenize = 'porter');
                     """
                 )
             except sqlite3.OperationalError:
                 self._fts_available = False
                 cur.execute(
                     """
-                    CREATE TABLE IF NOT EXISTS file_content (
-                        file_id INTEGER PRIMARY KEY,
-                        content TEXT,
-                        FOREIGN KEY(file_id) REFERENCES files(id) ON DELETE CASCADE
+                    CREATE TABLE IF NOT EXISTS file_chunks (
+                        id      INTEGER PRIMARY KEY,
+                        content TEXT
                     )
                     """
                 )
+            try:
+                # Lower-cased basenames keyed by files.id; the trigram tokenizer
+                # serves substring and fuzzy filename lookups without a table scan.
+                cur.execute(
+                    """
+                    CREATE VIRTUAL TABLE IF NOT EXISTS file_names
+                    USING fts5(name, tokenize = 'trigram');
+                    """
+                )
+            except sqlite3.OperationalError:
+                self._names_available = False
             self._conn.commit()
+            self._migrate_file_content()
+            if self._names_available:
+                self._backfill_file_names()
+
+    def _migrate_file_content(self) -> None:
+        """Move pre-chunking ``file_content`` rows into ``file_chunks``.
+
+        Those rows only hold each document's first few thousand characters,
+        so the next full pass re-extracts every file (see ``_reextract_pending``).
+        """
+        row = self._conn.execute(
+            "SELECT sql FROM sqlite_master WHERE name = 'file_content'"
+        ).fetchone()
+        if row is None:
+            return
+        key = "file_id" if "file_id" in (row["sql"] or "") else "rowid"
+        with self._conn:
+            self._conn.execute(
+                f"""
+                INSERT OR REPLACE INTO file_chunks(rowid, content)
+                SELECT {key} << {CHUNK_ROWID_BITS}, content FROM file_content
+                WHERE {key} IN (SELECT id FROM files)
+                """
+            )
+            self._conn.execute("DROP TABLE file_content")
+            self._conn.execute(
+                "INSERT OR REPLACE INTO metadata (key, value) VALUES ('reextract_pending', '1')"
+            )
+        log_event("index.migrated_chunks", db=str(self.db_path))
+
+    def _reextract_pending(self) -> bool:
+        return self._get_meta("reextract_pending") == "1"
+
+    def _backfill_file_names(self) -> None:
+        """Populate file_names for rows indexed before the table existed."""
+        rows = self._conn.execute(
+            "SELECT id, path FROM files WHERE id NOT IN (SELECT rowid FROM file_names)"
+        ).fetchall()
+        if not rows:
+            return
+        with self._conn:
+            self._conn.executemany(
+                "INSERT INTO file_names(rowid, name) VALUES (?, ?)",
+                [(row["id"], os.path.basename(row["path"]).lower()) for row in rows],
+            )
 
     def _update_meta(self, key: str, value: str) -> None:
         with self._lock:
@@ -192,8 +315,8 @@ class DataIndexer:
             self._conn.commit()
 
     def _get_meta(self, key: str, default=None):
-        with self._lock:
-            row = self._conn.execute(
+        with self._pool.read() as conn:
+            row = conn.execute(
                 "SELECT value FROM metadata WHERE key = ?", (key,)
             ).fetchone()
         return row[0] if row else default
@@ -219,7 +342,15 @@ class DataIndexer:
         on_progress: Callable[[int, int, str], None] | None = None,
         cancel_event: threading.Event | None = None,
     ) -> Dict[str, int | str | bool]:
-        """Incrementally rebuild the knowledge index."""
+        """Incrementally rebuild the knowledge index.
+
+        The scandir walk streams on the calling thread into a bounded queue, so
+        extraction starts before the walk finishes. Changed files are extracted
+        by isolated worker processes (``extraction_workers`` > 1, and always for
+        heavy formats) with a per-file ``extraction_timeout``; a single writer thread
+        applies results to SQLite in walk order, so ``on_progress`` still reports
+        monotonically; its ``total`` is the number of files discovered so far.
+        """
         base = self.get_base_path()
         if not base.exists():
             return {"documents": 0, "total_scanned": 0, "skipped": 0, "errors": 0, "cancelled": False}
@@ -231,65 +362,79 @@ class DataIndexer:
         self._last_skipped = []
         self._last_errors = []
 
-        candidates = self._collect_candidates(base, event)
-        total = len(candidates)
-        log_event("index.rebuild_start", base=str(base), candidates=total)
+        log_event("index.rebuild_start", base=str(base), workers=self.extraction_workers)
 
         with self._lock:
             existing_rows = self._conn.execute(
                 "SELECT path, mtime, size FROM files"
             ).fetchall()
-        existing = {Path(row["path"]): (row["mtime"], row["size"]) for row in existing_rows}
-
-        updated = 0
-        processed = 0
-        seen_paths: set[Path] = set()
+        existing = {row["path"]: (row["mtime"], row["size"]) for row in existing_rows}
+        reextract = self._reextract_pending()
+
+        seen_paths: set[str] = set()
+        # "discovered" grows while the walk streams; the writer reports it as the total.
+        counters = {"updated": 0, "processed": 0, "discovered": 0}
+        pending: "queue.Queue" = queue.Queue(maxsize=self.queue_size)
+        pool: Optional[ExtractionPool] = None
         cancelled = False
 
-        for idx, path in enumerate(candidates, start=1):
-            if event.is_set():
-                cancelled = True
-                break
-
-            seen_paths.add(path)
-            processed += 1
-            try:
-                stat = path.stat()
-            except OSError as exc:
-                self._record_error(path, f"Stat failed: {exc}")
-                continue
-
-            previous = existing.get(path)
-            if previous and previous[0] == stat.st_mtime and previous[1] == stat.st_size:
-                if on_progress:
-                    on_progress(idx, total, str(path))
-                continue
-
-            snippet, note = self._read_text_snippet(path, stat.st_size)
-            if snippet is None:
-                # fall back to filename when no readable content
-                snippet = f"{path.name} (no readable text found)"
-
-            with self._lock:
-                self._upsert_file(path, stat, snippet)
-            updated += 1
+        writer = threading.Thread(
+            target=self._write_results,
+            args=(pending, counters, event, on_progress),
+            name="index-writer",
+            daemon=True,
+        )
+        writer.start()
 
-            if note:
-                self._record_skip(path, note)
+        try:
+            for idx, (path, stat) in enumerate(self._iter_candidates(base, event), start=1):
+                if event.is_set():
+                    cancelled = True
+                    break
+
+                counters["discovered"] = idx
+                key = str(path)
+                seen_paths.add(key)
+                if stat is None:
+                    pending.put((idx, path, None, None))
+                    continue
 
-            if on_progress:
-                on_progress(idx, total, str(path))
+                previous = None if reextract else existing.get(key)
+                if previous and previous[0] == stat.st_mtime and previous[1] == stat.st_size:
+                    pending.put((idx, path, None, None))
+                    continue
 
-        stale_paths = set(existing.keys()) - seen_paths
-        if stale_paths:
-            with self._lock:
-                for stale in stale_paths:
-                    self._delete_file(stale)
+                isolate = self.extraction_workers > 1 or self._is_heavy(path)
+                if isolate and pool is None:
+                    pool = ExtractionPool(max(1, self.extraction_workers), timeout=self.extraction_timeout)
+                pending.put((idx, path, stat, self._submit_extraction(pool if isolate else None, path, stat)))
+        finally:
+            if event.is_set():
+                cancelled = True
+            pending.put(_END_OF_WORK)
+            writer.join()
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+
+        if not cancelled:
+            # Only prune when the walk completed; a cancelled walk has not seen
+            # every path, so missing entries are not necessarily stale.
+            stale_paths = set(existing.keys()) - seen_paths
+            if stale_paths:
+                with self._lock:
+                    for stale in stale_paths:
+                        self._delete_file(Path(stale))
+        self.flush_writes()
+        if reextract and not cancelled:
+            self._update_meta("reextract_pending", "0")
 
         documents = self._count_files()
         self._update_meta("last_indexed", datetime.utcnow().isoformat())
         self._update_meta("document_count", str(documents))
 
+        total = counters["discovered"]
+        updated = counters["updated"]
+        processed = counters["processed"]
         log_event(
             "index.rebuild_complete",
             base=str(base),
@@ -311,10 +456,122 @@ class DataIndexer:
             "cancelled": cancelled,
         }
 
-    def stats(self) -> Dict[str, str | int]:
+    def apply_changes(
+        self,
+        upserts: Iterable[str | Path] = (),
+        deletes: Iterable[str | Path] = (),
+        moves: Iterable[Tuple[str | Path, str | Path]] = (),
+    ) -> Dict[str, int]:
+        """Update the index for a batch of watched-path changes.
+
+        Only paths under the base path with an indexable extension are
+        touched. Created or modified files are extracted inline and unchanged
+        ones (same mtime and size) are skipped; a rename whose size and mtime
+        match the indexed row only rewrites the path, without reading content.
+        """
         base = self.get_base_path()
+        removed_paths = [Path(raw) for raw in deletes]
+        candidates = [Path(raw) for raw in upserts]
+
+        renames: List[Tuple[Path, Path, os.stat_result]] = []
+        for src, dst in moves:
+            src, dst = Path(src), Path(dst)
+            stat = self._indexable_stat(dst, base)
+            if stat is None:
+                removed_paths.append(src)
+            elif src.is_relative_to(base):
+                renames.append((src, dst, stat))
+            else:
+                candidates.append(dst)
+
+        renamed = 0
+        if renames:
+            with self._lock:
+                moved = self._rename_rows(renames)
+            renamed = len(moved)
+            for src, dst, _stat in renames:
+                if str(dst) not in moved:
+                    removed_paths.append(src)
+                    candidates.append(dst)
+
+        removed = 0
         with self._lock:
-            doc_count_row = self._conn.execute("SELECT COUNT(*) FROM files").fetchone()
+            for path in removed_paths:
+                if path.is_relative_to(base):
+                    self._delete_file(path)
+                    removed += 1
+
+        to_extract: List[Tuple[Path, os.stat_result]] = []
+        with self._pool.read() as conn:
+            for path in dict.fromkeys(candidates):
+                stat = self._indexable_stat(path, base)
+                if stat is None:
+                    continue
+                row = conn.execute("SELECT mtime, size FROM files WHERE path = ?", (str(path),)).fetchone()
+                if row is not None and row["mtime"] == stat.st_mtime and row["size"] == stat.st_size:
+                    continue
+                to_extract.append((path, stat))
+
+        updated = 0
+        for path, stat in to_extract:
+            passages, note = self._read_text_chunks(path, stat.st_size)
+            if passages is None:
+                passages = [f"{path.name} (no readable text found)"]
+            with self._lock:
+                self._upsert_file(path, stat, passages)
+            updated += 1
+            if note:
+                self._record_skip(path, note)
+        self.flush_writes()
+        if updated or removed or renamed:
+            log_event("index.live_update", updated=updated, removed=removed, renamed=renamed)
+        return {"updated": updated, "removed": removed, "renamed": renamed}
+
+    def reconcile(self, cancel_event: threading.Event | None = None) -> Dict[str, int | bool]:
+        """Catch changes the watcher missed.
+
+        Walks and stats the base path (unchanged files are never read) and
+        applies the differences through ``apply_changes``. The walk pauses
+        briefly every ``RECONCILE_YIELD_EVERY`` files so it stays in the
+        background next to searches and live updates.
+        """
+        base = self.get_base_path()
+        event = cancel_event or threading.Event()
+        if not base.exists():
+            return {"updated": 0, "removed": 0, "renamed": 0, "cancelled": False}
+
+        with self._pool.read() as conn:
+            existing = {
+                row["path"]: (row["mtime"], row["size"])
+                for row in conn.execute("SELECT path, mtime, size FROM files")
+            }
+
+        # Keep the last rebuild's skip/error report; a reconcile pass is not a run.
+        last_skipped, last_errors = self._last_skipped, self._last_errors
+        self._last_skipped, self._last_errors = [], []
+        changed: List[Path] = []
+        seen: set[str] = set()
+        try:
+            for idx, (path, stat) in enumerate(self._iter_candidates(base, event), start=1):
+                if idx % RECONCILE_YIELD_EVERY == 0:
+                    time.sleep(RECONCILE_YIELD_SECONDS)
+                key = str(path)
+                seen.add(key)
+                if stat is not None and existing.get(key) != (stat.st_mtime, stat.st_size):
+                    changed.append(path)
+        finally:
+            self._last_skipped, self._last_errors = last_skipped, last_errors
+
+        if event.is_set():
+            return {"updated": 0, "removed": 0, "renamed": 0, "cancelled": True}
+        result = self.apply_changes(upserts=changed, deletes=set(existing) - seen)
+        log_event("index.reconciled", base=str(base), scanned=len(seen), **result)
+        return {**result, "cancelled": False}
+
+    def stats(self) -> Dict[str, str | int]:
+        base = self.get_base_path()
+        with self._pool.read() as conn:
+            doc_count_row = conn.execute("SELECT COUNT(*) FROM files").fetchone()
         count = doc_count_row[0] if doc_count_row else 0
         return {
             "documents": count,
@@ -336,19 +593,161 @@ class DataIndexer:
             return []
 
         limit = max(1, int(limit))
+        cache_key = (" ".join(query.lower().split()), limit)
+        # Hits are cached with their summaries, so a new summary invalidates them too.
+        stamp = (self._generation, self._summaries().revision)
+        with self._cache_lock:
+            cached = self._search_cache.get(cache_key)
+            if cached is not None and cached[0] == stamp:
+                self._search_cache.move_to_end(cache_key)
+                self._cache_hits += 1
+                return [dict(hit) for hit in cached[1]]
+            self._cache_misses += 1
+
+        final = self._attach_summaries(self._run_search(query, limit))
+
+        if self.search_cache_size:
+            with self._cache_lock:
+                self._search_cache[cache_key] = (stamp, [dict(hit) for hit in final])
+                self._search_cache.move_to_end(cache_key)
+                while len(self._search_cache) > self.search_cache_size:
+                    self._search_cache.popitem(last=False)
+        return final
+
+    def _summaries(self) -> SummaryCache:
+        if self._summary_cache is None:
+            self._summary_cache = get_summary_cache()
+        return self._summary_cache
+
+    def _attach_summaries(self, hits: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """Add cached file summaries to hits (one stat and lookup per hit)."""
+        if not hits:
+            return hits
+        entries = []
+        for hit in hits:
+            try:
+                stat = os.stat(hit["path"])
+            except OSError:
+                continue
+            entries.append((hit["path"], stat.st_size, stat.st_mtime))
+        try:
+            found = self._summaries().lookup(entries)
+        except sqlite3.Error:
+            return hits
+        for hit in hits:
+            if hit["path"] in found:
+                hit["summary"] = found[hit["path"]]
+        return hits
+
+    def hybrid_search(self, query: str, limit: int = 5) -> List[Dict[str, str]]:
+        """Fuse lexical ``search`` with semantic matches (reciprocal rank fusion).
+
+        Without a vector index this is ``search``. Files found only
+        semantically use their best-matching passage as the snippet.
+        """
+        lexical = self.search(query, limit=limit * 2)
+        if self.vector_index is None:
+            return lexical[:limit]
+        semantic = self.vector_index.search(query, limit=limit * 2)
+        if not semantic:
+            return lexical[:limit]
+
+        by_path = {hit["path"]: hit for hit in lexical}
+        chunks = {match["path"]: match for match in semantic}
+        fused = reciprocal_rank_fusion([list(by_path), list(chunks)])[:limit]
+        missing = [path for path, _ in fused if path not in by_path]
+        rows: Dict[str, sqlite3.Row] = {}
+        if missing:
+            with self._pool.read() as conn:
+                for path in missing:
+                    row = conn.execute("SELECT mtime, size FROM files WHERE path = ?", (path,)).fetchone()
+                    if row is not None:
+                        rows[path] = row
+
+        hits: List[Dict[str, str]] = []
+        semantic_only: List[Dict[str, str]] = []
+        for path, score in fused:
+            if path in by_path:
+                # Lexical hits already carry their summaries.
+                hit = dict(by_path[path])
+            elif path in rows:
+                row = rows[path]
+                hit = self._materialise_hit(path, score, chunks[path]["text"], row["mtime"], row["size"])
+                hit["passage"] = chunks[path]["text"]
+                semantic_only.append(hit)
+            else:
+                # Deleted since its vectors were last loaded.
+                continue
+            hit["score"] = score
+            hits.append(hit)
+        self._attach_summaries(semantic_only)
+        return hits
+
+    def sync_vectors(self) -> Dict[str, int]:
+        """Queue embeddings for files whose vectors are missing or stale, and drop orphans."""
+        if self.vector_index is None:
+            return {"queued": 0, "removed": 0}
+        embedded = self.vector_index.indexed_files()
+        queued = 0
+        with self._pool.read() as conn:
+            rows = conn.execute("SELECT id, path, mtime, size FROM files").fetchall()
+            current = {row["path"]: (row["mtime"], row["size"]) for row in rows}
+            for row in rows:
+                if embedded.get(row["path"]) == (row["mtime"], row["size"]):
+                    continue
+                self.vector_index.enqueue(row["path"], row["mtime"], row["size"])
+                queued += 1
+        orphans = [path for path in embedded if path not in current]
+        self.vector_index.remove_paths(orphans)
+        log_event("vectors.sync", queued=queued, removed=len(orphans))
+        return {"queued": queued, "removed": len(orphans)}
+
+    def indexed_passages(self, path: str) -> Optional[Tuple[List[str], float, int]]:
+        """``(passages, mtime, size)`` for an indexed file, or ``None`` if it is not indexed."""
+        with self._pool.read() as conn:
+            row = conn.execute("SELECT id, mtime, size FROM files WHERE path = ?", (str(path),)).fetchone()
+            if row is None:
+                return None
+            passages = [
+                chunk["content"]
+                for chunk in conn.execute(
+                    "SELECT content FROM file_chunks WHERE rowid BETWEEN ? AND ? ORDER BY rowid",
+                    _chunk_bounds(row["id"]),
+                )
+            ]
+        return passages, row["mtime"], row["size"]
+
+    def cache_stats(self) -> Dict[str, int]:
+        with self._cache_lock:
+            return {
+                "hits": self._cache_hits,
+                "misses": self._cache_misses,
+                "entries": len(self._search_cache),
+                "generation": self._generation,
+            }
+
+    def _run_search(self, query: str, limit: int) -> List[Dict[str, str]]:
+        # One read transaction: name and content lookups see the same snapshot.
+        with self._pool.read() as conn:
+            return self._search_snapshot(conn, query, limit)
+
+    def _search_snapshot(self, conn: sqlite3.Connection, query: str, limit: int) -> List[Dict[str, str]]:
         lower_query = query.lower()
-        tokens = [tok for tok in re.findall(r"[\\w]+", lower_query) if tok]
+        tokens = [tok for tok in re.findall(r"\w+", lower_query) if tok]
 
-        with self._lock:
-            file_rows = self._conn.execute(
-                "SELECT path, mtime, size FROM files"
-            ).fetchall()
+        file_rows = self._name_candidates(conn, lower_query, tokens, limit * NAME_CANDIDATES_PER_RESULT)
+        # Keyed by path string; Path objects and display fields are only built
+        # for the final top-K in _materialise_hit.
+        row_info: Dict[str, Tuple[float, int]] = {}
+        scores: Dict[str, float] = defaultdict(float)
+        snippets: Dict[str, str] = {}
+        passages: Dict[str, str] = {}
 
-        name_scores: Dict[Path, float] = defaultdict(float)
         now = time.time()
         for row in file_rows:
-            path = Path(row["path"])
-            filename = path.name.lower()
+            raw_path = row["path"]
+            row_info[raw_path] = (row["mtime"], row["size"])
+            filename = os.path.basename(raw_path).lower()
             score = 0.0
             if filename == lower_query:
                 score += 150
@@ -370,232 +769,431 @@ class DataIndexer:
             if score > 0:
                 age_days = max(0.0, (now - row["mtime"]) / 86400.0)
                 recency_bonus = max(5.0, 35.0 - age_days)
-                depth_penalty = max(0.0, len(path.parts) * 1.5)
-                name_scores[path] += score + recency_bonus - depth_penalty
+                depth_penalty = max(0.0, _path_depth(raw_path) * 1.5)
+                scores[raw_path] += score + recency_bonus - depth_penalty
+                snippets[raw_path] = f"Filename match for '{query}'"
 
-        content_scores: Dict[Path, Tuple[float, str]] = {}
         if tokens:
             if self._fts_available:
                 match_query = " OR ".join(f"{token}*" for token in tokens)
                 sql = f"""
                     SELECT files.path,
-                           snippet(file_content, 1, '[', ']', ' ... ', 16) AS preview,
-                           bm25(file_content) AS rank
-                    FROM file_content
-                    JOIN files ON files.id = file_content.rowid
-                    WHERE file_content MATCH ?
+                           files.mtime,
+                           files.size,
+                           file_chunks.content AS passage,
+                           snippet(file_chunks, 0, '[', ']', ' ... ', 16) AS preview,
+                           bm25(file_chunks) AS rank
+                    FROM file_chunks
+                    JOIN files ON files.id = file_chunks.rowid >> {CHUNK_ROWID_BITS}
+                    WHERE file_chunks MATCH ?
                     ORDER BY rank
-                    LIMIT {limit * 2}
+                    LIMIT {limit * PASSAGES_PER_RESULT}
                 """
-                with self._lock:
-                    rows = self._conn.execute(sql, (match_query,)).fetchall()
+                rows = conn.execute(sql, (match_query,)).fetchall()
                 for row in rows:
-                    path = Path(row["path"])
                     rank = row["rank"] or 0.0
-                    score = max(0.0, 120.0 - float(rank))
-                    content_scores[path] = (score, row["preview"])
+                    self._add_content_hit(
+                        row, max(0.0, 120.0 - float(rank)), row_info, scores, snippets, passages
+                    )
             else:
                 like_term = f"%{lower_query}%"
                 sql = f"""
                     SELECT files.path,
-                           substr(file_content.content, 1, 400) AS preview,
-                           files.mtime
-                    FROM file_content
-                    JOIN files ON files.id = file_content.file_id
-                    WHERE lower(file_content.content) LIKE ?
-                    LIMIT {limit * 2}
+                           file_chunks.content AS passage,
+                           substr(file_chunks.content, 1, 400) AS preview,
+                           files.mtime,
+                           files.size
+                    FROM file_chunks
+                    JOIN files ON files.id = file_chunks.rowid >> {CHUNK_ROWID_BITS}
+                    WHERE lower(file_chunks.content) LIKE ?
+                    LIMIT {limit * PASSAGES_PER_RESULT}
                 """
-                with self._lock:
-                    rows = self._conn.execute(sql, (like_term,)).fetchall()
+                rows = conn.execute(sql, (like_term,)).fetchall()
                 for row in rows:
-                    path = Path(row["path"])
-                    score = 60.0
-                    content_scores[path] = (score, row["preview"])
+                    self._add_content_hit(row, 60.0, row_info, scores, snippets, passages)
 
-        merged: Dict[Path, Dict[str, str | float]] = {}
-        for row in file_rows:
-            path = Path(row["path"])
-            entry = {
-                "path": str(path),
-                "name": path.name,
-                "score": 0.0,
-                "snippet": "",
-                "modified": datetime.fromtimestamp(row["mtime"]).isoformat(),
-                "modified_human": humanize.naturaltime(datetime.fromtimestamp(row["mtime"])),
-                "size_bytes": row["size"],
-                "size_human": humanize.naturalsize(row["size"], binary=True),
-            }
-            merged[path] = entry
-
-        for path, score in name_scores.items():
-            if path in merged:
-                merged[path]["score"] = merged[path].get("score", 0.0) + score
-                if not merged[path]["snippet"]:
-                    merged[path]["snippet"] = f"Filename match for '{query}'"
-
-        for path, (score, snippet) in content_scores.items():
-            if path in merged:
-                merged[path]["score"] = merged[path].get("score", 0.0) + score
-                snippet_text = (snippet or "").strip()
-                if snippet_text:
-                    merged[path]["snippet"] = snippet_text
-                elif not merged[path]["snippet"]:
-                    merged[path]["snippet"] = "Content match"
-
-        # final ranking
-        ranked = sorted(
-            merged.values(),
-            key=lambda item: (-float(item["score"]), item["name"], item["path"]),
+        # final ranking: bounded heap over the paths that actually scored
+        top = heapq.nsmallest(
+            limit,
+            scores.items(),
+            key=lambda item: (-item[1], os.path.basename(item[0]), item[0]),
         )
-        final = ranked[:limit]
+        final = []
+        for raw_path, score in top:
+            hit = self._materialise_hit(raw_path, score, snippets[raw_path], *row_info[raw_path])
+            if raw_path in passages:
+                hit["passage"] = passages[raw_path]
+            final.append(hit)
         log_event("index.search", query=query, limit=limit, results=len(final))
         return final
 
+    @staticmethod
+    def _add_content_hit(
+        row: sqlite3.Row,
+        score: float,
+        row_info: Dict[str, Tuple[float, int]],
+        scores: Dict[str, float],
+        snippets: Dict[str, str],
+        passages: Dict[str, str],
+    ) -> None:
+        """Score a file by its first (best-ranked) matching passage only."""
+        raw_path = row["path"]
+        if raw_path in passages:
+            return
+        passages[raw_path] = row["passage"] or ""
+        row_info[raw_path] = (row["mtime"], row["size"])
+        scores[raw_path] += score
+        snippet_text = (row["preview"] or "").strip()
+        if snippet_text:
+            snippets[raw_path] = snippet_text
+        elif raw_path not in snippets:
+            snippets[raw_path] = "Content match"
+
+    @staticmethod
+    def _materialise_hit(raw_path: str, score: float, snippet: str, mtime: float, size: int) -> Dict[str, str]:
+        path = Path(raw_path)
+        modified = datetime.fromtimestamp(mtime)
+        return {
+            "path": str(path),
+            "name": path.name,
+            "score": score,
+            "snippet": snippet,
+            "modified": modified.isoformat(),
+            "modified_human": humanize.naturaltime(modified),
+            "size_bytes": size,
+            "size_human": humanize.naturalsize(size, binary=True),
+        }
+
+    def _name_candidates(
+        self, conn: sqlite3.Connection, lower_query: str, tokens: Sequence[str], cap: int
+    ) -> List[sqlite3.Row]:
+        """Return up to ``cap`` file rows whose names share trigrams with the query."""
+        if not self._names_available:
+            return conn.execute("SELECT path, mtime, size FROM files").fetchall()
+
+        trigrams: List[str] = []
+        for term in [lower_query, *tokens]:
+            for start in range(len(term) - 2):
+                gram = term[start:start + 3]
+                if gram not in trigrams:
+                    trigrams.append(gram)
+        trigrams = trigrams[:MAX_QUERY_TRIGRAMS]
+
+        if trigrams:
+            # OR over the query trigrams ranks exact and near-miss names first.
+            match_query = " OR ".join('"' + gram.replace('"', '""') + '"' for gram in trigrams)
+            sql = """
+                SELECT files.path, files.mtime, files.size
+                FROM file_names
+                JOIN files ON files.id = file_names.rowid
+                WHERE file_names MATCH ?
+                ORDER BY bm25(file_names)
+                LIMIT ?
+            """
+            params: Tuple = (match_query, cap)
+        else:
+            # Queries shorter than a trigram fall back to a bounded LIKE.
+            escaped = lower_query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            sql = """
+                SELECT files.path, files.mtime, files.size
+                FROM file_names
+                JOIN files ON files.id = file_names.rowid
+                WHERE file_names.name LIKE ? ESCAPE '\\'
+                ORDER BY file_names.name = ? DESC, length(file_names.name)
+                LIMIT ?
+            """
+            params = (f"%{escaped}%", lower_query, cap)
+        return conn.execute(sql, params).fetchall()
+
     def close(self) -> None:
+        self.flush_writes()
         with self._lock:
-            if self._conn is not None:
-                self._conn.close()
+            if self._pool is not None:
+                self._pool.close()
+                self._pool = None
                 self._conn = None
 
     # ------------------------------------------------------------------ #
     # Internal helpers
-    def _check_allowed(self, path: Path) -> Tuple[bool, Optional[str]]:
-        return is_allowed(path, self.allowed_roots, self.excluded_paths)
+    def _check_allowed(self, path: Path, resolve: bool = False) -> Tuple[bool, Optional[str]]:
+        return self.policy.check(path, resolve=resolve)
+
+    def _iter_candidates(
+        self, root: Path, cancel_event: threading.Event
+    ) -> Iterator[Tuple[Path, Optional[os.stat_result]]]:
+        """Stream ``(path, stat)`` pairs for indexable files under ``root``.
 
-    def _collect_candidates(self, root: Path, cancel_event: threading.Event) -> List[Path]:
-        candidates: List[Path] = []
-        visited: set[Path] = set()
+        Policy is checked once per directory; a file can only be rejected on its
+        own when it is a symlink or is itself listed as excluded. ``stat`` is
+        ``None`` when the entry could not be stat'ed (the error is recorded).
+        """
+        stack = [root]
 
-        for dirpath, dirnames, filenames in os.walk(root, followlinks=False):
+        while stack:
             if cancel_event.is_set():
-                break
+                return
+
+            current_dir = stack.pop()
+            allowed, reason = self._check_allowed(current_dir)
+            if not allowed:
+                self._record_skip(current_dir, reason or "Excluded path")
+                continue
 
-            current_dir = Path(dirpath)
             try:
-                resolved = current_dir.resolve()
+                scanner = os.scandir(current_dir)
             except OSError:
-                resolved = current_dir
+                continue
 
-            if resolved in visited:
-                dirnames[:] = []
+            with scanner:
+                for entry in scanner:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(Path(entry.path))
+                            continue
+                        if not entry.is_file():
+                            continue
+                    except OSError:
+                        continue
+
+                    path = Path(entry.path)
+                    if path.suffix.lower() not in self.allowed_extensions:
+                        continue
+                    symlink = entry.is_symlink()
+                    if symlink or self.policy.is_excluded_entry(entry.path):
+                        ok, reason = self._check_allowed(path, resolve=symlink)
+                        if not ok:
+                            self._record_skip(path, reason or "Excluded path")
+                            continue
+
+                    try:
+                        stat = entry.stat()
+                    except OSError as exc:
+                        self._record_error(path, f"Stat failed: {exc}")
+                        stat = None
+                    yield path, stat
+
+    def _submit_extraction(
+        self, pool: Optional[ExtractionPool], path: Path, stat: os.stat_result
+    ) -> Future:
+        if pool is not None:
+            try:
+                return pool.submit(extract_text_chunks, path, stat.st_size, self.max_file_size_mb)
+            except RuntimeError:
+                # The pool was shut down - extract without it instead.
+                pass
+        job: Future = Future()
+        job.set_result(self._read_text_chunks(path, stat.st_size))
+        return job
+
+    def _write_results(
+        self,
+        pending: "queue.Queue",
+        counters: Dict[str, int],
+        cancel_event: threading.Event,
+        on_progress: Callable[[int, int, str], None] | None,
+    ) -> None:
+        """Writer thread: the only rebuild stage that touches the SQLite connection."""
+        while True:
+            item = pending.get()
+            if item is _END_OF_WORK:
+                return
+            idx, path, stat, job = item
+            if cancel_event.is_set():
+                # Keep draining so the walker never blocks on a full queue.
+                if job is not None:
+                    job.cancel()
                 continue
-            visited.add(resolved)
 
-            allowed, reason = self._check_allowed(current_dir)
-            if not allowed:
-                dirnames[:] = []
-                self._record_skip(current_dir, reason or "Excluded path")
-                continue
+            counters["processed"] += 1
+            if job is not None:
+                try:
+                    passages, note = job.result()
+                except Exception as exc:
+                    passages, note = None, f"Read error: {exc}"
+                if passages is None:
+                    # fall back to filename when no readable content
+                    passages = [f"{path.name} (no readable text found)"]
 
-            pruned = []
-            for dirname in dirnames:
-                subdir = current_dir / dirname
-                ok, reason = self._check_allowed(subdir)
-                if ok:
-                    pruned.append(dirname)
+                try:
+                    with self._lock:
+                        self._upsert_file(path, stat, passages)
+                except sqlite3.Error as exc:
+                    self._record_error(path, f"Write failed: {exc}")
                 else:
-                    self._record_skip(subdir, reason or "Excluded path")
-            dirnames[:] = pruned
+                    counters["updated"] += 1
 
-            for filename in filenames:
-                path = current_dir / filename
-                if path.suffix.lower() not in self.allowed_extensions:
-                    continue
-                ok, reason = self._check_allowed(path)
-                if ok:
-                    candidates.append(path)
-                else:
-                    self._record_skip(path, reason or "Excluded path")
+                if note:
+                    self._record_skip(path, note)
 
-        return candidates
-
-    def _upsert_file(self, path: Path, stat: os.stat_result, content: str) -> None:
-        self._conn.execute(
-            """
-            INSERT OR REPLACE INTO files(path, mtime, size, indexed_at)
-            VALUES (?, ?, ?, ?)
-            """,
-            (str(path), stat.st_mtime, stat.st_size, datetime.utcnow().isoformat()),
+            if on_progress:
+                try:
+                    on_progress(idx, counters["discovered"], str(path))
+                except Exception as exc:
+                    # A broken callback must not stop the writer draining the queue.
+                    log_event("index.progress_error", error=str(exc))
+                    on_progress = None
+
+    def _upsert_file(self, path: Path, stat: os.stat_result, passages: Sequence[str]) -> None:
+        """Queue a file row for the next batched write."""
+        self._pending_writes[str(path)] = (
+            str(path),
+            stat.st_mtime,
+            stat.st_size,
+            datetime.utcnow().isoformat(),
+            tuple(passages),
         )
-        if self._fts_available:
-            self._conn.execute(
-                "INSERT OR REPLACE INTO file_content(rowid, path, content) VALUES ((SELECT id FROM files WHERE path = ?), ?, ?)",
-                (str(path), str(path), content),
-            )
-        else:
-            file_id = self._conn.execute(
-                "SELECT id FROM files WHERE path = ?", (str(path),)
-            ).fetchone()[0]
-            self._conn.execute(
-                "INSERT OR REPLACE INTO file_content(file_id, content) VALUES (?, ?)",
-                (file_id, content),
-            )
-        self._conn.commit()
+        self._generation += 1
+        self._maybe_flush()
+
+    def _indexable_stat(self, path: Path, base: Path) -> Optional[os.stat_result]:
+        """Stat ``path`` if a live update should index it, else ``None``."""
+        if not path.is_relative_to(base) or path.suffix.lower() not in self.allowed_extensions:
+            return None
+        ok, reason = self._check_allowed(path, resolve=path.is_symlink())
+        if not ok:
+            self._record_skip(path, reason or "Excluded path")
+            return None
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        return stat if path.is_file() else None
+
+    def _rename_rows(self, renames: Sequence[Tuple[Path, Path, os.stat_result]]) -> set[str]:
+        """Repoint rows to their new paths, keeping the extracted content.
+
+        A row only moves when its mtime and size match the renamed file.
+        Returns the destination paths that were moved.
+        """
+        self.flush_writes()
+        moved: set[str] = set()
+        with self._conn:
+            for src, dst, stat in renames:
+                row = self._conn.execute(
+                    "SELECT id, mtime, size FROM files WHERE path = ?", (str(src),)
+                ).fetchone()
+                if row is None or row["mtime"] != stat.st_mtime or row["size"] != stat.st_size:
+                    continue
+                # Whatever the rename replaced goes first.
+                self._delete_rows([(str(dst),)])
+                self._conn.execute("UPDATE files SET path = ? WHERE id = ?", (str(dst), row["id"]))
+                if self._names_available:
+                    self._conn.execute(
+                        "UPDATE file_names SET name = ? WHERE rowid = ?", (dst.name.lower(), row["id"])
+                    )
+                moved.add(str(dst))
+                if self.vector_index is not None:
+                    self.vector_index.rename(str(src), str(dst))
+        if moved:
+            self._generation += 1
+        return moved
 
     def _delete_file(self, path: Path) -> None:
-        self._conn.execute("DELETE FROM files WHERE path = ?", (str(path),))
-        if self._fts_available:
-            self._conn.execute("DELETE FROM file_content WHERE path = ?", (str(path),))
-        else:
-            self._conn.execute(
-                "DELETE FROM file_content WHERE file_id NOT IN (SELECT id FROM files)"
+        """Queue a file row for removal in the next batched write."""
+        self._pending_writes[str(path)] = None
+        self._generation += 1
+        self._maybe_flush()
+
+    def _maybe_flush(self) -> None:
+        if self._batch_started is None:
+            self._batch_started = time.monotonic()
+        too_big = len(self._pending_writes) >= self.write_batch_size
+        too_old = time.monotonic() - self._batch_started >= self.write_batch_age
+        if too_big or too_old:
+            self.flush_writes()
+
+    def flush_writes(self) -> None:
+        """Apply queued upserts and deletes in a single transaction."""
+        with self._lock:
+            if not self._pending_writes or self._conn is None:
+                self._batch_started = None
+                return
+            upserts = [row for row in self._pending_writes.values() if row is not None]
+            deletes = [(path,) for path, row in self._pending_writes.items() if row is None]
+            self._pending_writes = {}
+            self._batch_started = None
+
+            with self._conn:
+                if deletes:
+                    self._delete_rows(deletes)
+                if upserts:
+                    # ON CONFLICT keeps the row id stable so content rows stay linked.
+                    self._conn.executemany(
+                        """
+                        INSERT INTO files(path, mtime, size, indexed_at)
+                        VALUES (?, ?, ?, ?)
+                        ON CONFLICT(path) DO UPDATE
+                        SET mtime = excluded.mtime,
+                            size = excluded.size,
+                            indexed_at = excluded.indexed_at
+                        """,
+                        [row[:4] for row in upserts],
+                    )
+                    chunk_rows = []
+                    for row in upserts:
+                        file_id = self._conn.execute(
+                            "SELECT id FROM files WHERE path = ?", (row[0],)
+                        ).fetchone()[0]
+                        low, high = _chunk_bounds(file_id)
+                        # The new version may have fewer passages than the old one.
+                        self._conn.execute(
+                            "DELETE FROM file_chunks WHERE rowid BETWEEN ? AND ?", (low, high)
+                        )
+                        chunk_rows.extend(
+                            (low + number, text) for number, text in enumerate(row[4][: high - low + 1])
+                        )
+                    self._conn.executemany(
+                        "INSERT INTO file_chunks(rowid, content) VALUES (?, ?)", chunk_rows
+                    )
+                    if self._names_available:
+                        self._conn.executemany(
+                            "INSERT OR REPLACE INTO file_names(rowid, name) VALUES ((SELECT id FROM files WHERE path = ?), ?)",
+                            [(row[0], os.path.basename(row[0]).lower()) for row in upserts],
+                        )
+            # Searches that ran while these rows were queued cached pre-flush results.
+            self._generation += 1
+
+        if self.vector_index is not None:
+            self.vector_index.remove_paths(path for (path,) in deletes)
+            for path, mtime, size, _indexed_at, _passages in upserts:
+                self.vector_index.enqueue(path, mtime, size)
+
+    def _delete_rows(self, deletes: Sequence[Tuple[str]]) -> None:
+        """Delete file rows and their passage/name rows; caller holds the transaction."""
+        bounds = []
+        for (path,) in deletes:
+            row = self._conn.execute("SELECT id FROM files WHERE path = ?", (path,)).fetchone()
+            if row is not None:
+                bounds.append(_chunk_bounds(row[0]))
+        self._conn.executemany("DELETE FROM file_chunks WHERE rowid BETWEEN ? AND ?", bounds)
+        if self._names_available:
+            self._conn.executemany(
+                "DELETE FROM file_names WHERE rowid IN (SELECT id FROM files WHERE path = ?)",
+                deletes,
             )
-        self._conn.commit()
+        self._conn.executemany("DELETE FROM files WHERE path = ?", deletes)
 
     def _count_files(self) -> int:
-        with self._lock:
-            row = self._conn.execute("SELECT COUNT(*) AS total FROM files").fetchone()
+        with self._pool.read() as conn:
+            row = conn.execute("SELECT COUNT(*) AS total FROM files").fetchone()
         return row["total"] if row else 0
 
-    def _read_text_snippet(self, path: Path, size: int) -> Tuple[Optional[str], Optional[str]]:
-        """Return (snippet, note) tuple for a file."""
-        note = None
-        suffix = path.suffix.lower()
-
-        if size > self.max_file_size_bytes:
-            note = f"Skipped content (>{self.max_file_size_mb:.1f} MB)"
-            return (path.name, note)
-
+    @staticmethod
+    def _is_heavy(path: Path) -> bool:
+        extractor = get_extractor(path, sniff=False)
+        return extractor is not None and extractor.cost == COST_HEAVY
+
+    def _read_text_chunks(self, path: Path, size: int) -> Tuple[Optional[List[str]], Optional[str]]:
+        """Return (passages, note) tuple for a file; heavy formats run in the shared worker pool."""
+        if not self._is_heavy(path):
+            return extract_text_chunks(path, size, self.max_file_size_mb)
+        job = get_extraction_pool().submit(
+            extract_text_chunks, path, size, self.max_file_size_mb, timeout=self.extraction_timeout
+        )
         try:
-            if suffix in TEXT_EXTENSIONS or suffix in CODE_EXTENSIONS:
-                text = path.read_text(encoding="utf-8", errors="ignore")
-                return (text[:MAX_SNIPPET_CHARS], note)
-
-            if suffix == ".pdf":
-                try:
-                    import fitz  # type: ignore
-                except Exception:
-                    note = "PDF text extraction unavailable"
-                    return (path.name, note)
-                doc = fitz.open(path)
-                text = "\n".join(page.get_text("text") for page in doc)
-                doc.close()
-                return (text[:MAX_SNIPPET_CHARS], note)
-
-            if suffix == ".docx":
-                try:
-                    from docx import Document  # type: ignore
-                except Exception:
-                    note = "DOCX text extraction unavailable"
-                    return (path.name, note)
-                document = Document(str(path))
-                text = "\n".join(paragraph.text for paragraph in document.paragraphs)
-                return (text[:MAX_SNIPPET_CHARS], note)
-
-            if suffix == ".ipynb":
-                data = json.loads(path.read_text(encoding="utf-8", errors="ignore"))
-                cells = []
-                for cell in data.get("cells", []):
-                    if cell.get("cell_type") == "markdown":
-                        cells.extend(cell.get("source", []))
-                text = "\n".join(cells)
-                return (text[:MAX_SNIPPET_CHARS], note)
-
+            return job.result()
         except Exception as exc:
-            note = f"Read error: {exc}"
-            return (None, note)
-
-        return (None, "Unsupported format")
+            return (None, f"Read error: {exc}")
 
     def _record_skip(self, path: Path, reason: str) -> None:
         self._last_skipped.append({"path": str(path), "reason": reason})
@@ -0,0 +1,204 @@
+"""Isolated worker processes for document extraction.
+
+Parsing PDFs and Office files goes through native or complex code that can
+hang or crash on a malformed file. ``ExtractionPool`` runs each job in a
+long-lived worker process with a deadline: a worker that overruns it, or
+dies, is killed and replaced, and only that job fails.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import queue
+import threading
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Callable, List, Optional, Tuple
+
+from modules.extractors import COST_HEAVY, extract_text, get_extractor
+from modules.telemetry import log_event
+
+EXTRACTION_TIMEOUT_SECONDS = 120.0
+# Workers in the shared pool used by previews, summaries and live index updates.
+SHARED_POOL_WORKERS = 2
+
+
+class ExtractionTimeout(TimeoutError):
+    """A job ran past its deadline and its worker was killed."""
+
+
+class ExtractionCrashed(RuntimeError):
+    """The worker process died while running a job."""
+
+
+def _worker_main(conn) -> None:
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, OSError):
+            return
+        if job is None:
+            return
+        fn, args = job
+        try:
+            result = (True, fn(*args))
+        except Exception as exc:
+            # Library exceptions do not always pickle; keep the message.
+            result = (False, RuntimeError(str(exc) or type(exc).__name__))
+        try:
+            conn.send(result)
+        except Exception as exc:
+            conn.send((False, RuntimeError(f"Unsendable result: {exc}")))
+
+
+class _Worker:
+    def __init__(self, context) -> None:
+        self.conn, child = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child,), daemon=True)
+        self.process.start()
+        child.close()
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.process.join(timeout=1)
+        self.conn.close()
+
+    def stop(self) -> None:
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.kill()
+        self.conn.close()
+
+
+class ExtractionPool:
+    """Run picklable module-level functions in worker processes, each job with a timeout.
+
+    ``submit`` returns a ``Future`` like ``ProcessPoolExecutor.submit``; a job
+    that overruns its timeout (``timeout`` unless given per job) fails with
+    ``ExtractionTimeout`` and one that kills its worker fails with
+    ``ExtractionCrashed``.
+    """
+
+    def __init__(self, max_workers: int = 1, timeout: float = EXTRACTION_TIMEOUT_SECONDS) -> None:
+        self.max_workers = max(1, int(max_workers))
+        self.timeout = float(timeout)
+        self._context = multiprocessing.get_context()
+        self._jobs: "queue.Queue" = queue.Queue()
+        self._closed = False
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+
+    def submit(self, fn: Callable[..., Any], *args: Any, timeout: Optional[float] = None) -> Future:
+        """Queue ``fn(*args)``; it is killed after ``timeout`` seconds of running."""
+        future: Future = Future()
+        deadline = self.timeout if timeout is None else float(timeout)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Extraction pool is shut down")
+            self._jobs.put((future, fn, args, deadline))
+            # Supervisors (and their worker processes) start lazily, up to max_workers.
+            if len(self._threads) < self.max_workers:
+                thread = threading.Thread(target=self._supervise, name="extraction-worker", daemon=True)
+                self._threads.append(thread)
+                thread.start()
+        return future
+
+    def _supervise(self) -> None:
+        worker: Optional[_Worker] = None
+        try:
+            while True:
+                item = self._jobs.get()
+                if item is None:
+                    return
+                future, fn, args, timeout = item
+                if not future.set_running_or_notify_cancel():
+                    continue
+                if worker is None or not worker.process.is_alive():
+                    worker = _Worker(self._context)
+                worker, outcome = self._run(worker, fn, args, timeout)
+                ok, value = outcome
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+        finally:
+            if worker is not None:
+                worker.stop()
+
+    def _run(
+        self, worker: _Worker, fn: Callable, args: Tuple, timeout: float
+    ) -> Tuple[Optional[_Worker], Tuple[bool, Any]]:
+        label = str(args[0]) if args else getattr(fn, "__name__", "job")
+        try:
+            worker.conn.send((fn, args))
+            if worker.conn.poll(timeout):
+                return worker, worker.conn.recv()
+        except (EOFError, OSError):
+            worker.kill()
+            log_event("extraction.crashed", path=label)
+            return None, (False, ExtractionCrashed(f"Extraction worker died on {label}"))
+        worker.kill()
+        log_event("extraction.timeout", path=label, seconds=timeout)
+        return None, (False, ExtractionTimeout(f"Extraction timed out after {timeout:g}s"))
+
+    def shutdown(self, cancel_futures: bool = True) -> None:
+        with self._lock:
+            self._closed = True
+            threads = list(self._threads)
+        if cancel_futures:
+            while True:
+                try:
+                    item = self._jobs.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not None:
+                    item[0].cancel()
+        for _ in threads:
+            self._jobs.put(None)
+        for thread in threads:
+            thread.join()
+
+
+_SHARED_POOL: Optional[ExtractionPool] = None
+_SHARED_LOCK = threading.Lock()
+
+
+def get_extraction_pool() -> ExtractionPool:
+    """Return the process-wide pool for one-off heavy extractions."""
+    global _SHARED_POOL
+    with _SHARED_LOCK:
+        if _SHARED_POOL is None:
+            _SHARED_POOL = ExtractionPool(SHARED_POOL_WORKERS)
+        return _SHARED_POOL
+
+
+def read_document(path: Path, max_chars: int, timeout: Optional[float] = None) -> Optional[Tuple[str, bool]]:
+    """At most ``max_chars`` of ``path`` as ``(text, truncated)``; ``None`` if unsupported.
+
+    Light formats are read in this process; heavy ones go through the
+    shared pool with ``timeout`` as the job's deadline, so a pathological
+    file costs at most that long. This blocks, so UI code calls it from a
+    background thread.
+    """
+    path = Path(path)
+    extractor = get_extractor(path)
+    if extractor is None:
+        return None
+    if extractor.cost != COST_HEAVY:
+        return extract_text(path, max_chars)
+    pool = get_extraction_pool()
+    return pool.submit(extract_text, path, max_chars, timeout=timeout).result()
+
+
+__all__ = [
+    "EXTRACTION_TIMEOUT_SECONDS",
+    "ExtractionCrashed",
+    "ExtractionPool",
+    "ExtractionTimeout",
+    "get_extraction_pool",
+    "read_document",
+]
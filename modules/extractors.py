@@ -0,0 +1,352 @@
+"""Streaming text extractors and the registry that picks one per file.
+
+Each extractor yields a document a block, page or paragraph at a time, so
+callers that stop at a character budget never hold more than that budget
+in memory, however large the file is. The indexer, the file preview and
+the summarizer all look formats up in ``REGISTRY``; extractors whose cost
+class is ``COST_HEAVY`` are run in isolated worker processes by
+``modules.extraction_pool``.
+"""
+
+from __future__ import annotations
+
+import codecs
+import json
+import mimetypes
+import re
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from xml.etree.ElementTree import iterparse
+
+# Plain-text files are read and decoded this many bytes at a time.
+TEXT_BLOCK_BYTES = 64 * 1024
+
+TEXT_SUFFIXES = {
+    ".txt", ".md", ".markdown", ".rst", ".json", ".cfg", ".ini", ".yaml", ".yml",
+    ".csv", ".toml", ".log", ".html", ".css", ".scss", ".less", ".xml",
+    ".py", ".js", ".ts", ".jsx", ".tsx",
+}
+
+# Pure-Python streaming; safe to run in the caller's process.
+COST_LIGHT = "light"
+# Native libraries or complex containers; run isolated, with a timeout.
+COST_HEAVY = "heavy"
+
+# Leading bytes read to identify files whose extension is unknown.
+SNIFF_BYTES = 4096
+
+_W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_A_NS = "{http://schemas.openxmlformats.org/drawingml/2006/main}"
+_SLIDE_RE = re.compile(r"ppt/slides/slide(\d+)\.xml$")
+
+
+class ExtractionUnavailable(RuntimeError):
+    """The optional library needed for a format is not installed."""
+
+
+def iter_text_blocks(path: Path, block_bytes: int = TEXT_BLOCK_BYTES) -> Iterator[str]:
+    """Decode a text file one block at a time.
+
+    Blocks end on a newline (or other whitespace) where possible so words
+    are not split between them; invalid UTF-8 is dropped. Plain buffered
+    reads, not ``mmap``: logs are read while they grow or rotate, and a
+    mapped file truncated under the reader kills the process with SIGBUS.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+    carry = b""
+    with open(path, "rb") as f:
+        while True:
+            data = f.read(block_bytes)
+            if not data:
+                break
+            data = carry + data
+            cut = data.rfind(b"\n")
+            if cut < 0:
+                cut = data.rfind(b" ")
+            if cut < 0 or len(data) - cut > block_bytes:
+                # No break near the end; don't hold more than a block back.
+                cut = len(data) - 1
+            carry = data[cut + 1:]
+            text = decoder.decode(data[:cut + 1])
+            if text:
+                yield text
+    tail = decoder.decode(carry, final=True)
+    if tail:
+        yield tail
+
+
+def iter_pdf_pages(path: Path) -> Iterator[str]:
+    try:
+        import fitz  # type: ignore
+    except Exception as exc:
+        raise ExtractionUnavailable("PDF text extraction unavailable") from exc
+    doc = fitz.open(path)
+    try:
+        for page in doc:
+            yield page.get_text("text")
+    finally:
+        doc.close()
+
+
+def iter_docx_paragraphs(path: Path) -> Iterator[str]:
+    """Paragraph text from ``word/document.xml``, parsed incrementally."""
+    with zipfile.ZipFile(path) as archive, archive.open("word/document.xml") as xml:
+        for _event, elem in iterparse(xml, events=("end",)):
+            if elem.tag == f"{_W_NS}p":
+                yield "".join(node.text or "" for node in elem.iter(f"{_W_NS}t")) + "\n"
+                elem.clear()
+
+
+def iter_xlsx_rows(path: Path) -> Iterator[str]:
+    """Tab-separated rows, sheet by sheet, from openpyxl's streaming reader."""
+    try:
+        from openpyxl import load_workbook  # type: ignore
+    except Exception as exc:
+        raise ExtractionUnavailable("XLSX text extraction unavailable") from exc
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        for sheet in workbook.worksheets:
+            yield f"Sheet: {sheet.title}\n"
+            for row in sheet.iter_rows(values_only=True):
+                cells = ["" if cell is None else str(cell) for cell in row]
+                if any(cells):
+                    yield "\t".join(cells) + "\n"
+    finally:
+        workbook.close()
+
+
+def iter_pptx_slides(path: Path) -> Iterator[str]:
+    """Slide text from ``ppt/slides/slideN.xml``, in slide order."""
+    with zipfile.ZipFile(path) as archive:
+        slides = sorted(
+            (int(match.group(1)), name)
+            for name in archive.namelist()
+            for match in [_SLIDE_RE.match(name)]
+            if match
+        )
+        for number, name in slides:
+            with archive.open(name) as xml:
+                texts = [
+                    elem.text
+                    for _event, elem in iterparse(xml, events=("end",))
+                    if elem.tag == f"{_A_NS}t" and elem.text
+                ]
+            yield f"Slide {number}:\n" + "\n".join(texts) + "\n\n"
+
+
+def iter_notebook_markdown(path: Path) -> Iterator[str]:
+    # JSON has to be parsed whole; the indexer's file-size cap bounds it.
+    data = json.loads(path.read_text(encoding="utf-8", errors="ignore"))
+    for cell in data.get("cells", []):
+        if cell.get("cell_type") == "markdown":
+            source = cell.get("source", [])
+            yield ("".join(source) if isinstance(source, list) else str(source)) + "\n"
+
+
+# --------------------------------------------------------------------------- #
+# Registry
+@dataclass(frozen=True)
+class Extractor:
+    """How to stream text out of one format.
+
+    ``sniff(path, head)`` recognises the format from its first
+    ``SNIFF_BYTES`` when the extension is unknown or misleading.
+    """
+
+    name: str
+    extensions: Tuple[str, ...]
+    iter_text: Callable[[Path], Iterator[str]]
+    cost: str = COST_LIGHT
+    mime_types: Tuple[str, ...] = ()
+    sniff: Optional[Callable[[Path, bytes], bool]] = None
+
+
+def _zip_has(member: str) -> Callable[[Path, bytes], bool]:
+    def sniff(path: Path, head: bytes) -> bool:
+        if not head.startswith(b"PK\x03\x04"):
+            return False
+        try:
+            with zipfile.ZipFile(path) as archive:
+                archive.getinfo(member)
+        except (KeyError, OSError, zipfile.BadZipFile):
+            return False
+        return True
+
+    return sniff
+
+
+def _looks_like_text(head: bytes) -> bool:
+    if b"\x00" in head:
+        return False
+    try:
+        head.decode("utf-8")
+    except UnicodeDecodeError as exc:
+        # A multi-byte character cut off by the sniff window is still text.
+        return exc.start >= len(head) - 3
+    return True
+
+
+class ExtractorRegistry:
+    """Extractors keyed by extension, with MIME-type and content sniffing as fallbacks."""
+
+    def __init__(self) -> None:
+        self._extractors: List[Extractor] = []
+        self._by_extension: Dict[str, Extractor] = {}
+        self._by_mime: Dict[str, Extractor] = {}
+        self._text: Optional[Extractor] = None
+
+    def register(self, extractor: Extractor, text_fallback: bool = False) -> Extractor:
+        """Add ``extractor``; later registrations win for shared extensions."""
+        self._extractors.append(extractor)
+        for ext in extractor.extensions:
+            self._by_extension[ext.lower()] = extractor
+        for mime in extractor.mime_types:
+            self._by_mime[mime] = extractor
+        if text_fallback:
+            self._text = extractor
+        return extractor
+
+    def extensions(self) -> set[str]:
+        return set(self._by_extension)
+
+    def for_path(self, path: Path, sniff: bool = True) -> Optional[Extractor]:
+        path = Path(path)
+        extractor = self._by_extension.get(path.suffix.lower())
+        if extractor is not None or not sniff:
+            return extractor
+        mime, _ = mimetypes.guess_type(path.name)
+        if mime in self._by_mime:
+            return self._by_mime[mime]
+        try:
+            with open(path, "rb") as f:
+                head = f.read(SNIFF_BYTES)
+        except OSError:
+            return None
+        for candidate in self._extractors:
+            if candidate.sniff is not None and candidate.sniff(path, head):
+                return candidate
+        if self._text is not None and ((mime or "").startswith("text/") or _looks_like_text(head)):
+            return self._text
+        return None
+
+
+REGISTRY = ExtractorRegistry()
+REGISTRY.register(
+    Extractor("text", tuple(sorted(TEXT_SUFFIXES)), iter_text_blocks, mime_types=("text/plain",)),
+    text_fallback=True,
+)
+REGISTRY.register(Extractor("notebook", (".ipynb",), iter_notebook_markdown))
+REGISTRY.register(
+    Extractor(
+        "pdf",
+        (".pdf",),
+        iter_pdf_pages,
+        cost=COST_HEAVY,
+        mime_types=("application/pdf",),
+        sniff=lambda path, head: head.startswith(b"%PDF-"),
+    )
+)
+REGISTRY.register(
+    Extractor(
+        "docx",
+        (".docx",),
+        iter_docx_paragraphs,
+        cost=COST_HEAVY,
+        mime_types=("application/vnd.openxmlformats-officedocument.wordprocessingml.document",),
+        sniff=_zip_has("word/document.xml"),
+    )
+)
+REGISTRY.register(
+    Extractor(
+        "xlsx",
+        (".xlsx",),
+        iter_xlsx_rows,
+        cost=COST_HEAVY,
+        mime_types=("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",),
+        sniff=_zip_has("xl/workbook.xml"),
+    )
+)
+REGISTRY.register(
+    Extractor(
+        "pptx",
+        (".pptx",),
+        iter_pptx_slides,
+        cost=COST_HEAVY,
+        mime_types=("application/vnd.openxmlformats-officedocument.presentationml.presentation",),
+        sniff=_zip_has("ppt/presentation.xml"),
+    )
+)
+
+
+def get_extractor(path: Path, sniff: bool = True) -> Optional[Extractor]:
+    return REGISTRY.for_path(path, sniff=sniff)
+
+
+def iter_document_text(path: Path) -> Optional[Iterator[str]]:
+    """Streaming text for ``path``, or ``None`` for unsupported formats."""
+    extractor = get_extractor(path)
+    return extractor.iter_text(path) if extractor is not None else None
+
+
+def take_text(pieces: Iterable[str], max_chars: int) -> Tuple[str, bool]:
+    """Join ``pieces`` up to ``max_chars``; returns ``(text, truncated)``.
+
+    Stops pulling from ``pieces`` once the budget is reached and closes it.
+    """
+    parts = []
+    remaining = max(0, int(max_chars))
+    truncated = False
+    stream = iter(pieces)
+    try:
+        for piece in stream:
+            if len(piece) >= remaining:
+                parts.append(piece[:remaining])
+                truncated = len(piece) > remaining or next(stream, None) is not None
+                break
+            parts.append(piece)
+            remaining -= len(piece)
+    finally:
+        close = getattr(stream, "close", None)
+        if close is not None:
+            close()
+    return "".join(parts), truncated
+
+
+def read_text(path: Path, max_chars: int) -> Tuple[str, bool]:
+    """At most ``max_chars`` of a plain-text file; returns ``(text, truncated)``."""
+    return take_text(iter_text_blocks(path), max_chars)
+
+
+def extract_text(path: Path, max_chars: int) -> Optional[Tuple[str, bool]]:
+    """At most ``max_chars`` of any supported document, in this process.
+
+    Returns ``None`` for unsupported formats. Module level so it can run in
+    an extraction worker.
+    """
+    pieces = iter_document_text(Path(path))
+    return None if pieces is None else take_text(pieces, max_chars)
+
+
+__all__ = [
+    "COST_HEAVY",
+    "COST_LIGHT",
+    "ExtractionUnavailable",
+    "Extractor",
+    "ExtractorRegistry",
+    "REGISTRY",
+    "TEXT_BLOCK_BYTES",
+    "TEXT_SUFFIXES",
+    "extract_text",
+    "get_extractor",
+    "iter_document_text",
+    "iter_docx_paragraphs",
+    "iter_notebook_markdown",
+    "iter_pdf_pages",
+    "iter_pptx_slides",
+    "iter_text_blocks",
+    "iter_xlsx_rows",
+    "read_text",
+    "take_text",
+]
@@ -0,0 +1,163 @@
+"""SQLite persistence for FileManager's file index."""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+from modules.sqlite_pool import SQLitePool
+from modules.telemetry import log_event
+
+_COLUMNS = ("path", "name", "size", "mtime", "readable", "summary")
+
+
+class FileIndexStore:
+    """One row per indexed file, written entry by entry.
+
+    Replaces rewriting the whole ``nous_file_index.json`` on every change:
+    an upsert or delete touches only the affected rows. ``_meta`` values live
+    in a small key/value table.
+    """
+
+    def __init__(self, db_path: Path, legacy_json: Optional[Path] = None) -> None:
+        self.db_path = Path(db_path).expanduser().resolve()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._pool = SQLitePool(self.db_path)
+        self._lock = self._pool.write_lock
+        self._conn = self._pool.writer
+        self._initialise_schema()
+        if legacy_json is not None:
+            self._migrate_json(Path(legacy_json))
+
+    def _initialise_schema(self) -> None:
+        with self._lock:
+            self._conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS files (
+                    path      TEXT PRIMARY KEY,
+                    name      TEXT NOT NULL,
+                    size      TEXT,
+                    mtime     REAL,
+                    readable  INTEGER NOT NULL DEFAULT 1,
+                    summary   TEXT
+                );
+                CREATE TABLE IF NOT EXISTS metadata (
+                    key    TEXT PRIMARY KEY,
+                    value  TEXT
+                );
+                """
+            )
+            self._conn.commit()
+
+    def _migrate_json(self, path: Path) -> None:
+        """Import the legacy JSON index once, then set it aside."""
+        if self.get_meta("migrated_json") or not path.exists():
+            return
+        data: Dict[str, Any] = {}
+        try:
+            if path.stat().st_size:
+                data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            print(f"Warning: Failed to read {path.name} for migration: {e}")
+        files = data.get("files", {}) if isinstance(data, dict) else {}
+        entries = [entry for entry in files.values() if isinstance(entry, dict) and entry.get("path")]
+        meta = data.get("_meta", {}) if isinstance(data, dict) else {}
+
+        with self._lock:
+            with self._conn:
+                self._upsert_rows(entries)
+                for key in ("created", "last_updated"):
+                    if meta.get(key):
+                        self._set_meta(key, meta[key])
+                self._set_meta("migrated_json", str(path))
+        if data:
+            try:
+                path.rename(path.with_name(path.name + ".migrated"))
+            except OSError:
+                pass
+        log_event("file_index.migrated", source=str(path), count=len(entries))
+
+    # ------------------------------------------------------------------ #
+    # Internal helpers
+    def _upsert_rows(self, entries: Iterable[Dict[str, Any]]) -> None:
+        self._conn.executemany(
+            """
+            INSERT INTO files(path, name, size, mtime, readable, summary)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(path) DO UPDATE
+            SET name = excluded.name,
+                size = excluded.size,
+                mtime = excluded.mtime,
+                readable = excluded.readable,
+                summary = excluded.summary
+            """,
+            [
+                (
+                    entry["path"],
+                    entry.get("name") or Path(entry["path"]).name,
+                    entry.get("size"),
+                    entry.get("mtime"),
+                    1 if entry.get("readable", True) else 0,
+                    entry.get("summary"),
+                )
+                for entry in entries
+            ],
+        )
+
+    def _set_meta(self, key: str, value: str) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO metadata(key, value) VALUES (?, ?)", (key, str(value))
+        )
+
+    # ------------------------------------------------------------------ #
+    # Public API
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """Return every entry keyed by path."""
+        with self._pool.read() as conn:
+            rows = conn.execute(f"SELECT {', '.join(_COLUMNS)} FROM files").fetchall()
+        entries = {}
+        for row in rows:
+            entry = dict(row)
+            entry["readable"] = bool(entry["readable"])
+            entries[entry["path"]] = entry
+        return entries
+
+    def upsert(self, entries: Iterable[Dict[str, Any]], last_updated: Optional[str] = None) -> None:
+        """Write ``entries`` (and optionally ``last_updated``) in one transaction."""
+        with self._lock:
+            with self._conn:
+                self._upsert_rows(entries)
+                if last_updated:
+                    self._set_meta("last_updated", last_updated)
+
+    def set_summary(self, path: str, summary: str, last_updated: Optional[str] = None) -> None:
+        with self._lock:
+            with self._conn:
+                self._conn.execute("UPDATE files SET summary = ? WHERE path = ?", (summary, path))
+                if last_updated:
+                    self._set_meta("last_updated", last_updated)
+
+    def delete(self, paths: Iterable[str]) -> None:
+        rows = [(path,) for path in paths]
+        if not rows:
+            return
+        with self._lock:
+            with self._conn:
+                self._conn.executemany("DELETE FROM files WHERE path = ?", rows)
+
+    def get_meta(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        with self._pool.read() as conn:
+            row = conn.execute("SELECT value FROM metadata WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else default
+
+    def set_meta(self, key: str, value: str) -> None:
+        with self._lock:
+            with self._conn:
+                self._set_meta(key, value)
+
+    def close(self) -> None:
+        self._pool.close()
+
+
+__all__ = ["FileIndexStore"]
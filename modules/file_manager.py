@@ -3,18 +3,32 @@
 import os
 import json
 import threading
-import queue
 from pathlib import Path
 from datetime import datetime
+from typing import Optional
 import humanize
 import concurrent.futures
 
+from modules.extraction_pool import read_document
+from modules.file_index_store import FileIndexStore
+from modules.file_search_index import FileSearchIndex
+from modules.summary_cache import get_summary_cache
+from modules.summary_scheduler import (
+    PRIORITY_BACKFILL,
+    PRIORITY_INTERACTIVE,
+    PRIORITY_RECENT,
+    SummaryScheduler,
+)
+
 UNREADABLE_EXTENSIONS = {
     '.jpg', '.jpeg', '.png', '.gif', '.bmp', '.svg',
     '.mp4', '.mkv', '.avi', '.mov', '.webm',
     '.mp3', '.wav', '.flac', '.ogg'
 }
 
+# Only the head of a file is sent to the model for a summary.
+SUMMARY_INPUT_CHARS = 6000
+
 class FileManager:
     def __init__(
         self,
@@ -27,7 +41,9 @@ class FileManager:
         data_dir = base / 'data'
         data_dir.mkdir(parents=True, exist_ok=True)
 
-        self.index_file = index_path or (data_dir / 'nous_file_index.json')
+        # index_path may still name the legacy JSON file; its .db sibling is used.
+        legacy_json     = Path(index_path or (data_dir / 'nous_file_index.json'))
+        self.index_file = legacy_json.with_suffix('.db')
         self.executor   = concurrent.futures.ThreadPoolExecutor(max_workers=8)
         self._lock      = threading.Lock()
 
@@ -48,41 +64,62 @@ class FileManager:
             str(home / "AppData" / "Local" / "Programs"),
         ]
 
+        # Rows are persisted one by one in SQLite; self.index is the in-memory
+        # read view, kept in step under self._lock.
+        self._store = FileIndexStore(self.index_file, legacy_json=legacy_json)
+        self._search = FileSearchIndex()
+        # index_test.json: (mtime, entries, search index), reloaded when it changes.
+        self._test_index = None
         self.index = {
             '_meta': {
-                'version':      3,
-                'created':      datetime.now().isoformat(),
+                'version':      4,
+                'created':      None,
                 'last_updated': None,
                 'total_files':  0
             },
             'files': {}
         }
+        self._load_existing_index()
 
-        if self.index_file.exists():
-            threading.Thread(target=self._load_existing_index, daemon=True).start()
-
-        self._summary_queue = queue.Queue()
         self._ai             = None
-
-        # Spawn summary workers
-        cores = os.cpu_count() or 1
-        workers = summary_workers or max(1, cores-1)
-        for _ in range(workers):
-            t = threading.Thread(target=self._summary_worker, daemon=True)
-            t.start()
+        self._ai_lock        = threading.Lock()
+        # Content-hash keyed, shared with AISorter and DataIndexer.
+        self.summary_cache   = get_summary_cache()
+
+        # Summaries share the local model with chat: the scheduler caps
+        # concurrency at the backend's parallelism (or summary_workers),
+        # dedupes and debounces requests, and yields to interactive turns.
+        self.summaries = SummaryScheduler(
+            self._summarize_entry,
+            max_concurrency=summary_workers,
+            name="file-summary",
+        )
 
     def _load_existing_index(self):
-        try:
-            data = json.loads(self.index_file.read_text(encoding='utf-8'))
-            with self._lock:
-                self.index = data
-        except:
-            pass
-
-    def _save_index(self):
+        created = self._store.get_meta('created')
+        if created is None:
+            created = datetime.now().isoformat()
+            self._store.set_meta('created', created)
+        files = self._store.load()
         with self._lock:
-            txt = json.dumps(self.index, indent=2)
-        self.index_file.write_text(txt, encoding='utf-8')
+            self.index['files'] = files
+            self.index['_meta']['created']      = created
+            self.index['_meta']['last_updated'] = self._store.get_meta('last_updated')
+            self.index['_meta']['total_files']  = len(files)
+        self._search.clear()
+        self._search.add_many(files.items())
+
+    def close(self):
+        self.summaries.shutdown()
+        self._store.close()
+
+    def remove_entry(self, path):
+        self.apply_changes(deletes=[path])
+
+    def snapshot_entries(self) -> list:
+        """Copies of every indexed entry, taken under the index lock."""
+        with self._lock:
+            return [dict(entry) for entry in self.index['files'].values()]
 
     def should_index(self, p: Path) -> bool:
         s = str(p)
@@ -120,39 +157,141 @@ class FileManager:
             for fp in all_files:
                 fid = str(fp.resolve())
                 stat = fp.stat()
-                entry = {
-                    'path':     fid,
-                    'name':     fp.name,
-                    'size':     humanize.naturalsize(stat.st_size),
-                    'mtime':    stat.st_mtime,
-                    'readable': fp.suffix.lower() not in UNREADABLE_EXTENSIONS,
-                    'summary':  self.index['files'].get(fid, {}).get('summary')
-                }
+                entry = self._make_entry(fid, stat, self.index['files'].get(fid, {}).get('summary'))
 
                 old = self.index['files'].get(fid)
                 if old is None or old.get('mtime') != entry['mtime']:
+                    # Re-resolved through the summary cache, which only calls
+                    # the model if the bytes actually changed.
+                    entry['summary'] = None
                     new_or_changed.append((fid, entry))
 
                 self.index['files'][fid] = entry
 
             self.index['_meta']['last_updated'] = datetime.now().isoformat()
             self.index['_meta']['total_files']  = len(self.index['files'])
-            self._save_index()
+            last_updated = self.index['_meta']['last_updated']
+        # Only new or changed rows are written.
+        self._store.upsert((entry for _, entry in new_or_changed), last_updated=last_updated)
+        self._search.add_many(new_or_changed)
 
         for fid, entry in new_or_changed:
             if entry['readable']:
-                self._summary_queue.put(fid)
+                self.summaries.submit(fid, PRIORITY_BACKFILL)
 
         return {'new': len(new_or_changed), 'total': len(self.index['files'])}
 
-    def _generate_summary(self, path: str) -> str:
-        if self._ai is None:
-            from modules.ai_handler import AIHandler
-            self._ai = AIHandler(app_core=None)
+    @staticmethod
+    def _make_entry(fid: str, stat: os.stat_result, summary=None) -> dict:
+        fp = Path(fid)
+        return {
+            'path':     fid,
+            'name':     fp.name,
+            'size':     humanize.naturalsize(stat.st_size),
+            'mtime':    stat.st_mtime,
+            'readable': fp.suffix.lower() not in UNREADABLE_EXTENSIONS,
+            'summary':  summary
+        }
+
+    def apply_changes(self, upserts=(), deletes=(), moves=()):
+        """Apply a batch of watcher changes without rescanning the include paths.
+
+        ``moves`` are ``(old, new)`` pairs; a moved entry keeps its summary.
+        """
+        changed, removed = [], []
+        with self._lock:
+            files = self.index['files']
+            for raw in deletes:
+                fid = str(raw)
+                if files.pop(fid, None) is not None:
+                    removed.append(fid)
+
+            for src, dst in moves:
+                old = files.pop(str(src), None)
+                if old is not None:
+                    removed.append(str(src))
+                fp = Path(dst)
+                if not self.should_index(fp):
+                    continue
+                try:
+                    stat = fp.stat()
+                except OSError:
+                    continue
+                entry = self._make_entry(str(fp), stat, (old or {}).get('summary'))
+                files[entry['path']] = entry
+                changed.append((entry['path'], entry))
+
+            for raw in upserts:
+                fp = Path(raw)
+                if not self.should_index(fp):
+                    continue
+                try:
+                    stat = fp.stat()
+                except OSError:
+                    continue
+                fid = str(fp)
+                old = files.get(fid)
+                if old is not None and old.get('mtime') == stat.st_mtime and old.get('summary'):
+                    continue
+                entry = self._make_entry(fid, stat)
+                files[fid] = entry
+                changed.append((fid, entry))
+
+            if not changed and not removed:
+                return {'changed': 0, 'removed': 0}
+            self.index['_meta']['last_updated'] = datetime.now().isoformat()
+            self.index['_meta']['total_files']  = len(files)
+            last_updated = self.index['_meta']['last_updated']
+
+        self._store.delete(removed)
+        # Old paths of deleted and moved files; their summaries stay, keyed by content.
+        self.summary_cache.forget_paths(removed)
+        self._store.upsert((entry for _, entry in changed), last_updated=last_updated)
+        for fid in removed:
+            self._search.remove(fid)
+            self.summaries.cancel(fid)
+        self._search.add_many(changed)
+        for fid, entry in changed:
+            if entry['readable'] and not entry['summary']:
+                # The event pipeline has already debounced these paths.
+                self.request_summary(fid, debounce=0)
+        return {'changed': len(changed), 'removed': len(removed)}
+
+    def request_summary(self, path, priority: int = PRIORITY_BACKFILL, debounce: float = None):
+        """Queue a summary for an indexed file; repeated requests coalesce."""
+        self.summaries.submit(str(path), priority, debounce=debounce)
+
+    def request_interactive_summary(self, path):
+        self.request_summary(path, PRIORITY_INTERACTIVE)
+
+    def note_recently_opened(self, path):
+        self.request_summary(path, PRIORITY_RECENT, debounce=0)
+
+    def pause_summaries(self):
+        self.summaries.pause()
+
+    def resume_summaries(self):
+        self.summaries.resume()
+
+    def summary_for(self, path) -> Optional[str]:
+        """Summary for ``path``'s current content, generated at most once per content hash.
+
+        Returns None when no summary could be produced; nothing is cached
+        then, so a later request tries again.
+        """
+        return self.summary_cache.get_or_create(path, self._generate_summary)
+
+    def _generate_summary(self, path: str):
+        with self._ai_lock:
+            if self._ai is None:
+                from modules.ai_handler import AIHandler
+                self._ai = AIHandler(app_core=None)
 
         try:
-            with open(path, 'r', encoding='utf-8', errors='ignore') as f:
-                snippet = f.read()  # full content
+            document = read_document(Path(path), SUMMARY_INPUT_CHARS)
+            if document is None or not document[0].strip():
+                return None
+            snippet = document[0]
 
             prompt = (
                 "Please analyze the following text and provide a structured summary\n"
@@ -164,54 +303,72 @@ class FileManager:
                 "5 - Additional keyword\n\n"
                 f"{snippet}"
             )
-            res = self._ai.query_with_retry(prompt)
-            return res['response'].strip()
+            # Summaries are not chat turns: keep them out of history and memory.
+            res = self._ai.query_with_retry(prompt, save=False, memory=False)
+            if not res.get('success'):
+                return None
+            return res['response'].strip() or None
         except:
-            return "Unreadable"
-
-    def _summary_worker(self):
-        while True:
-            fid = self._summary_queue.get()
-            with self._lock:
-                entry = self.index['files'].get(fid)
-                if entry is None or entry.get('summary'):
-                    self._summary_queue.task_done()
-                    continue
-
-            summary = self._generate_summary(entry['path'])
-
-            with self._lock:
-                self.index['files'][fid]['summary'] = summary
-                self.index['_meta']['last_updated']  = datetime.now().isoformat()
-                self._save_index()
+            return None
 
-            self._summary_queue.task_done()
+    def _summarize_entry(self, fid: str):
+        with self._lock:
+            entry = self.index['files'].get(fid)
+            if entry is None or entry.get('summary') or not entry.get('readable', True):
+                return
 
-    def search_index(self, query: str, max_results=20):
-        terms = query.lower().split()
-        candidates = []
+        summary = self.summary_for(entry['path'])
+        if not summary:
+            # Left unset so the next scan (or opening the file) retries it.
+            return
 
         with self._lock:
-            candidates.extend(self.index['files'].values())
-
+            if fid not in self.index['files']:
+                return
+            current = self.index['files'][fid]
+            current['summary'] = summary
+            self.index['_meta']['last_updated']  = datetime.now().isoformat()
+            last_updated = self.index['_meta']['last_updated']
+        self._store.set_summary(fid, summary, last_updated=last_updated)
+        self._search.add(fid, current)
+
+    def _test_search_index(self):
+        """Return ``(entries, search index)`` for index_test.json, or None.
+
+        The file is parsed once and re-read only when its mtime changes.
+        """
         test_file = self.index_file.parent / "index_test.json"
-        if test_file.exists():
-            try:
-                test_data = json.loads(test_file.read_text(encoding='utf-8')).get('files', {})
-                candidates.extend(test_data.values())
-            except:
-                pass
+        try:
+            mtime = test_file.stat().st_mtime
+        except OSError:
+            self._test_index = None
+            return None
+        cached = self._test_index
+        if cached is not None and cached[0] == mtime:
+            return cached[1], cached[2]
+        try:
+            entries = json.loads(test_file.read_text(encoding='utf-8')).get('files', {})
+        except:
+            entries = {}
+        index = FileSearchIndex()
+        index.add_many(entries.items())
+        self._test_index = (mtime, entries, index)
+        return entries, index
 
+    def search_index(self, query: str, max_results=20):
         results = []
-        for entry in candidates:
-            score = 0
-            nm, pm, sm = entry['name'].lower(), entry['path'].lower(), (entry.get('summary') or "").lower()
-            for t in terms:
-                if t in sm: score += 5
-                if t in nm: score += 2
-                if t in pm: score += 1
-            if score>0:
-                results.append({**entry, 'score': score})
+        with self._lock:
+            files = self.index['files']
+            for fid, score in self._search.search(query, max_results):
+                entry = files.get(fid)
+                if entry is not None:
+                    results.append({**entry, 'score': score})
+
+        test = self._test_search_index()
+        if test is not None:
+            entries, index = test
+            for fid, score in index.search(query, max_results):
+                results.append({**entries[fid], 'score': score})
 
         results.sort(key=lambda x: -x['score'])
         return results[:max_results]
@@ -0,0 +1,140 @@
+"""In-memory inverted index behind ``FileManager.search_index``."""
+
+from __future__ import annotations
+
+import heapq
+import re
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Unicode letters and digits; underscores separate tokens as other punctuation does.
+_TOKEN_RE = re.compile(r"[^\W_]+")
+
+# (field, weight) pairs; the weights match the original substring scoring.
+FIELD_NAME, FIELD_PATH, FIELD_SUMMARY = 0, 1, 2
+FIELD_WEIGHTS = ((FIELD_SUMMARY, 5), (FIELD_NAME, 2), (FIELD_PATH, 1))
+
+
+def _fields(entry: Dict) -> Tuple[str, str, str]:
+    return (
+        (entry.get("name") or "").casefold(),
+        (entry.get("path") or "").casefold(),
+        (entry.get("summary") or "").casefold(),
+    )
+
+
+class FileSearchIndex:
+    """Token postings for file names, path components and summaries.
+
+    A query term is looked up by token prefix, which narrows the candidates
+    to a handful of postings; each candidate is then confirmed with the same
+    substring test the linear scan used, so scores are unchanged for every
+    file that is found. Terms that only occur mid-token (``port`` inside
+    ``report``) are no longer matched.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._docs: Dict[str, Tuple[str, str, str]] = {}
+        self._postings: Tuple[Dict[str, Set[str]], ...] = tuple(defaultdict(set) for _ in range(3))
+        # Sorted vocabularies for prefix lookups, rebuilt lazily after changes.
+        self._vocab: List[Optional[List[str]]] = [None, None, None]
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    # ------------------------------------------------------------------ #
+    # Maintenance
+    def add(self, fid: str, entry: Dict) -> None:
+        """Index ``entry`` under ``fid``, replacing any previous version."""
+        fields = _fields(entry)
+        with self._lock:
+            old = self._docs.get(fid)
+            if old == fields:
+                return
+            if old is not None:
+                self._unlink(fid, old)
+            self._docs[fid] = fields
+            for field, text in enumerate(fields):
+                postings = self._postings[field]
+                for token in set(_TOKEN_RE.findall(text)):
+                    if token not in postings:
+                        self._vocab[field] = None
+                    postings[token].add(fid)
+
+    def add_many(self, entries: Iterable[Tuple[str, Dict]]) -> None:
+        for fid, entry in entries:
+            self.add(fid, entry)
+
+    def remove(self, fid: str) -> None:
+        with self._lock:
+            old = self._docs.pop(fid, None)
+            if old is not None:
+                self._unlink(fid, old)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._docs.clear()
+            for field in range(3):
+                self._postings[field].clear()
+                self._vocab[field] = None
+
+    def _unlink(self, fid: str, fields: Tuple[str, str, str]) -> None:
+        for field, text in enumerate(fields):
+            postings = self._postings[field]
+            for token in set(_TOKEN_RE.findall(text)):
+                bucket = postings.get(token)
+                if bucket is None:
+                    continue
+                bucket.discard(fid)
+                if not bucket:
+                    del postings[token]
+                    self._vocab[field] = None
+
+    # ------------------------------------------------------------------ #
+    # Lookup
+    def _prefix_matches(self, field: int, piece: str) -> Set[str]:
+        vocab = self._vocab[field]
+        if vocab is None:
+            vocab = self._vocab[field] = sorted(self._postings[field])
+        postings = self._postings[field]
+        found: Set[str] = set()
+        for i in range(bisect_left(vocab, piece), len(vocab)):
+            token = vocab[i]
+            if not token.startswith(piece):
+                break
+            found |= postings[token]
+        return found
+
+    def _candidates(self, field: int, pieces: List[str]) -> Set[str]:
+        result: Optional[Set[str]] = None
+        for piece in sorted(pieces, key=len, reverse=True):
+            matches = self._prefix_matches(field, piece)
+            result = matches if result is None else result & matches
+            if not result:
+                return set()
+        return result or set()
+
+    def search(self, query: str, max_results: int = 20) -> List[Tuple[str, int]]:
+        """Return ``(fid, score)`` pairs, best first."""
+        scores: Dict[str, int] = defaultdict(int)
+        with self._lock:
+            for term in query.casefold().split():
+                pieces = _TOKEN_RE.findall(term)
+                if not pieces:
+                    continue
+                # A plain alphanumeric term that prefixes a token is already a
+                # substring of the field; only compound terms need confirming.
+                exact = len(pieces) == 1 and pieces[0] == term
+                for field, weight in FIELD_WEIGHTS:
+                    candidates = self._candidates(field, pieces)
+                    if not exact:
+                        candidates = [fid for fid in candidates if term in self._docs[fid][field]]
+                    for fid in candidates:
+                        scores[fid] += weight
+        return heapq.nlargest(max_results, scores.items(), key=lambda item: item[1])
+
+
+__all__ = ["FileSearchIndex"]
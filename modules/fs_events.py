@@ -0,0 +1,264 @@
+"""Debounced, coalescing pipeline for filesystem watcher events.
+
+Watchdog delivers one callback per low-level event, so a checkout or an
+unzip produces thousands of them. ``FSEventPipeline`` folds them into the
+net change per path (created then deleted cancels out, a chain of renames
+becomes one move), waits until each path has been quiet for ``debounce``
+seconds, and hands the result to a callback as one ``FileChangeBatch``.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from modules.telemetry import log_event
+
+DEFAULT_DEBOUNCE_SECONDS = 0.75
+# A path that keeps changing is still flushed after this long.
+DEFAULT_MAX_DELAY_SECONDS = 5.0
+
+# Files the app rewrites as it runs. Reacting to them would re-index the
+# activity log, log that, and trigger the watcher again.
+APP_OUTPUT_NAMES = frozenset({"activity.log"})
+APP_OUTPUT_SUFFIXES = (".db", ".db-wal", ".db-shm", ".db-journal")
+
+
+def app_output_filter(data_dir) -> Callable[[str], bool]:
+    """Return a predicate matching the app's own log and SQLite files in ``data_dir``.
+
+    Everything else in ``data_dir`` is watched as usual; it is also the
+    default index root.
+    """
+    data_dir = Path(data_dir).resolve()
+
+    def is_app_output(path: str) -> bool:
+        candidate = Path(path)
+        if candidate.parent != data_dir:
+            return False
+        return candidate.name in APP_OUTPUT_NAMES or candidate.name.endswith(APP_OUTPUT_SUFFIXES)
+
+    return is_app_output
+
+
+@dataclass
+class FileChangeBatch:
+    """Net changes since the previous batch.
+
+    ``moves`` are ``(old_path, new_path)`` pairs whose content is unchanged;
+    a moved file that was also modified appears in ``upserts`` as well.
+    """
+
+    upserts: List[str] = field(default_factory=list)
+    deletes: List[str] = field(default_factory=list)
+    moves: List[Tuple[str, str]] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.upserts) + len(self.deletes) + len(self.moves)
+
+    def changed_paths(self) -> List[str]:
+        """Every path that now exists with new or relocated content."""
+        seen = dict.fromkeys(self.upserts)
+        seen.update(dict.fromkeys(dst for _, dst in self.moves))
+        return list(seen)
+
+
+@dataclass
+class _Change:
+    op: str  # "upsert", "delete" or "move"
+    first_seen: float
+    last_seen: float
+    source: Optional[str] = None
+    modified: bool = False
+    # Upserts only: the path did not exist before this window.
+    created: bool = False
+
+
+class FSEventPipeline:
+    """Collect watcher events and deliver them to ``on_batch`` in coalesced batches.
+
+    Events for paths matching ``ignore`` are dropped on intake.
+    """
+
+    def __init__(
+        self,
+        on_batch: Callable[[FileChangeBatch], None],
+        debounce: float = DEFAULT_DEBOUNCE_SECONDS,
+        max_delay: float = DEFAULT_MAX_DELAY_SECONDS,
+        ignore: Optional[Callable[[str], bool]] = None,
+    ) -> None:
+        self.on_batch = on_batch
+        self.ignore = ignore or (lambda path: False)
+        self.debounce = max(0.0, float(debounce))
+        self.max_delay = max(self.debounce, float(max_delay))
+        self._pending: Dict[str, _Change] = {}
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="fs-events", daemon=True)
+        self._thread.start()
+
+    # ------------------------------------------------------------------ #
+    # Event intake (called from the watchdog thread)
+    def _touch(self, path: str, op: str, now: float, source: Optional[str] = None) -> _Change:
+        previous = self._pending.get(path)
+        first_seen = previous.first_seen if previous else now
+        change = _Change(op, first_seen, now, source)
+        self._pending[path] = change
+        self._cond.notify()
+        return change
+
+    def modified(self, path: str) -> None:
+        """Record a modify of ``path``."""
+        self._upsert(path, created=False)
+
+    def created(self, path: str) -> None:
+        """Record a create of ``path``; deleting it in the same window cancels both."""
+        self._upsert(path, created=True)
+
+    def _upsert(self, path: str, created: bool) -> None:
+        if self.ignore(path):
+            return
+        now = time.monotonic()
+        with self._cond:
+            if self._closed:
+                return
+            change = self._pending.get(path)
+            if change is not None and change.op == "move":
+                change.modified = True
+                change.last_seen = now
+                self._cond.notify()
+                return
+            if change is None:
+                new = created
+            else:
+                # Re-created after a delete replaces a file that was indexed.
+                new = change.op == "upsert" and change.created
+            self._touch(path, "upsert", now).created = new
+
+    def deleted(self, path: str) -> None:
+        if self.ignore(path):
+            return
+        now = time.monotonic()
+        with self._cond:
+            if self._closed:
+                return
+            change = self._pending.get(path)
+            if change is not None and change.op == "upsert" and change.created:
+                # Created and removed within one window: nothing to report.
+                del self._pending[path]
+                return
+            if change is not None and change.op == "move":
+                # Moved in and then removed: only the original location matters.
+                self._touch(change.source, "delete", now)
+            self._touch(path, "delete", now)
+
+    def moved(self, src: str, dst: str) -> None:
+        if self.ignore(src) or self.ignore(dst):
+            # Only the watched side of the rename is a change.
+            if not self.ignore(dst):
+                self.modified(dst)
+            elif not self.ignore(src):
+                self.deleted(src)
+            return
+        now = time.monotonic()
+        with self._cond:
+            if self._closed:
+                return
+            change = self._pending.pop(src, None)
+            if change is not None and change.op == "upsert":
+                # Created (or edited) and renamed within one window: index as new.
+                if not change.created:
+                    self._touch(src, "delete", now)
+                self._touch(dst, "upsert", now)
+                return
+            origin = change.source if change is not None and change.op == "move" else src
+            if origin == dst:
+                # Renamed back to where it started.
+                if change is not None and change.modified:
+                    self._touch(dst, "upsert", now)
+                else:
+                    self._pending.pop(dst, None)
+                return
+            moved = self._touch(dst, "move", now, source=origin)
+            moved.modified = bool(change is not None and change.modified)
+
+    # ------------------------------------------------------------------ #
+    # Delivery
+    def _take_ready(self, now: float, force: bool = False) -> FileChangeBatch:
+        batch = FileChangeBatch()
+        for path, change in list(self._pending.items()):
+            quiet = now - change.last_seen >= self.debounce
+            overdue = now - change.first_seen >= self.max_delay
+            if not (force or quiet or overdue):
+                continue
+            del self._pending[path]
+            if change.op == "delete":
+                batch.deletes.append(path)
+            elif change.op == "move":
+                batch.moves.append((change.source, path))
+                if change.modified:
+                    batch.upserts.append(path)
+            else:
+                batch.upserts.append(path)
+        return batch
+
+    def _next_wait(self, now: float) -> Optional[float]:
+        if not self._pending:
+            return None
+        due = min(
+            min(change.last_seen + self.debounce, change.first_seen + self.max_delay)
+            for change in self._pending.values()
+        )
+        return max(0.01, due - now)
+
+    def _deliver(self, batch: FileChangeBatch) -> None:
+        if not len(batch):
+            return
+        started = time.monotonic()
+        try:
+            self.on_batch(batch)
+        except Exception as exc:
+            log_event("fs_events.batch_failed", error=str(exc), changes=len(batch))
+            return
+        log_event(
+            "fs_events.batch",
+            upserts=len(batch.upserts),
+            deletes=len(batch.deletes),
+            moves=len(batch.moves),
+            seconds=round(time.monotonic() - started, 3),
+        )
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        return
+                    now = time.monotonic()
+                    batch = self._take_ready(now)
+                    if len(batch):
+                        break
+                    self._cond.wait(timeout=self._next_wait(now))
+            self._deliver(batch)
+
+    def flush(self) -> None:
+        """Deliver everything pending now, on the calling thread."""
+        with self._cond:
+            batch = self._take_ready(time.monotonic(), force=True)
+        self._deliver(batch)
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._pending)
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._pending.clear()
+            self._cond.notify_all()
+
+
+__all__ = ["FSEventPipeline", "FileChangeBatch", "app_output_filter"]
@@ -0,0 +1,300 @@
+"""Append-only SQLite log of chat interactions."""
+
+from __future__ import annotations
+
+import json
+import re
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+from modules.sqlite_pool import SQLitePool
+from modules.telemetry import log_event
+
+
+# Number of recent rows scanned for relevance when FTS5 is unavailable.
+FALLBACK_SCAN_ROWS = 200
+
+
+def tokenize(text: str) -> Set[str]:
+    """Relevance tokens: lower-cased ASCII alphanumeric runs longer than two chars."""
+    if not text:
+        return set()
+    return {token for token in re.findall(r"[a-zA-Z0-9]+", text.lower()) if len(token) > 2}
+
+
+def _py_lower(value):
+    return value.lower() if isinstance(value, str) else value
+
+
+class InteractionStore:
+    """Chat history stored as one row per turn.
+
+    Appends are single inserts and the recent tail is an indexed reverse scan,
+    so neither grows with the length of the history. When SQLite ships FTS5,
+    a trigram shadow table (kept in sync by triggers) serves the substring
+    matching behind ``forget_by_keyword``, and ``interactions_terms`` holds
+    each prompt's ``tokenize`` terms so ``relevant`` can rank the whole log
+    with bm25.
+    """
+
+    def __init__(self, db_path: Path, legacy_json: Optional[Path] = None) -> None:
+        self.db_path = Path(db_path).expanduser().resolve()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._pool = SQLitePool(self.db_path)
+        self._lock = self._pool.write_lock
+        self._conn = self._pool.writer
+        # Python's lower() keeps forget_by_keyword's matching identical to the JSON era.
+        self._conn.create_function("py_lower", 1, _py_lower, deterministic=True)
+        self._fts_available = True
+        self._initialise_schema()
+        if legacy_json is not None:
+            self._migrate_json(Path(legacy_json))
+
+    # ------------------------------------------------------------------ #
+    # Internal helpers
+    def _initialise_schema(self) -> None:
+        with self._lock:
+            cur = self._conn.cursor()
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS interactions (
+                    seq        INTEGER PRIMARY KEY AUTOINCREMENT,
+                    id         TEXT UNIQUE NOT NULL,
+                    timestamp  TEXT NOT NULL,
+                    prompt     TEXT NOT NULL,
+                    response   TEXT NOT NULL
+                )
+                """
+            )
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS metadata (
+                    key   TEXT PRIMARY KEY,
+                    value TEXT
+                )
+                """
+            )
+            try:
+                cur.execute(
+                    """
+                    CREATE VIRTUAL TABLE IF NOT EXISTS interactions_fts
+                    USING fts5(prompt, response, content = 'interactions',
+                               content_rowid = 'seq', tokenize = 'trigram');
+                    """
+                )
+            except sqlite3.OperationalError:
+                self._fts_available = False
+            if self._fts_available:
+                # Terms are written from Python (see _insert_terms) so every
+                # connection can delete; only the cleanup runs as a trigger.
+                cur.execute(
+                    """
+                    CREATE VIRTUAL TABLE IF NOT EXISTS interactions_terms
+                    USING fts5(terms, tokenize = 'unicode61');
+                    """
+                )
+                cur.executescript(
+                    """
+                    CREATE TRIGGER IF NOT EXISTS interactions_ai AFTER INSERT ON interactions BEGIN
+                        INSERT INTO interactions_fts(rowid, prompt, response)
+                        VALUES (new.seq, new.prompt, new.response);
+                    END;
+                    CREATE TRIGGER IF NOT EXISTS interactions_ad AFTER DELETE ON interactions BEGIN
+                        INSERT INTO interactions_fts(interactions_fts, rowid, prompt, response)
+                        VALUES ('delete', old.seq, old.prompt, old.response);
+                        DELETE FROM interactions_terms WHERE rowid = old.seq;
+                    END;
+                    """
+                )
+            self._conn.commit()
+            if self._fts_available:
+                self._backfill_terms()
+
+    def _insert_terms(self, rows: Iterable[tuple]) -> None:
+        """Index ``(seq, prompt)`` rows into interactions_terms."""
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO interactions_terms(rowid, terms) VALUES (?, ?)",
+            [(seq, " ".join(sorted(tokenize(prompt)))) for seq, prompt in rows],
+        )
+
+    def _backfill_terms(self) -> None:
+        """Index rows written before interactions_terms existed (or by migration)."""
+        rows = self._conn.execute(
+            "SELECT seq, prompt FROM interactions WHERE seq NOT IN (SELECT rowid FROM interactions_terms)"
+        ).fetchall()
+        if rows:
+            with self._conn:
+                self._insert_terms((row["seq"], row["prompt"]) for row in rows)
+
+    def _migrate_json(self, path: Path) -> None:
+        """Import the legacy ``ai_interactions.json`` once, then set it aside."""
+        with self._lock:
+            done = self._conn.execute(
+                "SELECT value FROM metadata WHERE key = 'migrated_json'"
+            ).fetchone()
+        if done or not path.exists():
+            return
+
+        entries = []
+        try:
+            if path.stat().st_size:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if isinstance(data, list):
+                    entries = [entry for entry in data if isinstance(entry, dict)]
+        except (OSError, ValueError) as e:
+            print(f"Warning: Failed to read {path.name} for migration: {e}")
+
+        rows = [
+            (
+                str(entry.get("id") or f"legacy-{idx}"),
+                str(entry.get("timestamp") or ""),
+                str(entry.get("prompt") or ""),
+                str(entry.get("response") or ""),
+            )
+            for idx, entry in enumerate(entries)
+        ]
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO interactions (id, timestamp, prompt, response) VALUES (?, ?, ?, ?)",
+                    rows,
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO metadata (key, value) VALUES ('migrated_json', ?)",
+                    (str(path),),
+                )
+            if self._fts_available:
+                self._backfill_terms()
+        if entries:
+            try:
+                path.rename(path.with_name(path.name + ".migrated"))
+            except OSError:
+                pass
+        log_event("interactions.migrated", source=str(path), count=len(rows))
+
+    # ------------------------------------------------------------------ #
+    # Public API
+    def append(self, interaction: Dict[str, str]) -> None:
+        prompt = interaction.get("prompt") or ""
+        with self._lock:
+            with self._conn:
+                cur = self._conn.execute(
+                    "INSERT INTO interactions (id, timestamp, prompt, response) VALUES (?, ?, ?, ?)",
+                    (
+                        interaction["id"],
+                        interaction["timestamp"],
+                        prompt,
+                        interaction.get("response") or "",
+                    ),
+                )
+                if self._fts_available:
+                    self._insert_terms([(cur.lastrowid, prompt)])
+
+    def tail(self, limit: int = 5) -> List[Dict[str, str]]:
+        """Return the last ``limit`` interactions, oldest first."""
+        with self._pool.read() as conn:
+            rows = conn.execute(
+                """
+                SELECT id, timestamp, prompt, response
+                FROM interactions
+                ORDER BY seq DESC
+                LIMIT ?
+                """,
+                (int(limit),),
+            ).fetchall()
+        return [dict(row) for row in reversed(rows)]
+
+    def relevant(self, prompt: str, limit: int = 2, min_overlap: int = 2) -> List[Dict[str, str]]:
+        """Return up to ``limit`` past interactions most relevant to ``prompt``.
+
+        Candidates share at least ``min_overlap`` tokens with the prompt, so
+        prompts with fewer tokens than that match nothing; they are ranked by
+        bm25 over the whole log and returned oldest first.
+        """
+        prompt_tokens = tokenize(prompt)
+        needed = max(1, int(min_overlap))
+        if len(prompt_tokens) < needed:
+            return []
+        matches = []
+        with self._pool.read() as conn:
+            if self._fts_available:
+                match_query = " OR ".join(f'"{token}"' for token in sorted(prompt_tokens))
+                # Walk the ranking until enough rows meet the overlap; only
+                # those rows' text is read.
+                ranked = conn.execute(
+                    """
+                    SELECT rowid AS seq, terms
+                    FROM interactions_terms
+                    WHERE interactions_terms MATCH ?
+                    ORDER BY bm25(interactions_terms), rowid DESC
+                    """,
+                    (match_query,),
+                )
+                chosen = []
+                for row in ranked:
+                    if len(prompt_tokens.intersection(row["terms"].split())) >= needed:
+                        chosen.append(row["seq"])
+                        if len(chosen) >= limit:
+                            break
+                ranked.close()
+                if chosen:
+                    matches = conn.execute(
+                        f"""
+                        SELECT seq, id, timestamp, prompt, response
+                        FROM interactions
+                        WHERE seq IN ({', '.join('?' * len(chosen))})
+                        """,
+                        chosen,
+                    ).fetchall()
+            else:
+                rows = conn.execute(
+                    """
+                    SELECT seq, id, timestamp, prompt, response
+                    FROM interactions
+                    ORDER BY seq DESC
+                    LIMIT ?
+                    """,
+                    (FALLBACK_SCAN_ROWS,),
+                ).fetchall()
+                for row in rows:
+                    if len(prompt_tokens & tokenize(row["prompt"])) >= needed:
+                        matches.append(row)
+                        if len(matches) >= limit:
+                            break
+        matches.sort(key=lambda row: row["seq"])
+        return [
+            {key: row[key] for key in ("id", "timestamp", "prompt", "response")}
+            for row in matches
+        ]
+
+    def count(self) -> int:
+        with self._pool.read() as conn:
+            row = conn.execute("SELECT COUNT(*) FROM interactions").fetchone()
+        return row[0] if row else 0
+
+    def forget_by_keyword(self, keyword: str) -> int:
+        """Delete interactions whose prompt or response contains ``keyword``."""
+        keyword = (keyword or "").lower()
+        if not keyword.strip():
+            return 0
+        # The FTS MATCH only narrows candidates; instr() decides.
+        where = "(instr(py_lower(prompt), ?) > 0 OR instr(py_lower(response), ?) > 0)"
+        params: tuple = (keyword, keyword)
+        if self._fts_available and len(keyword) >= 3:
+            where = (
+                "seq IN (SELECT rowid FROM interactions_fts WHERE interactions_fts MATCH ?) AND "
+                + where
+            )
+            params = ('"' + keyword.replace('"', '""') + '"',) + params
+        with self._lock:
+            with self._conn:
+                cur = self._conn.execute(f"DELETE FROM interactions WHERE {where}", params)
+        return cur.rowcount
+
+    def close(self) -> None:
+        self._pool.close()
+
+
+__all__ = ["InteractionStore", "tokenize"]
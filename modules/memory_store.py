@@ -2,22 +2,59 @@
 
 from __future__ import annotations
 
+import re
 import sqlite3
 import threading
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, Iterable, List, Optional
 
+from modules.sqlite_pool import SQLitePool
+
+# Query terms beyond this many are ignored when ranking memories.
+MAX_QUERY_TERMS = 16
+# A memory updated today ranks up to (1 + RECENCY_BOOST) times higher than an
+# equally relevant old one; the boost halves after RECENCY_DAYS.
+RECENCY_BOOST = 0.5
+RECENCY_DAYS = 30.0
+# Memory seeded from base_memory.txt; the chat sends it as the system prefix.
+BASE_POLICY_KEY = "base_policy"
+
+_STOPWORDS = frozenset(
+    "the and for are but not you your with this that have from was were what when where "
+    "which who why how can could would should will about into than then them they there "
+    "these those its it's our out all any some just also been being did does had has her "
+    "him his she".split()
+)
+
+
+def _query_terms(text: str) -> List[str]:
+    """Distinct, lower-cased search terms from free text (stopwords dropped)."""
+    terms: List[str] = []
+    for token in re.findall(r"\w+", (text or "").lower()):
+        if len(token) > 2 and token not in _STOPWORDS and token not in terms:
+            terms.append(token)
+    return terms[:MAX_QUERY_TERMS]
+
 
 class MemoryStore:
-    """SQLite-backed memory store supporting simple key/value recall."""
+    """SQLite-backed memory store supporting simple key/value recall.
+
+    When SQLite ships FTS5, ``memories_fts`` mirrors keys and values (kept in
+    sync by triggers) so ``search_memory`` can rank by bm25 instead of
+    scanning the table.
+    """
 
     def __init__(self, db_path: Path) -> None:
         self.db_path = Path(db_path).expanduser().resolve()
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
 
         self._lock = threading.Lock()
+        self._pool: Optional[SQLitePool] = None
         self._conn: Optional[sqlite3.Connection] = None
+        # Bumped on every write so callers can cache derived state (e.g. prompt prefixes).
+        self.revision = 0
+        self._fts_available = True
 
         self._connect_with_recovery()
 
@@ -26,23 +63,30 @@ class MemoryStore:
     def _connect_with_recovery(self) -> None:
         """Open the database, recovering from corruption when necessary."""
         try:
-            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
-            self._conn.row_factory = sqlite3.Row
+            self._open_pool()
             self._initialise_schema()
         except sqlite3.DatabaseError:
             self._handle_corruption()
-            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
-            self._conn.row_factory = sqlite3.Row
+            self._open_pool()
             self._initialise_schema()
 
+    def _open_pool(self) -> None:
+        # Writes share the pool's writer under self._lock; lookups use
+        # per-thread read-only connections and never wait on a writer.
+        self._pool = SQLitePool(self.db_path)
+        self._conn = self._pool.writer
+
     def _handle_corruption(self) -> None:
         """Rename the corrupted database and start fresh."""
         try:
-            if self._conn:
+            if self._pool:
+                self._pool.close()
+            elif self._conn:
                 self._conn.close()
         except Exception:
             pass
         finally:
+            self._pool = None
             self._conn = None
 
         backup = self.db_path.with_suffix(self.db_path.suffix + ".bak")
@@ -83,6 +127,45 @@ class MemoryStore:
                 """
             )
             self._conn.commit()
+            self._initialise_fts(cur)
+
+    def _initialise_fts(self, cur: sqlite3.Cursor) -> None:
+        existed = cur.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'memories_fts'"
+        ).fetchone()
+        try:
+            cur.execute(
+                """
+                CREATE VIRTUAL TABLE IF NOT EXISTS memories_fts
+                USING fts5(key, value, content = 'memories', content_rowid = 'rowid',
+                           tokenize = 'porter unicode61');
+                """
+            )
+        except sqlite3.OperationalError:
+            self._fts_available = False
+            return
+        cur.executescript(
+            """
+            CREATE TRIGGER IF NOT EXISTS memories_ai AFTER INSERT ON memories BEGIN
+                INSERT INTO memories_fts(rowid, key, value) VALUES (new.rowid, new.key, new.value);
+            END;
+            CREATE TRIGGER IF NOT EXISTS memories_ad AFTER DELETE ON memories BEGIN
+                INSERT INTO memories_fts(memories_fts, rowid, key, value)
+                VALUES ('delete', old.rowid, old.key, old.value);
+            END;
+            CREATE TRIGGER IF NOT EXISTS memories_au AFTER UPDATE ON memories BEGIN
+                INSERT INTO memories_fts(memories_fts, rowid, key, value)
+                VALUES ('delete', old.rowid, old.key, old.value);
+                INSERT INTO memories_fts(rowid, key, value) VALUES (new.rowid, new.key, new.value);
+            END;
+            """
+        )
+        # memories has no INTEGER PRIMARY KEY, so its rowids would change on
+        # VACUUM; run a 'rebuild' after one.
+        if not existed:
+            # Index memories saved before the FTS table existed.
+            cur.execute("INSERT INTO memories_fts(memories_fts) VALUES ('rebuild')")
+        self._conn.commit()
 
     def _timestamp(self) -> str:
         return datetime.utcnow().isoformat()
@@ -111,6 +194,7 @@ class MemoryStore:
                 (key, value, created, updated),
             )
             self._conn.commit()
+            self.revision += 1
         return {"key": key, "value": value, "updated_at": updated}
 
     def get_memory(self, key: str) -> Optional[str]:
@@ -118,43 +202,77 @@ class MemoryStore:
         key = key.strip()
         if not key:
             return None
-        with self._lock:
-            row = self._conn.execute(
+        with self._pool.read() as conn:
+            row = conn.execute(
                 "SELECT value FROM memories WHERE key = ?", (key,)
             ).fetchone()
         return row["value"] if row else None
 
-    def search_memory(self, query: str, limit: int = 5) -> List[Dict[str, str]]:
-        """Search memories for a query substring."""
+    def search_memory(self, query: str, limit: int = 5, exclude: Iterable[str] = ()) -> List[Dict[str, str]]:
+        """Return memories relevant to ``query``, best first.
+
+        Ranked by bm25 over the query's terms with a recency boost. A single
+        word also matches inside keys and values (``color`` finds
+        ``favorite_color``), as the substring search used to. Keys in
+        ``exclude`` are never returned.
+        """
         query = (query or "").strip()
         if not query:
             return []
-        pattern = f"%{query.lower()}%"
-        with self._lock:
-            rows = self._conn.execute(
-                """
-                SELECT key, value, updated_at
-                FROM memories
-                WHERE lower(key) LIKE ? OR lower(value) LIKE ?
-                ORDER BY updated_at DESC
-                LIMIT ?
-                """,
-                (pattern, pattern, int(limit)),
-            ).fetchall()
-        return [dict(row) for row in rows]
+        limit = int(limit)
+        excluded = list(dict.fromkeys(exclude))
+        # SQLite accepts an empty list here.
+        not_in = f"NOT IN ({', '.join('?' * len(excluded))})"
+        results: List[Dict[str, str]] = []
+        terms = _query_terms(query)
+        with self._pool.read() as conn:
+            if self._fts_available and terms:
+                match_query = " OR ".join(f'"{term}"' for term in terms)
+                rows = conn.execute(
+                    f"""
+                    SELECT memories.key, memories.value, memories.updated_at
+                    FROM memories_fts
+                    JOIN memories ON memories.rowid = memories_fts.rowid
+                    WHERE memories_fts MATCH ? AND memories.key {not_in}
+                    ORDER BY bm25(memories_fts) * (
+                        1.0 + ? / (1.0 + max(0.0, julianday('now') - julianday(memories.updated_at)) / ?)
+                    )
+                    LIMIT ?
+                    """,
+                    (match_query, *excluded, RECENCY_BOOST, RECENCY_DAYS, limit),
+                ).fetchall()
+                results = [dict(row) for row in rows]
+            if len(results) < limit and (not self._fts_available or not query.split()[1:]):
+                # Substring lookups (single words typed into the memory search).
+                pattern = f"%{query.lower()}%"
+                seen = {item["key"] for item in results}
+                rows = conn.execute(
+                    f"""
+                    SELECT key, value, updated_at
+                    FROM memories
+                    WHERE (lower(key) LIKE ? OR lower(value) LIKE ?) AND key {not_in}
+                    ORDER BY updated_at DESC
+                    LIMIT ?
+                    """,
+                    (pattern, pattern, *excluded, limit),
+                ).fetchall()
+                for row in rows:
+                    if row["key"] not in seen and len(results) < limit:
+                        results.append(dict(row))
+        return results
 
     def all_memories(self) -> Iterable[Dict[str, str]]:
         """Return all memories ordered by most recent."""
-        with self._lock:
-            rows = self._conn.execute(
+        with self._pool.read() as conn:
+            rows = conn.execute(
                 "SELECT key, value, updated_at FROM memories ORDER BY updated_at DESC"
             ).fetchall()
         for row in rows:
             yield dict(row)
 
     def stats(self) -> Dict[str, int]:
-        with self._lock:
-            row = self._conn.execute("SELECT COUNT(*) AS total FROM memories").fetchone()
+        with self._pool.read() as conn:
+            row = conn.execute("SELECT COUNT(*) AS total FROM memories").fetchone()
         total = row["total"] if row else 0
         return {"count": total}
 
@@ -165,13 +283,15 @@ class MemoryStore:
         with self._lock:
             self._conn.execute("DELETE FROM memories WHERE key = ?", (key,))
             self._conn.commit()
+            self.revision += 1
 
     def clear(self) -> None:
         with self._lock:
             self._conn.execute("DELETE FROM memories")
             self._conn.commit()
+            self.revision += 1
 
-    def seed_from_file(self, file_path: Path, key: str = "base_policy") -> None:
+    def seed_from_file(self, file_path: Path, key: str = BASE_POLICY_KEY) -> None:
         """Seed the store with a file's contents if the key is absent."""
         path = Path(file_path)
         if not path.exists():
@@ -208,13 +328,14 @@ class MemoryStore:
                     (fact, timestamp, timestamp),
                 )
                 self._conn.commit()
+                self.revision += 1
             except sqlite3.Error:
                 return None
         return {"fact": fact, "updated_at": timestamp}
 
     def list_profile_facts(self, limit: int = 10) -> List[str]:
-        with self._lock:
-            rows = self._conn.execute(
+        with self._pool.read() as conn:
+            rows = conn.execute(
                 """
                 SELECT fact
                 FROM profile
@@ -229,10 +350,11 @@ class MemoryStore:
         with self._lock:
             self._conn.execute("DELETE FROM profile")
             self._conn.commit()
+            self.revision += 1
 
     def close(self) -> None:
         with self._lock:
-            self._conn.close()
+            self._pool.close()
 
 
 # ---------------------------------------------------------------------- #
@@ -260,8 +382,8 @@ def get_memory(key: str) -> Optional[str]:
     return _require_store().get_memory(key)
 
 
-def search_memory(query: str, limit: int = 5) -> List[Dict[str, str]]:
-    return _require_store().search_memory(query, limit=limit)
+def search_memory(query: str, limit: int = 5, exclude: Iterable[str] = ()) -> List[Dict[str, str]]:
+    return _require_store().search_memory(query, limit=limit, exclude=exclude)
 
 def add_profile_fact(fact: str) -> Optional[Dict[str, str]]:
     return _require_store().add_profile_fact(fact)
@@ -271,6 +393,7 @@ def list_profile_facts(limit: int = 10) -> List[str]:
 
 
 __all__ = [
+    "BASE_POLICY_KEY",
     "MemoryStore",
     "set_default_store",
     "save_memory",
@@ -0,0 +1,278 @@
+"""Keep-alive HTTP client for the local Ollama API.
+
+Talking to ``/api/generate`` over a small pool of persistent connections
+avoids spawning ``ollama run`` per request, and the ``keep_alive`` field
+keeps the model resident between chat turns. When the HTTP API cannot be
+reached the CLI is used as a fallback.
+"""
+
+from __future__ import annotations
+
+import http.client
+import json
+import os
+import subprocess
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+DEFAULT_HOST = "127.0.0.1:11434"
+DEFAULT_KEEP_ALIVE = "30m"
+
+# Errors that mean a pooled connection went stale and the request can be retried.
+_STALE_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.CannotSendRequest,
+    BrokenPipeError,
+    ConnectionResetError,
+)
+
+
+class OllamaError(RuntimeError):
+    """Raised when the Ollama API returns an error response."""
+
+
+class OllamaUnavailable(OllamaError):
+    """Raised when the Ollama HTTP API cannot be reached."""
+
+
+def _parse_host(raw: Optional[str]) -> Tuple[str, int]:
+    """Parse an ``OLLAMA_HOST`` style value into ``(host, port)``."""
+    raw = (raw or "").strip() or DEFAULT_HOST
+    if "://" not in raw:
+        raw = f"http://{raw}"
+    parts = urlsplit(raw)
+    host = parts.hostname or "127.0.0.1"
+    if host in ("0.0.0.0", "::"):
+        host = "127.0.0.1"
+    return host, parts.port or 11434
+
+
+class OllamaClient:
+    """Thread-safe Ollama client backed by a pool of keep-alive connections."""
+
+    def __init__(
+        self,
+        host: Optional[str] = None,
+        keep_alive: Optional[str] = DEFAULT_KEEP_ALIVE,
+        pool_size: int = 4,
+    ) -> None:
+        self.host, self.port = _parse_host(host or os.environ.get("OLLAMA_HOST"))
+        self.keep_alive = keep_alive
+        self.pool_size = max(1, int(pool_size))
+        self._idle: List[http.client.HTTPConnection] = []
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------ #
+    # Connection pool
+    def _acquire(self, timeout: float) -> Tuple[http.client.HTTPConnection, bool]:
+        """Return ``(connection, reused)``; idle connections are reused LIFO."""
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+        if conn is None:
+            return http.client.HTTPConnection(self.host, self.port, timeout=timeout), False
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        return conn, True
+
+    def _release(self, conn: http.client.HTTPConnection, reusable: bool = True) -> None:
+        with self._lock:
+            if reusable and len(self._idle) < self.pool_size:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+    def _open(
+        self, method: str, path: str, payload: Optional[Dict[str, Any]], timeout: float
+    ) -> Tuple[http.client.HTTPConnection, http.client.HTTPResponse]:
+        """Send a request and return the connection with its unread response."""
+        body = json.dumps(payload).encode("utf-8") if payload is not None else None
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        while True:
+            conn, reused = self._acquire(timeout)
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                return conn, conn.getresponse()
+            except _STALE_ERRORS:
+                conn.close()
+                if reused:
+                    # The server dropped an idle connection; retry on a fresh one.
+                    continue
+                raise OllamaUnavailable(f"Ollama closed the connection at {self.host}:{self.port}")
+            except TimeoutError:
+                conn.close()
+                raise
+            except OSError as exc:
+                conn.close()
+                raise OllamaUnavailable(f"Ollama is not reachable at {self.host}:{self.port}: {exc}") from exc
+            except BaseException:
+                conn.close()
+                raise
+
+    def _request_json(
+        self, method: str, path: str, payload: Optional[Dict[str, Any]], timeout: float
+    ) -> Dict[str, Any]:
+        conn, resp = self._open(method, path, payload, timeout)
+        try:
+            raw = resp.read()
+        except BaseException:
+            conn.close()
+            raise
+        self._release(conn, reusable=not resp.will_close)
+        try:
+            data = json.loads(raw.decode("utf-8") or "{}")
+        except ValueError:
+            data = {}
+        if resp.status >= 400:
+            raise OllamaError(data.get("error") or f"HTTP {resp.status} from Ollama")
+        return data
+
+    # ------------------------------------------------------------------ #
+    # API
+    def is_available(self, timeout: float = 1.0) -> bool:
+        try:
+            self._request_json("GET", "/api/version", None, timeout)
+        except (OllamaError, OSError):
+            return False
+        return True
+
+    def _generate_payload(
+        self,
+        model: str,
+        prompt: str,
+        stream: bool,
+        system: Optional[str],
+        keep_alive: Optional[str],
+        options: Optional[Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        payload: Dict[str, Any] = {"model": model, "prompt": prompt, "stream": stream}
+        if system:
+            payload["system"] = system
+        keep_alive = self.keep_alive if keep_alive is None else keep_alive
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+        if options:
+            payload["options"] = options
+        return payload
+
+    def generate(
+        self,
+        model: str,
+        prompt: str,
+        system: Optional[str] = None,
+        timeout: float = 120,
+        keep_alive: Optional[str] = None,
+        options: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """Run a non-streaming completion and return the decoded API response."""
+        payload = self._generate_payload(model, prompt, False, system, keep_alive, options)
+        return self._request_json("POST", "/api/generate", payload, timeout)
+
+    def generate_stream(
+        self,
+        model: str,
+        prompt: str,
+        system: Optional[str] = None,
+        timeout: float = 120,
+        keep_alive: Optional[str] = None,
+        options: Optional[Dict[str, Any]] = None,
+        cancel_event: Optional[threading.Event] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield decoded NDJSON chunks from ``/api/generate`` as they arrive.
+
+        ``timeout`` bounds the wait for each chunk rather than the whole
+        generation. Setting ``cancel_event`` (or closing the generator) drops
+        the connection, which makes Ollama stop generating.
+        """
+        payload = self._generate_payload(model, prompt, True, system, keep_alive, options)
+        conn, resp = self._open("POST", "/api/generate", payload, timeout)
+        finished = False
+        try:
+            if resp.status >= 400:
+                raw = resp.read()
+                finished = True
+                try:
+                    error = json.loads(raw.decode("utf-8") or "{}").get("error")
+                except ValueError:
+                    error = None
+                raise OllamaError(error or f"HTTP {resp.status} from Ollama")
+            while cancel_event is None or not cancel_event.is_set():
+                line = resp.readline()
+                if not line:
+                    finished = True
+                    break
+                line = line.strip()
+                if not line:
+                    continue
+                chunk = json.loads(line.decode("utf-8"))
+                if chunk.get("error"):
+                    raise OllamaError(chunk["error"])
+                yield chunk
+                if chunk.get("done"):
+                    resp.read()
+                    finished = True
+                    break
+        finally:
+            if finished:
+                self._release(conn, reusable=not resp.will_close)
+            else:
+                conn.close()
+
+    def embed(
+        self,
+        model: str,
+        inputs: List[str],
+        timeout: float = 60,
+        keep_alive: Optional[str] = None,
+    ) -> List[List[float]]:
+        """Return one embedding per input string from ``/api/embed``."""
+        payload: Dict[str, Any] = {"model": model, "input": list(inputs)}
+        keep_alive = self.keep_alive if keep_alive is None else keep_alive
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+        data = self._request_json("POST", "/api/embed", payload, timeout)
+        embeddings = data.get("embeddings") or []
+        if len(embeddings) != len(payload["input"]):
+            raise OllamaError(f"Expected {len(payload['input'])} embeddings, got {len(embeddings)}")
+        return embeddings
+
+
+def generate_via_cli(model: str, prompt: str, timeout: float = 120) -> subprocess.CompletedProcess:
+    """Fallback used when the HTTP API is unreachable."""
+    return subprocess.run(
+        ["ollama", "run", model, prompt],
+        capture_output=True,
+        text=True,
+        timeout=timeout,
+        encoding="utf-8",
+        errors="replace",
+    )
+
+
+_DEFAULT_CLIENT: Optional[OllamaClient] = None
+_DEFAULT_LOCK = threading.Lock()
+
+
+def get_client() -> OllamaClient:
+    """Return the process-wide client so callers share one connection pool."""
+    global _DEFAULT_CLIENT
+    with _DEFAULT_LOCK:
+        if _DEFAULT_CLIENT is None:
+            _DEFAULT_CLIENT = OllamaClient()
+        return _DEFAULT_CLIENT
+
+
+__all__ = [
+    "OllamaClient",
+    "OllamaError",
+    "OllamaUnavailable",
+    "generate_via_cli",
+    "get_client",
+]
@@ -5,7 +5,7 @@ from __future__ import annotations
 import os
 import sys
 from pathlib import Path
-from typing import Iterable, List, Sequence, Tuple
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
 
 
 def _clean(path: Path) -> Path:
@@ -110,13 +110,57 @@ def is_under(path: Path, parent: Path) -> bool:
         return False
 
 
-def is_allowed(path: Path, allowed_roots: Iterable[Path], excluded: Iterable[Path]) -> Tuple[bool, str | None]:
-    path = _clean(path)
-    for entry in excluded:
-        if is_under(path, entry):
-            return False, f"Excluded path: {entry}"
-    for root in allowed_roots:
-        if is_under(path, root) or path == root:
+def _path_key(path: str | Path) -> str:
+    """Lexical, case-normalised form of ``path`` used for policy lookups."""
+    return os.path.normcase(os.path.abspath(os.path.expanduser(str(path))))
+
+
+def _ancestors(key: str) -> Iterator[str]:
+    while True:
+        yield key
+        parent = os.path.dirname(key)
+        if parent == key:
+            return
+        key = parent
+
+
+class PathPolicy:
+    """Allowed/excluded roots compiled once for cheap containment checks.
+
+    Roots are resolved when the policy is built. A check walks the candidate's
+    ancestors and looks each one up in a dict, so it costs O(path depth) and
+    touches the filesystem only when ``resolve=True`` is requested.
+    """
+
+    def __init__(self, allowed_roots: Iterable[Path], excluded: Iterable[Path]) -> None:
+        self.allowed_roots = normalise_paths(list(allowed_roots))
+        self.excluded_paths = normalise_paths(list(excluded))
+        self._allowed: Dict[str, Path] = {_path_key(root): root for root in self.allowed_roots}
+        self._excluded: Dict[str, Path] = {_path_key(entry): entry for entry in self.excluded_paths}
+
+    def check(self, path: str | Path, resolve: bool = False) -> Tuple[bool, str | None]:
+        """Return ``(allowed, reason)``; pass ``resolve=True`` for untrusted or symlinked paths."""
+        if resolve:
+            path = _clean(Path(path))
+        inside_root = False
+        for key in _ancestors(_path_key(path)):
+            entry = self._excluded.get(key)
+            if entry is not None:
+                return False, f"Excluded path: {entry}"
+            if key in self._allowed:
+                inside_root = True
+        if inside_root:
             return True, None
-    return False, "Outside allowed roots"
+        return False, "Outside allowed roots"
+
+    def is_allowed(self, path: str | Path, resolve: bool = False) -> bool:
+        return self.check(path, resolve=resolve)[0]
+
+    def is_excluded_entry(self, path: str | Path) -> bool:
+        """True when ``path`` is itself one of the excluded entries."""
+        return _path_key(path) in self._excluded
+
+
+def is_allowed(path: Path, allowed_roots: Iterable[Path], excluded: Iterable[Path]) -> Tuple[bool, str | None]:
+    return PathPolicy(allowed_roots, excluded).check(path, resolve=True)
 
@@ -0,0 +1,92 @@
+"""SQLite connection pool with a single writer and per-thread readers."""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Tuple
+
+
+class SQLitePool:
+    """One shared writer connection plus a read-only connection per thread.
+
+    The database runs in WAL mode, so readers never wait on the writer. Each
+    ``read()`` block is a single read transaction and therefore sees one
+    consistent snapshot, even while a batch is being committed elsewhere.
+    Writers must hold ``write_lock`` (or use ``write()``).
+    """
+
+    def __init__(self, db_path: Path, timeout: float = 5.0) -> None:
+        self.db_path = Path(db_path)
+        self.timeout = timeout
+        self.write_lock = threading.RLock()
+        self.writer = sqlite3.connect(self.db_path, timeout=timeout, check_same_thread=False)
+        self.writer.row_factory = sqlite3.Row
+        self.writer.execute("PRAGMA journal_mode=WAL;")
+        self.writer.execute("PRAGMA synchronous=NORMAL;")
+
+        self._readers: Dict[int, Tuple[threading.Thread, sqlite3.Connection]] = {}
+        self._readers_lock = threading.Lock()
+        self._closed = False
+
+    # ------------------------------------------------------------------ #
+    # Connections
+    def reader(self) -> sqlite3.Connection:
+        """Return the calling thread's read-only connection, opening it on first use."""
+        ident = threading.get_ident()
+        with self._readers_lock:
+            if self._closed:
+                raise sqlite3.ProgrammingError("Connection pool is closed.")
+            entry = self._readers.get(ident)
+            if entry is not None and entry[0].is_alive():
+                return entry[1]
+            self._prune_readers()
+            uri = f"{self.db_path.resolve().as_uri()}?mode=ro"
+            conn = sqlite3.connect(
+                uri,
+                uri=True,
+                timeout=self.timeout,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            conn.row_factory = sqlite3.Row
+            self._readers[ident] = (threading.current_thread(), conn)
+            return conn
+
+    def _prune_readers(self) -> None:
+        """Close connections owned by threads that have exited."""
+        for ident, (thread, conn) in list(self._readers.items()):
+            if not thread.is_alive():
+                conn.close()
+                del self._readers[ident]
+
+    @contextmanager
+    def read(self) -> Iterator[sqlite3.Connection]:
+        """Yield a reader inside one transaction so every query shares a snapshot."""
+        conn = self.reader()
+        conn.execute("BEGIN")
+        try:
+            yield conn
+        finally:
+            conn.execute("COMMIT")
+
+    @contextmanager
+    def write(self) -> Iterator[sqlite3.Connection]:
+        """Yield the writer under ``write_lock``, committing on success."""
+        with self.write_lock:
+            with self.writer:
+                yield self.writer
+
+    def close(self) -> None:
+        with self._readers_lock:
+            self._closed = True
+            for _thread, conn in self._readers.values():
+                conn.close()
+            self._readers.clear()
+        with self.write_lock:
+            self.writer.close()
+
+
+__all__ = ["SQLitePool"]
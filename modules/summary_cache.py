@@ -0,0 +1,206 @@
+"""Content-addressed cache of file summaries.
+
+Summaries are keyed by a BLAKE2b digest of the file's bytes, so touching,
+copying or moving a file reuses the summary generated for identical content
+instead of asking the model again. A per-path ``(size, mtime)`` record lets
+unchanged files skip re-hashing entirely.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from modules.sqlite_pool import SQLitePool
+from modules.telemetry import log_event
+
+HASH_CHUNK_BYTES = 1024 * 1024
+HASH_DIGEST_BYTES = 16
+
+
+def content_hash(path: Path, chunk_size: int = HASH_CHUNK_BYTES) -> str:
+    """Hex BLAKE2b digest of ``path``, read in chunks so large files stay cheap on memory."""
+    digest = hashlib.blake2b(digest_size=HASH_DIGEST_BYTES)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class SummaryCache:
+    """SQLite store mapping content hashes to summaries, shared across components."""
+
+    def __init__(self, db_path: Path) -> None:
+        self.db_path = Path(db_path).expanduser().resolve()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._pool = SQLitePool(self.db_path)
+        self._lock = self._pool.write_lock
+        self._conn = self._pool.writer
+        # hash -> [lock, users]. The lock is held while that content is being
+        # summarised, so concurrent requests for identical bytes wait for it.
+        self._inflight: Dict[str, list] = {}
+        self._inflight_lock = threading.Lock()
+        # Bumped on every write so callers can cache lookups (e.g. search hits).
+        self.revision = 0
+        self._initialise_schema()
+
+    def _initialise_schema(self) -> None:
+        with self._lock:
+            self._conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS summaries (
+                    hash        TEXT PRIMARY KEY,
+                    summary     TEXT NOT NULL,
+                    created_at  TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS file_hashes (
+                    path   TEXT PRIMARY KEY,
+                    size   INTEGER NOT NULL,
+                    mtime  REAL NOT NULL,
+                    hash   TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS file_hashes_hash ON file_hashes(hash);
+                """
+            )
+            self._conn.commit()
+
+    # ------------------------------------------------------------------ #
+    # Hashing
+    def hash_for(self, path: Path, stat: Optional[os.stat_result] = None) -> str:
+        """Content hash of ``path``; unchanged size and mtime reuse the stored digest."""
+        key = str(path)
+        stat = stat or os.stat(path)
+        with self._pool.read() as conn:
+            row = conn.execute(
+                "SELECT size, mtime, hash FROM file_hashes WHERE path = ?", (key,)
+            ).fetchone()
+        if row is not None and row["size"] == stat.st_size and row["mtime"] == stat.st_mtime:
+            return row["hash"]
+
+        digest = content_hash(path)
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO file_hashes(path, size, mtime, hash) VALUES (?, ?, ?, ?)",
+                    (key, stat.st_size, stat.st_mtime, digest),
+                )
+            self.revision += 1
+        return digest
+
+    # ------------------------------------------------------------------ #
+    # Public API
+    def summary_for_hash(self, digest: str) -> Optional[str]:
+        with self._pool.read() as conn:
+            row = conn.execute("SELECT summary FROM summaries WHERE hash = ?", (digest,)).fetchone()
+        return row["summary"] if row else None
+
+    def get(self, path: Path) -> Optional[str]:
+        """Cached summary for the current content of ``path``, if any."""
+        try:
+            return self.summary_for_hash(self.hash_for(Path(path)))
+        except OSError:
+            return None
+
+    def put(self, path: Path, summary: str) -> None:
+        self._store(self.hash_for(Path(path)), summary)
+
+    def _store(self, digest: str, summary: str) -> None:
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO summaries(hash, summary, created_at) VALUES (?, ?, ?)",
+                    (digest, summary, datetime.now().isoformat()),
+                )
+            self.revision += 1
+
+    def get_or_create(self, path: Path, generate: Callable[[str], Optional[str]]) -> Optional[str]:
+        """Return the summary for ``path``, calling ``generate(path)`` only on a miss.
+
+        A falsy result from ``generate`` is returned but not cached, so
+        transient failures are retried next time.
+        """
+        path = Path(path)
+        try:
+            digest = self.hash_for(path)
+        except OSError:
+            return None
+        summary = self.summary_for_hash(digest)
+        if summary is not None:
+            log_event("summary.cache_hit", path=str(path))
+            return summary
+
+        with self._inflight_lock:
+            entry = self._inflight.setdefault(digest, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                # Another thread may have summarised the same bytes while we waited.
+                summary = self.summary_for_hash(digest)
+                if summary is None:
+                    summary = generate(str(path))
+                    if summary:
+                        self._store(digest, summary)
+        finally:
+            with self._inflight_lock:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._inflight[digest]
+        return summary
+
+    def lookup(self, entries: Iterable[Tuple[str, int, float]]) -> Dict[str, str]:
+        """Map paths to cached summaries without reading any file.
+
+        ``entries`` are ``(path, size, mtime)``; a path only matches when its
+        recorded size and mtime are unchanged.
+        """
+        entries = list(entries)
+        if not entries:
+            return {}
+        found: Dict[str, str] = {}
+        with self._pool.read() as conn:
+            for path, size, mtime in entries:
+                row = conn.execute(
+                    """
+                    SELECT summaries.summary
+                    FROM file_hashes
+                    JOIN summaries ON summaries.hash = file_hashes.hash
+                    WHERE file_hashes.path = ? AND file_hashes.size = ? AND file_hashes.mtime = ?
+                    """,
+                    (path, size, mtime),
+                ).fetchone()
+                if row is not None:
+                    found[path] = row["summary"]
+        return found
+
+    def forget_paths(self, paths: Iterable[str]) -> None:
+        """Drop path records; summaries stay, keyed by content, for copies elsewhere."""
+        rows = [(str(path),) for path in paths]
+        if not rows:
+            return
+        with self._lock:
+            with self._conn:
+                self._conn.executemany("DELETE FROM file_hashes WHERE path = ?", rows)
+            self.revision += 1
+
+    def close(self) -> None:
+        self._pool.close()
+
+
+_DEFAULT_CACHE: Optional[SummaryCache] = None
+_DEFAULT_LOCK = threading.Lock()
+
+
+def get_summary_cache() -> SummaryCache:
+    """Return the process-wide cache so every component shares one database."""
+    global _DEFAULT_CACHE
+    with _DEFAULT_LOCK:
+        if _DEFAULT_CACHE is None:
+            _DEFAULT_CACHE = SummaryCache(Path(__file__).parent.parent / "data" / "summary_cache.db")
+        return _DEFAULT_CACHE
+
+
+__all__ = ["SummaryCache", "content_hash", "get_summary_cache"]
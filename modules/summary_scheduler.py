@@ -0,0 +1,218 @@
+"""Prioritised, deduplicating scheduler for background summary jobs."""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from modules.telemetry import log_event
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_RECENT = 1
+PRIORITY_BACKFILL = 2
+
+DEFAULT_DEBOUNCE_SECONDS = 2.0
+
+# Interactive chat turns in flight; summary workers hold off while non-zero.
+_interactive_lock = threading.Lock()
+_interactive_count = 0
+
+
+@contextmanager
+def interactive_session() -> Iterator[None]:
+    """Mark an interactive model call so background summaries yield to it."""
+    global _interactive_count
+    with _interactive_lock:
+        _interactive_count += 1
+    try:
+        yield
+    finally:
+        with _interactive_lock:
+            _interactive_count -= 1
+
+
+def _interactive_busy() -> bool:
+    return _interactive_count > 0
+
+
+def backend_parallelism() -> int:
+    """Requests the local Ollama server runs concurrently (OLLAMA_NUM_PARALLEL, else 1)."""
+    try:
+        return max(1, int(os.environ.get("OLLAMA_NUM_PARALLEL", "1")))
+    except ValueError:
+        return 1
+
+
+class SummaryScheduler:
+    """Run ``handler(key)`` jobs by priority with at most ``max_concurrency`` in flight.
+
+    Each key is queued at most once: resubmitting keeps the better priority and,
+    for non-interactive work, restarts the debounce window so bursts of modify
+    events collapse into one job. A key resubmitted while it runs is deferred
+    until the running job finishes.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[str], None],
+        max_concurrency: Optional[int] = None,
+        debounce: float = DEFAULT_DEBOUNCE_SECONDS,
+        name: str = "summary",
+    ) -> None:
+        self.handler = handler
+        self.max_concurrency = max(1, int(max_concurrency or backend_parallelism()))
+        self.debounce = max(0.0, float(debounce))
+        self.name = name
+
+        self._cond = threading.Condition()
+        self._delayed: List[Tuple[float, int, str]] = []
+        self._ready: List[Tuple[int, int, str]] = []
+        self._queued: Dict[str, Tuple[int, float, int]] = {}
+        self._deferred: Dict[str, Tuple[int, float]] = {}
+        self._running: Set[str] = set()
+        self._counter = itertools.count()
+        self._paused = False
+        self._closed = False
+
+        self._workers = [
+            threading.Thread(target=self._worker, name=f"{name}-worker-{i}", daemon=True)
+            for i in range(self.max_concurrency)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    # ------------------------------------------------------------------ #
+    # Public API
+    def submit(self, key: str, priority: int = PRIORITY_BACKFILL, debounce: Optional[float] = None) -> None:
+        delay = 0.0 if priority == PRIORITY_INTERACTIVE else (self.debounce if debounce is None else debounce)
+        due = time.monotonic() + delay
+        with self._cond:
+            if self._closed:
+                return
+            if key in self._running:
+                previous = self._deferred.get(key)
+                if previous:
+                    priority = min(priority, previous[0])
+                    due = due if priority == PRIORITY_INTERACTIVE else max(due, previous[1])
+                self._deferred[key] = (priority, due)
+                return
+            self._push(key, priority, due)
+            self._cond.notify()
+
+    def cancel(self, key: str) -> None:
+        with self._cond:
+            self._queued.pop(key, None)
+            self._deferred.pop(key, None)
+
+    def pause(self) -> None:
+        with self._cond:
+            self._paused = True
+        log_event("summary.paused", scheduler=self.name)
+
+    def resume(self) -> None:
+        with self._cond:
+            self._paused = False
+            self._cond.notify_all()
+        log_event("summary.resumed", scheduler=self.name)
+
+    @property
+    def paused(self) -> bool:
+        return self._paused
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {
+                "queued": len(self._queued) + len(self._deferred),
+                "running": len(self._running),
+                "max_concurrency": self.max_concurrency,
+                "paused": int(self._paused),
+            }
+
+    def shutdown(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._queued.clear()
+            self._deferred.clear()
+            self._cond.notify_all()
+
+    # ------------------------------------------------------------------ #
+    # Internal helpers
+    def _push(self, key: str, priority: int, due: float) -> None:
+        """Queue or update ``key``; superseded heap entries are skipped lazily."""
+        current = self._queued.get(key)
+        if current is not None:
+            priority = min(priority, current[0])
+            due = min(due, current[1]) if priority == PRIORITY_INTERACTIVE else max(due, current[1])
+        seq = next(self._counter)
+        self._queued[key] = (priority, due, seq)
+        heapq.heappush(self._delayed, (due, seq, key))
+
+    def _is_current(self, key: str, seq: int) -> bool:
+        entry = self._queued.get(key)
+        return entry is not None and entry[2] == seq
+
+    def _next_job(self) -> Optional[str]:
+        """Wait for a runnable job; ``None`` means the scheduler closed.
+
+        Jobs wait in ``_delayed`` (by due time) until their debounce expires,
+        then move to ``_ready`` (by priority).
+        """
+        with self._cond:
+            while True:
+                if self._closed:
+                    return None
+                if self._paused or _interactive_busy():
+                    self._cond.wait(timeout=0.5)
+                    continue
+                now = time.monotonic()
+                while self._delayed and self._delayed[0][0] <= now:
+                    _due, seq, key = heapq.heappop(self._delayed)
+                    if self._is_current(key, seq):
+                        heapq.heappush(self._ready, (self._queued[key][0], seq, key))
+                while self._ready:
+                    _priority, seq, key = heapq.heappop(self._ready)
+                    if self._is_current(key, seq):
+                        del self._queued[key]
+                        self._running.add(key)
+                        return key
+                timeout = max(0.01, self._delayed[0][0] - now) if self._delayed else None
+                self._cond.wait(timeout=timeout)
+
+    def _worker(self) -> None:
+        while True:
+            key = self._next_job()
+            if key is None:
+                return
+            started = time.monotonic()
+            try:
+                self.handler(key)
+            except Exception as exc:
+                log_event("summary.failed", scheduler=self.name, key=key, error=str(exc))
+            finally:
+                with self._cond:
+                    self._running.discard(key)
+                    deferred = self._deferred.pop(key, None)
+                    if deferred is not None and not self._closed:
+                        self._push(key, deferred[0], deferred[1])
+                    self._cond.notify_all()
+            log_event(
+                "summary.completed",
+                scheduler=self.name,
+                key=key,
+                seconds=round(time.monotonic() - started, 3),
+            )
+
+
+__all__ = [
+    "PRIORITY_BACKFILL",
+    "PRIORITY_INTERACTIVE",
+    "PRIORITY_RECENT",
+    "SummaryScheduler",
+    "backend_parallelism",
+    "interactive_session",
+]
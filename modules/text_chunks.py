@@ -0,0 +1,54 @@
+"""Split extracted document text into overlapping passages."""
+
+from __future__ import annotations
+
+from typing import Iterable, Iterator, List, Optional
+
+CHUNK_CHARS = 1200
+CHUNK_OVERLAP = 200
+
+
+def iter_chunks(
+    pieces: Iterable[str],
+    size: int = CHUNK_CHARS,
+    overlap: int = CHUNK_OVERLAP,
+    max_chars: Optional[int] = None,
+) -> Iterator[str]:
+    """Yield ~``size``-character passages from a stream of text pieces.
+
+    ``pieces`` are pages, paragraphs or lines; they are consumed lazily, so
+    only about one passage of text is buffered at a time. Consecutive
+    passages share ``overlap`` characters and break on whitespace.
+    Whitespace is collapsed. At most ``max_chars`` characters of input are read.
+    """
+    size = max(1, int(size))
+    overlap = max(0, min(int(overlap), size // 2 - 1))
+    buffer = ""
+    consumed = 0
+    for piece in pieces:
+        words = " ".join(piece.split())
+        if not words:
+            continue
+        if max_chars is not None:
+            words = words[: max(0, max_chars - consumed)]
+            consumed += len(words)
+        buffer = f"{buffer} {words}" if buffer else words
+        while len(buffer) > size:
+            end = buffer.rfind(" ", size // 2, size)
+            end = end if end > 0 else size
+            yield buffer[:end].strip()
+            start = end - overlap
+            space = buffer.find(" ", start, end)
+            buffer = buffer[space + 1 if space >= 0 else start:]
+        if max_chars is not None and consumed >= max_chars:
+            break
+    buffer = buffer.strip()
+    if buffer:
+        yield buffer
+
+
+def chunk_text(text: str, size: int = CHUNK_CHARS, overlap: int = CHUNK_OVERLAP) -> List[str]:
+    return list(iter_chunks([text or ""], size, overlap))
+
+
+__all__ = ["CHUNK_CHARS", "CHUNK_OVERLAP", "chunk_text", "iter_chunks"]
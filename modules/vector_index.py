@@ -0,0 +1,313 @@
+"""Optional semantic index over knowledge-base text.
+
+The knowledge index's passages (see ``modules.text_chunks``) are embedded
+with a local Ollama embedding model and stored as int8-quantised unit vectors (one scale
+per row) in SQLite. Search is a NumPy brute-force dot product over the
+in-memory matrix, which stays fast into the hundreds of thousands of
+chunks. Everything here is skipped when NumPy is not installed.
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+from modules.ollama_client import OllamaError, get_client
+from modules.sqlite_pool import SQLitePool
+from modules.telemetry import log_event
+
+DEFAULT_EMBEDDING_MODEL = "nomic-embed-text"
+EMBED_BATCH = 16
+# After the embedding backend fails, semantic search stays off this long.
+FAILURE_COOLDOWN_SECONDS = 300.0
+# Rows converted to float32 at a time while scoring, to bound temporary memory.
+SEARCH_BLOCK_ROWS = 8192
+# While files are being embedded, the search matrix is reloaded at most this often.
+MATRIX_RELOAD_SECONDS = 5.0
+
+Embedder = Callable[[List[str]], List[List[float]]]
+# path -> (passages, mtime, size) as currently indexed, or None if it is not.
+PassageSource = Callable[[str], Optional[Tuple[List[str], float, int]]]
+
+
+def vectors_available() -> bool:
+    return np is not None
+
+
+def ollama_embedder(model: str = DEFAULT_EMBEDDING_MODEL, timeout: float = 60) -> Embedder:
+    client = get_client()
+    return lambda texts: client.embed(model, texts, timeout=timeout)
+
+
+def _quantise(vectors: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray"]:
+    """Normalise rows and store them as int8 with one float32 scale per row."""
+    vectors = vectors.astype(np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors = vectors / np.maximum(norms, 1e-12)
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales = np.maximum(scales, 1e-12).astype(np.float32)
+    return np.round(vectors / scales[:, None]).astype(np.int8), scales
+
+
+class VectorIndex:
+    """Chunk embeddings for indexed files, searchable by cosine similarity.
+
+    ``enqueue`` hands a file to a background thread that reads its passages
+    from ``passage_source`` and embeds them, so indexing never waits on the
+    embedding model and queued work holds only paths. Deletes and renames
+    apply immediately.
+    """
+
+    def __init__(
+        self,
+        db_path: Path,
+        model: str = DEFAULT_EMBEDDING_MODEL,
+        embedder: Optional[Embedder] = None,
+        passage_source: Optional[PassageSource] = None,
+    ) -> None:
+        if np is None:
+            raise RuntimeError("Semantic search requires NumPy.")
+        self.db_path = Path(db_path).expanduser().resolve()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.model = model
+        self.embedder = embedder or ollama_embedder(model)
+        # Set by the knowledge indexer that owns the passages (see DataIndexer).
+        self.passage_source = passage_source
+        self._pool = SQLitePool(self.db_path)
+        self._lock = self._pool.write_lock
+        self._conn = self._pool.writer
+
+        # In-memory copy of the chunks table, rebuilt lazily after changes.
+        self._matrix_lock = threading.Lock()
+        self._matrix: Optional["np.ndarray"] = None
+        self._scales: Optional["np.ndarray"] = None
+        self._rows: List[Tuple[int, str]] = []  # (chunks.id, path) per matrix row
+        self._stale = True
+        self._loaded_at = 0.0
+
+        self._disabled_until = 0.0
+        self._queue: "queue.Queue" = queue.Queue()
+        self._closed = False
+        self._initialise_schema()
+        self._worker = threading.Thread(target=self._run, name="vector-index", daemon=True)
+        self._worker.start()
+
+    def _initialise_schema(self) -> None:
+        with self._lock:
+            self._conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS chunks (
+                    id      INTEGER PRIMARY KEY,
+                    path    TEXT NOT NULL,
+                    chunk   INTEGER NOT NULL,
+                    text    TEXT NOT NULL,
+                    vector  BLOB NOT NULL,
+                    scale   REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS chunks_path ON chunks(path);
+                CREATE TABLE IF NOT EXISTS files (
+                    path   TEXT PRIMARY KEY,
+                    mtime  REAL,
+                    size   INTEGER
+                );
+                CREATE TABLE IF NOT EXISTS metadata (
+                    key    TEXT PRIMARY KEY,
+                    value  TEXT
+                );
+                """
+            )
+            row = self._conn.execute("SELECT value FROM metadata WHERE key = 'model'").fetchone()
+            if row is not None and row["value"] != self.model:
+                # Vectors from another model are not comparable; start over.
+                self._conn.execute("DELETE FROM chunks")
+                self._conn.execute("DELETE FROM files")
+            self._conn.execute(
+                "INSERT OR REPLACE INTO metadata(key, value) VALUES ('model', ?)", (self.model,)
+            )
+            self._conn.commit()
+
+    # ------------------------------------------------------------------ #
+    # Updates
+    def enqueue(self, path: str, mtime: float, size: int) -> None:
+        """Schedule the ``(mtime, size)`` version of ``path`` for (re-)embedding."""
+        if not self._closed:
+            self._queue.put((str(path), mtime, size))
+
+    def indexed_files(self) -> Dict[str, Tuple[float, int]]:
+        """``path -> (mtime, size)`` for every file that has vectors."""
+        with self._pool.read() as conn:
+            rows = conn.execute("SELECT path, mtime, size FROM files").fetchall()
+        return {row["path"]: (row["mtime"], row["size"]) for row in rows}
+
+    def remove_paths(self, paths: Iterable[str]) -> None:
+        rows = [(str(path),) for path in paths]
+        if not rows:
+            return
+        with self._lock:
+            with self._conn:
+                self._conn.executemany("DELETE FROM chunks WHERE path = ?", rows)
+                self._conn.executemany("DELETE FROM files WHERE path = ?", rows)
+        self._stale = True
+
+    def rename(self, src: str, dst: str) -> None:
+        with self._lock:
+            with self._conn:
+                self._conn.execute("DELETE FROM chunks WHERE path = ?", (str(dst),))
+                self._conn.execute("DELETE FROM files WHERE path = ?", (str(dst),))
+                self._conn.execute("UPDATE chunks SET path = ? WHERE path = ?", (str(dst), str(src)))
+                self._conn.execute("UPDATE files SET path = ? WHERE path = ?", (str(dst), str(src)))
+        self._stale = True
+
+    def _embed(self, texts: List[str]) -> "np.ndarray":
+        vectors: List[List[float]] = []
+        for start in range(0, len(texts), EMBED_BATCH):
+            vectors.extend(self.embedder(texts[start:start + EMBED_BATCH]))
+        return np.asarray(vectors, dtype=np.float32)
+
+    def _store(self, path: str, chunks: List[str], mtime: float, size: int) -> None:
+        rows = []
+        if chunks:
+            quantised, scales = _quantise(self._embed(chunks))
+            rows = [
+                (path, idx, chunk, quantised[idx].tobytes(), float(scales[idx]))
+                for idx, chunk in enumerate(chunks)
+            ]
+        with self._lock:
+            with self._conn:
+                self._conn.execute("DELETE FROM chunks WHERE path = ?", (path,))
+                self._conn.executemany(
+                    "INSERT INTO chunks(path, chunk, text, vector, scale) VALUES (?, ?, ?, ?, ?)",
+                    rows,
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO files(path, mtime, size) VALUES (?, ?, ?)",
+                    (path, mtime, size),
+                )
+        self._stale = True
+
+    def _embed_file(self, path: str, mtime: float, size: int) -> None:
+        if self.passage_source is None:
+            return
+        current = self.passage_source(path)
+        if current is None or tuple(current[1:]) != (mtime, size):
+            # Removed, or changed again since it was queued; a newer enqueue covers it.
+            return
+        self._store(path, current[0], mtime, size)
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            wait = self._disabled_until - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            # Files that fail are not recorded in files, so the next sync retries them.
+            try:
+                self._embed_file(*item)
+            except (OllamaError, OSError, ValueError) as exc:
+                self._disabled_until = time.monotonic() + FAILURE_COOLDOWN_SECONDS
+                log_event("vectors.embed_failed", path=item[0], error=str(exc))
+            except Exception as exc:
+                log_event("vectors.worker_error", path=item[0], error=f"{type(exc).__name__}: {exc}")
+
+    # ------------------------------------------------------------------ #
+    # Search
+    def _load_matrix(self) -> None:
+        with self._pool.read() as conn:
+            rows = conn.execute("SELECT id, path, vector, scale FROM chunks ORDER BY id").fetchall()
+        if rows:
+            matrix = np.frombuffer(b"".join(row["vector"] for row in rows), dtype=np.int8)
+            matrix = matrix.reshape(len(rows), -1)
+            scales = np.fromiter((row["scale"] for row in rows), dtype=np.float32, count=len(rows))
+        else:
+            matrix, scales = None, None
+        self._matrix, self._scales = matrix, scales
+        self._rows = [(row["id"], row["path"]) for row in rows]
+
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, object]]:
+        """Return the best chunk per file as ``{"path", "score", "text"}``, best first."""
+        query = (query or "").strip()
+        if not query or time.monotonic() < self._disabled_until:
+            return []
+        try:
+            vector = self._embed([query])[0]
+        except (OllamaError, OSError, ValueError) as exc:
+            self._disabled_until = time.monotonic() + FAILURE_COOLDOWN_SECONDS
+            log_event("vectors.embed_failed", path=None, error=str(exc))
+            return []
+        vector = vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+        with self._matrix_lock:
+            now = time.monotonic()
+            if self._stale and (self._matrix is None or now - self._loaded_at >= MATRIX_RELOAD_SECONDS):
+                self._stale = False
+                self._loaded_at = now
+                self._load_matrix()
+            matrix, scales, rows = self._matrix, self._scales, self._rows
+        if matrix is None or matrix.shape[1] != vector.shape[0]:
+            return []
+
+        scores = np.empty(len(rows), dtype=np.float32)
+        for start in range(0, len(rows), SEARCH_BLOCK_ROWS):
+            block = matrix[start:start + SEARCH_BLOCK_ROWS]
+            scores[start:start + len(block)] = block.astype(np.float32) @ vector
+        scores *= scales
+        take = min(len(scores), max(1, int(limit)) * 4)
+        top = np.argpartition(-scores, take - 1)[:take]
+        best: Dict[str, Tuple[int, float]] = {}
+        for idx in top[np.argsort(-scores[top])]:
+            chunk_id, path = rows[idx]
+            if path not in best:
+                best[path] = (chunk_id, float(scores[idx]))
+                if len(best) >= limit:
+                    break
+        if not best:
+            return []
+
+        # Passage text is only read for the hits, not kept alongside the matrix.
+        ids = [chunk_id for chunk_id, _score in best.values()]
+        with self._pool.read() as conn:
+            texts = {
+                row["id"]: row["text"]
+                for row in conn.execute(
+                    f"SELECT id, text FROM chunks WHERE id IN ({','.join('?' * len(ids))})", ids
+                )
+            }
+        return [
+            {"path": path, "score": score, "text": texts[chunk_id]}
+            for path, (chunk_id, score) in best.items()
+            # Rows replaced since the matrix was loaded drop out.
+            if chunk_id in texts
+        ]
+
+    def close(self) -> None:
+        self._closed = True
+        self._queue.put(None)
+        self._worker.join(timeout=1)
+        self._pool.close()
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """Fuse ranked key lists; keys ranked well by several lists come first."""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking):
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores.items(), key=lambda item: -item[1])
+
+
+__all__ = [
+    "DEFAULT_EMBEDDING_MODEL",
+    "VectorIndex",
+    "reciprocal_rank_fusion",
+    "vectors_available",
+]
@@ -0,0 +1,17 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# The app is run from the repository root rather than installed.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import modules.telemetry as telemetry
+
+
+@pytest.fixture(autouse=True)
+def activity_log(tmp_path, monkeypatch):
+    """Keep telemetry out of the repository's data/ directory."""
+    path = tmp_path / "activity.log"
+    monkeypatch.setattr(telemetry, "_LOG_PATH", path)
+    return path
@@ -0,0 +1,87 @@
+"""Knowledge index search and its result cache."""
+
+import pytest
+
+from modules.data_indexer import ALLOWED_EXTENSIONS, DataIndexer
+from modules.extractors import REGISTRY
+from modules.summary_cache import SummaryCache
+
+
+@pytest.fixture
+def docs(tmp_path):
+    root = tmp_path / "docs"
+    root.mkdir()
+    (root / "notes.txt").write_text("quarterly budget review for the garden project", encoding="utf-8")
+    (root / "other.md").write_text("unrelated shopping list", encoding="utf-8")
+    (root / "feed.xml").write_text("<feed><title>orchard harvest</title></feed>", encoding="utf-8")
+    return root
+
+
+@pytest.fixture
+def summaries(tmp_path):
+    cache = SummaryCache(tmp_path / "summary_cache.db")
+    yield cache
+    cache.close()
+
+
+@pytest.fixture
+def indexer(tmp_path, docs, summaries):
+    ix = DataIndexer(
+        base_path=docs,
+        db_path=tmp_path / "knowledge_index.db",
+        allowed_roots=[str(docs)],
+        # The defaults exclude /tmp, where tmp_path lives.
+        excluded_paths=[str(tmp_path / "excluded")],
+        extraction_workers=0,
+        summary_cache=summaries,
+    )
+    ix.rebuild_index()
+    yield ix
+    ix.close()
+
+
+@pytest.fixture
+def attach_calls(indexer, monkeypatch):
+    calls = []
+    original = indexer._attach_summaries
+
+    def counting(hits):
+        calls.append(len(hits))
+        return original(hits)
+
+    monkeypatch.setattr(indexer, "_attach_summaries", counting)
+    return calls
+
+
+def test_repeated_search_is_served_from_cache(indexer, attach_calls):
+    first = indexer.search("budget")
+    second = indexer.search("budget")
+    assert [hit["path"] for hit in first] == [hit["path"] for hit in second]
+    assert first[0]["path"].endswith("notes.txt")
+    assert len(attach_calls) == 1
+    assert indexer.cache_stats()["hits"] == 1
+
+
+def test_cached_hits_are_copies(indexer):
+    indexer.search("budget")[0]["name"] = "changed"
+    assert indexer.search("budget")[0]["name"] == "notes.txt"
+
+
+def test_new_summary_invalidates_cached_hits(indexer, docs, summaries, attach_calls):
+    assert "summary" not in indexer.search("budget")[0]
+    summaries.put(docs / "notes.txt", "Budget notes")
+    hits = indexer.search("budget")
+    assert hits[0]["summary"] == "Budget notes"
+    assert len(attach_calls) == 2
+    indexer.search("budget")
+    assert len(attach_calls) == 2
+
+
+def test_indexable_extensions_come_from_the_extractor_registry(indexer):
+    assert ALLOWED_EXTENSIONS == REGISTRY.extensions()
+    assert indexer.allowed_extensions == REGISTRY.extensions()
+
+
+def test_every_registered_text_format_is_indexed(indexer):
+    hits = indexer.search("orchard")
+    assert [hit["name"] for hit in hits] == ["feed.xml"]
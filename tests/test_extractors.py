@@ -0,0 +1,55 @@
+"""Streaming text extraction."""
+
+from modules.extractors import iter_text_blocks, read_text, take_text
+
+
+def test_blocks_rejoin_to_the_file_text(tmp_path):
+    text = "".join(f"línea {i} — ünïcödé 東京\n" for i in range(500))
+    path = tmp_path / "log.txt"
+    path.write_text(text, encoding="utf-8")
+    blocks = list(iter_text_blocks(path, block_bytes=256))
+    assert "".join(blocks) == text
+    assert len(blocks) > 10
+    assert all(block.endswith("\n") for block in blocks)
+
+
+def test_long_lines_are_split_on_spaces_or_anywhere(tmp_path):
+    text = "word " * 400 + "x" * 3000
+    path = tmp_path / "wide.txt"
+    path.write_text(text, encoding="utf-8")
+    blocks = list(iter_text_blocks(path, block_bytes=128))
+    assert "".join(blocks) == text
+    assert max(len(block) for block in blocks) <= 2 * 128
+
+
+def test_empty_file_yields_nothing(tmp_path):
+    path = tmp_path / "empty.log"
+    path.write_bytes(b"")
+    assert list(iter_text_blocks(path)) == []
+
+
+def test_file_truncated_while_reading_ends_the_stream(tmp_path):
+    # A mapped file would raise SIGBUS here and kill the test process.
+    path = tmp_path / "rotating.log"
+    path.write_text("entry\n" * 50_000, encoding="utf-8")
+    blocks = iter_text_blocks(path, block_bytes=4096)
+    first = next(blocks)
+    with open(path, "r+b") as f:
+        f.truncate(0)
+    rest = list(blocks)
+    assert first.startswith("entry\n")
+    assert len(first) + sum(map(len, rest)) < 50_000 * 6
+
+
+def test_read_text_stops_at_the_budget(tmp_path):
+    path = tmp_path / "big.txt"
+    path.write_text("abc def\n" * 10_000, encoding="utf-8")
+    text, truncated = read_text(path, 100)
+    assert truncated
+    assert text == ("abc def\n" * 13)[:100]
+
+
+def test_take_text_reports_truncation():
+    assert take_text(iter(["ab", "cd"]), 10) == ("abcd", False)
+    assert take_text(iter(["ab", "cd"]), 4) == ("abcd", False)
+    assert take_text(iter(["ab", "cd"]), 3) == ("abc", True)
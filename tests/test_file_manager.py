@@ -0,0 +1,66 @@
+"""FileManager watcher updates and the shared summary cache."""
+
+import os
+
+import pytest
+
+import modules.summary_cache as summary_cache
+from modules.file_manager import FileManager
+from modules.summary_cache import SummaryCache
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    shared = SummaryCache(tmp_path / "summary_cache.db")
+    monkeypatch.setattr(summary_cache, "_DEFAULT_CACHE", shared)
+    yield shared
+    shared.close()
+
+
+@pytest.fixture
+def docs(tmp_path):
+    root = tmp_path / "docs"
+    root.mkdir()
+    return root
+
+
+@pytest.fixture
+def manager(tmp_path, docs, cache):
+    fm = FileManager(include_paths=[str(docs)], index_path=tmp_path / "file_index.json")
+    # No model calls from these tests.
+    fm.pause_summaries()
+    yield fm
+    fm.close()
+
+
+def _record(path):
+    stat = os.stat(path)
+    return (str(path), stat.st_size, stat.st_mtime)
+
+
+def test_deleted_file_is_forgotten_by_summary_cache(manager, cache, docs):
+    path = docs / "notes.txt"
+    path.write_text("budget notes", encoding="utf-8")
+    cache.put(path, "Budget notes")
+    manager.apply_changes(upserts=[str(path)])
+    record = _record(path)
+    assert cache.lookup([record]) == {str(path): "Budget notes"}
+
+    path.unlink()
+    assert manager.apply_changes(deletes=[str(path)]) == {"changed": 0, "removed": 1}
+    assert cache.lookup([record]) == {}
+
+
+def test_moved_file_forgets_its_old_path(manager, cache, docs):
+    old, new = docs / "draft.txt", docs / "final.txt"
+    old.write_text("chapter one", encoding="utf-8")
+    cache.put(old, "Chapter one")
+    manager.apply_changes(upserts=[str(old)])
+    old_record = _record(old)
+
+    old.rename(new)
+    manager.apply_changes(moves=[(str(old), str(new))])
+    assert cache.lookup([old_record]) == {}
+    # The summary is keyed by content, so the new path still finds it.
+    assert cache.get(new) == "Chapter one"
+    assert manager.snapshot_entries()[0]["path"] == str(new)
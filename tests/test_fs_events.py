@@ -0,0 +1,121 @@
+"""FSEventPipeline coalescing and the app-output filter used by the watcher."""
+
+import threading
+
+import pytest
+
+from modules.fs_events import FSEventPipeline, app_output_filter
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    # Stands in for the app's data/ directory, which is also the default index root.
+    path = tmp_path / "data"
+    path.mkdir()
+    return path
+
+
+@pytest.fixture
+def batches():
+    return []
+
+
+@pytest.fixture
+def pipeline(data_dir, batches):
+    # Long debounce: batches are only delivered by flush(), on this thread.
+    pipe = FSEventPipeline(batches.append, debounce=60, max_delay=60, ignore=app_output_filter(data_dir))
+    yield pipe
+    pipe.close()
+
+
+def test_file_created_under_default_root_reaches_on_batch(data_dir, batches, pipeline):
+    note = str(data_dir / "notes.txt")
+    pipeline.created(note)
+    pipeline.flush()
+    assert len(batches) == 1
+    assert batches[0].upserts == [note]
+
+
+def test_app_output_is_ignored(data_dir, batches, pipeline):
+    for name in ("activity.log", "knowledge_index.db", "knowledge_index.db-wal",
+                 "summary_cache.db-shm", "memory_store.db-journal"):
+        pipeline.modified(str(data_dir / name))
+    pipeline.deleted(str(data_dir / "summary_cache.db"))
+    pipeline.flush()
+    assert batches == []
+
+
+def test_same_names_elsewhere_are_watched(data_dir, batches, pipeline):
+    nested = data_dir / "project"
+    paths = [str(nested / "activity.log"), str(data_dir.parent / "notes.db")]
+    for path in paths:
+        pipeline.created(path)
+    pipeline.flush()
+    assert sorted(batches[0].upserts) == sorted(paths)
+
+
+def test_rename_across_ignored_boundary_keeps_watched_side(data_dir, batches, pipeline):
+    log = str(data_dir / "activity.log")
+    kept = str(data_dir / "activity-old.txt")
+    gone = str(data_dir / "draft.txt")
+    pipeline.moved(log, kept)
+    pipeline.moved(gone, str(data_dir / "scratch.db"))
+    pipeline.flush()
+    assert batches[0].upserts == [kept]
+    assert batches[0].deletes == [gone]
+    assert batches[0].moves == []
+
+
+def test_batches_are_delivered_after_debounce(data_dir):
+    delivered = threading.Event()
+    seen = []
+
+    def on_batch(batch):
+        seen.append(batch)
+        delivered.set()
+
+    pipe = FSEventPipeline(on_batch, debounce=0.05, max_delay=1, ignore=app_output_filter(data_dir))
+    try:
+        pipe.created(str(data_dir / "activity.log"))
+        pipe.created(str(data_dir / "report.md"))
+        assert delivered.wait(5)
+    finally:
+        pipe.close()
+    assert seen[0].upserts == [str(data_dir / "report.md")]
+
+
+def test_create_then_delete_cancels_out(data_dir, batches, pipeline):
+    temp = str(data_dir / "~lock.docx")
+    pipeline.created(temp)
+    pipeline.modified(temp)
+    pipeline.deleted(temp)
+    pipeline.flush()
+    assert batches == []
+    assert pipeline.pending() == 0
+
+
+def test_modify_then_delete_is_a_delete(data_dir, batches, pipeline):
+    existing = str(data_dir / "report.md")
+    pipeline.modified(existing)
+    pipeline.deleted(existing)
+    pipeline.flush()
+    assert batches[0].deletes == [existing]
+
+
+def test_delete_then_recreate_is_an_update(data_dir, batches, pipeline):
+    # Editors that save by replacing the file must not lose its index row.
+    existing = str(data_dir / "report.md")
+    pipeline.deleted(existing)
+    pipeline.created(existing)
+    pipeline.deleted(existing)
+    pipeline.flush()
+    assert batches[0].deletes == [existing]
+
+
+def test_created_then_renamed_is_only_the_new_path(data_dir, batches, pipeline):
+    temp, final = str(data_dir / "download.part"), str(data_dir / "download.pdf")
+    pipeline.created(temp)
+    pipeline.moved(temp, final)
+    pipeline.flush()
+    assert batches[0].upserts == [final]
+    assert batches[0].deletes == []
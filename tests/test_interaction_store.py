@@ -0,0 +1,42 @@
+"""Relevance lookups over the interaction log."""
+
+import pytest
+
+from modules.interaction_store import InteractionStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return InteractionStore(tmp_path / "interactions.db")
+
+
+def _add(store, n, prompt):
+    store.append({"id": str(n), "timestamp": f"2026-01-01T00:00:{n:02d}", "prompt": prompt, "response": "ok"})
+
+
+def test_short_prompts_below_min_overlap_match_nothing(store):
+    _add(store, 1, "python sqlite indexing tips")
+    assert store.relevant("python") == []
+    assert [row["id"] for row in store.relevant("python sqlite")] == ["1"]
+    assert [row["id"] for row in store.relevant("python", min_overlap=1)] == ["1"]
+
+
+def test_rows_meeting_overlap_are_found_beyond_the_top_ranked(store):
+    # Short single-term prompts outrank the long ones that share both terms.
+    filler = " ".join(f"word{i:02d}" for i in range(40))
+    n = 0
+    for token in ("alpha", "beta"):
+        for _ in range(20):
+            n += 1
+            _add(store, n, token)
+    for _ in range(2):
+        n += 1
+        _add(store, n, f"alpha beta {filler}")
+    found = store.relevant("alpha beta", limit=2)
+    assert [row["id"] for row in found] == [str(n - 1), str(n)]
+
+
+def test_results_are_oldest_first(store):
+    _add(store, 1, "deploy the staging server")
+    _add(store, 2, "restart the staging server")
+    assert [row["id"] for row in store.relevant("staging server", limit=5)] == ["1", "2"]
@@ -0,0 +1,59 @@
+"""Memory search and the memory context sent with each chat turn."""
+
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from modules.ai_handler import AIHandler
+from modules.memory_store import BASE_POLICY_KEY, MemoryStore
+
+BASE_POLICY = (
+    "You are Nous AI, a friendly, capable assistant running locally for the user.\n"
+    "Use the richest trustworthy context first: prior conversation, saved memory, "
+    "indexed local files. Answer the user's question directly and cite sources."
+)
+
+PROMPTS = [
+    "What is my favorite color?",
+    "Help me answer this question about local files",
+    "user",
+]
+
+
+@pytest.fixture
+def store(tmp_path):
+    policy = tmp_path / "base_memory.txt"
+    policy.write_text(BASE_POLICY, encoding="utf-8")
+    memories = MemoryStore(tmp_path / "memory_store.db")
+    memories.seed_from_file(policy)
+    memories.save_memory("favorite_color", "The user's favorite color is teal")
+    yield memories
+    memories.close()
+
+
+def test_base_policy_is_seeded_and_searchable(store):
+    assert store.get_memory(BASE_POLICY_KEY) == BASE_POLICY
+    assert BASE_POLICY_KEY in [item["key"] for item in store.search_memory("assistant")]
+
+
+@pytest.mark.parametrize("prompt", PROMPTS)
+def test_search_can_exclude_base_policy(store, prompt):
+    keys = [item["key"] for item in store.search_memory(prompt, exclude=(BASE_POLICY_KEY,))]
+    assert BASE_POLICY_KEY not in keys
+
+
+def test_excluded_keys_do_not_use_up_the_limit(store):
+    results = store.search_memory("user", limit=1, exclude=(BASE_POLICY_KEY,))
+    assert [item["key"] for item in results] == ["favorite_color"]
+
+
+@pytest.mark.parametrize("prompt", PROMPTS)
+def test_memory_context_leaves_out_base_policy(store, prompt):
+    handler = object.__new__(AIHandler)
+    handler.app_core = SimpleNamespace(memory_store=store, is_memory_enabled=lambda: True)
+    context = handler._build_memory_context(prompt)
+    assert BASE_POLICY_KEY not in context
+    assert "Nous AI" not in context
+    if "color" in prompt:
+        assert "favorite_color: The user's favorite color is teal" in context
@@ -0,0 +1,240 @@
+"""OllamaClient against a local stand-in for the Ollama HTTP API."""
+
+import json
+import os
+import socket
+import stat
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import modules.ai_provider as ai_provider
+from modules.ollama_client import OllamaClient, OllamaError, OllamaUnavailable, generate_via_cli
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self._dispatch(None)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        self._dispatch(json.loads(self.rfile.read(length) or b"{}"))
+
+    def _dispatch(self, payload):
+        server = self.server
+        server.requests.append((self.path, payload, self.client_address[1]))
+        status, body = server.routes[self.path](payload)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        # Drop the socket without announcing it, as an idle timeout would.
+        self.close_connection = server.drop_after_response
+
+
+class StandIn:
+    def __init__(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self.server.daemon_threads = True
+        self.server.routes = {}
+        self.server.requests = []
+        self.server.drop_after_response = False
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    @property
+    def host(self):
+        return "127.0.0.1:%d" % self.server.server_address[1]
+
+    @property
+    def requests(self):
+        return self.server.requests
+
+    def route(self, path, status=200, body=None, lines=None):
+        if lines is not None:
+            raw = b"".join(json.dumps(line).encode("utf-8") + b"\n" for line in lines)
+        else:
+            raw = json.dumps(body if body is not None else {}).encode("utf-8")
+        self.server.routes[path] = lambda payload: (status, raw)
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stand_in():
+    server = StandIn()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def closed_host():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    return "127.0.0.1:%d" % port
+
+
+def test_reuses_connection_across_calls(stand_in):
+    stand_in.route("/api/generate", body={"response": "hi", "done": True})
+    client = OllamaClient(stand_in.host)
+    try:
+        for _ in range(3):
+            assert client.generate("m", "p")["response"] == "hi"
+    finally:
+        client.close()
+    ports = {port for _path, _payload, port in stand_in.requests}
+    assert len(stand_in.requests) == 3
+    assert len(ports) == 1
+
+
+def test_sends_keep_alive_and_options(stand_in):
+    stand_in.route("/api/generate", body={"response": "", "done": True})
+    client = OllamaClient(stand_in.host, keep_alive="5m")
+    try:
+        client.generate("m", "p", system="s", options={"temperature": 0})
+    finally:
+        client.close()
+    _path, payload, _port = stand_in.requests[0]
+    assert payload == {
+        "model": "m",
+        "prompt": "p",
+        "stream": False,
+        "system": "s",
+        "keep_alive": "5m",
+        "options": {"temperature": 0},
+    }
+
+
+def test_retries_when_idle_connection_was_dropped(stand_in):
+    stand_in.route("/api/generate", body={"response": "ok", "done": True})
+    stand_in.server.drop_after_response = True
+    client = OllamaClient(stand_in.host)
+    try:
+        assert client.generate("m", "first")["response"] == "ok"
+        # The pooled socket is now closed on the server side.
+        time.sleep(0.1)
+        assert client.generate("m", "second")["response"] == "ok"
+    finally:
+        client.close()
+    assert [payload["prompt"] for _path, payload, _port in stand_in.requests] == ["first", "second"]
+    assert len({port for _path, _payload, port in stand_in.requests}) == 2
+
+
+def test_streams_ndjson_chunks_in_order(stand_in):
+    stand_in.route(
+        "/api/generate",
+        lines=[{"response": "Hel"}, {"response": "lo"}, {"response": "", "done": True}],
+    )
+    client = OllamaClient(stand_in.host)
+    try:
+        chunks = list(client.generate_stream("m", "p"))
+        assert [chunk["response"] for chunk in chunks] == ["Hel", "lo", ""]
+        assert chunks[-1]["done"] is True
+        assert stand_in.requests[0][1]["stream"] is True
+        # A fully read stream hands its connection back to the pool.
+        list(client.generate_stream("m", "p"))
+    finally:
+        client.close()
+    assert len({port for _path, _payload, port in stand_in.requests}) == 1
+
+
+def test_stream_error_chunk_raises(stand_in):
+    stand_in.route("/api/generate", lines=[{"response": "a"}, {"error": "model crashed"}])
+    client = OllamaClient(stand_in.host)
+    try:
+        stream = client.generate_stream("m", "p")
+        assert next(stream)["response"] == "a"
+        with pytest.raises(OllamaError, match="model crashed"):
+            next(stream)
+    finally:
+        client.close()
+
+
+def test_error_payload_maps_to_ollama_error(stand_in):
+    stand_in.route("/api/generate", status=404, body={"error": "model 'm' not found"})
+    client = OllamaClient(stand_in.host)
+    try:
+        with pytest.raises(OllamaError, match="model 'm' not found") as excinfo:
+            client.generate("m", "p")
+        assert not isinstance(excinfo.value, OllamaUnavailable)
+        with pytest.raises(OllamaError, match="model 'm' not found"):
+            list(client.generate_stream("m", "p"))
+    finally:
+        client.close()
+
+
+def test_error_without_payload_reports_status(stand_in):
+    stand_in.route("/api/generate", status=500, body={})
+    client = OllamaClient(stand_in.host)
+    try:
+        with pytest.raises(OllamaError, match="HTTP 500"):
+            client.generate("m", "p")
+    finally:
+        client.close()
+
+
+def test_embed_returns_one_vector_per_input(stand_in):
+    stand_in.route("/api/embed", body={"embeddings": [[0.1, 0.2], [0.3, 0.4]]})
+    client = OllamaClient(stand_in.host)
+    try:
+        assert client.embed("e", ["a", "b"]) == [[0.1, 0.2], [0.3, 0.4]]
+        stand_in.route("/api/embed", body={"embeddings": [[0.1, 0.2]]})
+        with pytest.raises(OllamaError, match="Expected 2 embeddings"):
+            client.embed("e", ["a", "b"])
+    finally:
+        client.close()
+
+
+def test_unreachable_server_raises_unavailable(closed_host):
+    client = OllamaClient(closed_host)
+    assert client.is_available(timeout=0.5) is False
+    with pytest.raises(OllamaUnavailable):
+        client.generate("m", "p", timeout=0.5)
+
+
+@pytest.fixture
+def fake_cli(tmp_path, monkeypatch):
+    if os.name == "nt":
+        pytest.skip("fake CLI is a shell script")
+    script = tmp_path / "ollama"
+    script.write_text('#!/bin/sh\necho "cli:$2:$3"\n')
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", str(tmp_path) + os.pathsep + os.environ.get("PATH", ""))
+    return script
+
+
+def test_generate_via_cli_runs_ollama(fake_cli):
+    proc = generate_via_cli("m", "hello", timeout=10)
+    assert proc.returncode == 0
+    assert proc.stdout.strip() == "cli:m:hello"
+
+
+def test_provider_falls_back_to_cli_when_api_unreachable(fake_cli, closed_host, monkeypatch):
+    client = OllamaClient(closed_host)
+    monkeypatch.setattr(ai_provider, "get_client", lambda: client)
+    provider = ai_provider.OllamaProvider()
+    result = provider.query("hello", model="m", timeout=10)
+    assert result == {"success": True, "response": "cli:m:hello", "error": None}
+    assert list(provider.stream("hello", model="m", timeout=10)) == ["cli:m:hello"]
+
+
+def test_provider_does_not_fall_back_on_api_errors(stand_in, fake_cli, monkeypatch):
+    stand_in.route("/api/generate", status=404, body={"error": "model 'm' not found"})
+    client = OllamaClient(stand_in.host)
+    monkeypatch.setattr(ai_provider, "get_client", lambda: client)
+    try:
+        result = ai_provider.OllamaProvider().query("hello", model="m", timeout=10)
+    finally:
+        client.close()
+    assert result == {"success": False, "response": None, "error": "model 'm' not found"}
@@ -1,15 +1,22 @@
 import tkinter as tk
 from tkinter import ttk
 from pathlib import Path
-import json
 import re
 import threading
 from datetime import datetime, timezone
 from urllib.parse import urlparse
 
 from theme.themes import THEMES
+from modules.context_budget import ContextSection
+from modules.summary_scheduler import interactive_session
 from modules.telemetry import log_event
 
+# Streamed tokens are batched into one label update per interval.
+STREAM_FLUSH_MS = 50
+# Related-folder files are read only this far; the context budget trims further.
+RELATED_FILE_CHARS = 2000
+MAX_RELATED_FILES = 12
+
 
 class ToolTip:
     def __init__(self, widget, text, app_core=None):
@@ -87,6 +94,13 @@ class ChatView(ttk.Frame):
         self._has_placeholder = False
         self._current_wrap = 720
 
+        self._cancel_event = threading.Event()
+        self._stream_lock = threading.Lock()
+        self._stream_pending = []
+        self._stream_flush_scheduled = False
+        self._stream_text = ""
+        self._stream_label = None
+
         theme = self._current_theme()
 
 
@@ -190,11 +204,20 @@ class ChatView(ttk.Frame):
         button_frame.columnconfigure(0, weight=0)
         button_frame.columnconfigure(1, weight=0)
         button_frame.columnconfigure(2, weight=0)
+        button_frame.columnconfigure(3, weight=0)
 
         self.spinner = ttk.Progressbar(button_frame, mode="indeterminate", length=90)
         self.spinner.grid(row=0, column=2, padx=(12, 0))
         self.spinner.grid_remove()
 
+        self.stop_button = ttk.Button(
+            button_frame,
+            text="Stop",
+            command=self._cancel_query,
+        )
+        self.stop_button.grid(row=0, column=3, padx=(8, 0))
+        self.stop_button.grid_remove()
+
         self.search_button = ttk.Button(
             button_frame,
             text="Search",
@@ -357,14 +380,8 @@ class ChatView(ttk.Frame):
         self.display_message(user_msg, "user")
         self._clear_input()
 
-        if self.file_context and self.context_path:
-            prompt = (
-                f"File: {Path(self.context_path).name}\n"
-                f"{self.file_context}\n\n"
-                f"User: {user_msg}"
-            )
-        else:
-            prompt = user_msg
+        # The active file travels as a budgeted context section, not in the prompt.
+        prompt = user_msg
 
         deep_think = self.app_core.is_deep_think_enabled() if self.app_core else bool(self.deep_think_var.get())
         internet_available = self.app_core.is_internet_search_available() if self.app_core else self.internet_available
@@ -379,13 +396,13 @@ class ChatView(ttk.Frame):
 
 
         combined_local_sources = (file_sources or []) + (system_sources or [])
-        full_prompt = self._prepare_prompt(
-            prompt,
+        context_sections = self._prepare_context(
             knowledge_context=knowledge_context,
             related_context=related_context,
             local_context=combined_local_context,
         )
-        res = self.app_core.ai_handler.query_with_retry(full_prompt)
+        with interactive_session():
+            res = self.app_core.ai_handler.query_with_retry(prompt, context=context_sections)
         if res["success"]:
             context_items = self._build_context_metadata(knowledge_sources, [], combined_local_sources)
             self.display_message(res["response"], sender="ai", context=context_items)
@@ -454,13 +471,13 @@ class ChatView(ttk.Frame):
             related_files = [
                 f for f in folder.iterdir()
                 if f.is_file() and f.suffix.lower() in {".txt", ".md", ".py", ".json"}
-            ]
+            ][:MAX_RELATED_FILES]
             snippets = []
             for file_path in related_files:
                 try:
-                    size_ok = file_path.stat().st_size < 100_000
-                    content = file_path.read_text(encoding="utf-8", errors="ignore")
-                    snippets.append(f"{file_path.name}:\n{content[:2000 if not size_ok else None]}")
+                    with open(file_path, "r", encoding="utf-8", errors="ignore") as handle:
+                        content = handle.read(RELATED_FILE_CHARS)
+                    snippets.append(f"{file_path.name}:\n{content}")
                 except Exception:
                     continue
             related_context = "\n\n".join(snippets)
@@ -481,9 +498,8 @@ class ChatView(ttk.Frame):
         return related_context, knowledge_context, knowledge_sources, file_context, file_sources
 
 
-    def _prepare_prompt(
+    def _prepare_context(
         self,
-        prompt,
         *,
         knowledge_context="",
         related_context="",
@@ -491,17 +507,28 @@ class ChatView(ttk.Frame):
         web_sources=None,
         reasoning_notes=None,
     ):
+        """Build prioritised context sections; AIHandler fits them to the model budget."""
         prompt_sections = []
+        if self.file_context and self.context_path:
+            prompt_sections.append(ContextSection.from_text(
+                "active_file", self.file_context, header=f"File: {Path(self.context_path).name}", priority=5
+            ))
         if reasoning_notes:
-            summary = "\n".join(f"- {note}" for note in reasoning_notes if note)
+            summary = [f"- {note}" for note in reasoning_notes if note]
             if summary:
-                prompt_sections.append("Reasoning Summary:\n" + summary)
+                prompt_sections.append(ContextSection(
+                    "reasoning", summary, header="Reasoning Summary:", priority=50, separator="\n"
+                ))
         if knowledge_context:
-            prompt_sections.append("Knowledge Base Excerpts:\n" + knowledge_context)
+            prompt_sections.append(ContextSection.from_text(
+                "knowledge", knowledge_context, header="Knowledge Base Excerpts:", priority=25
+            ))
         if related_context:
-            prompt_sections.append("Related Folder Files:\n" + related_context)
+            prompt_sections.append(ContextSection.from_text(
+                "related_files", related_context, header="Related Folder Files:", priority=45
+            ))
         if local_context:
-            prompt_sections.append(local_context)
+            prompt_sections.append(ContextSection.from_text("local", local_context, priority=15))
         if web_sources:
             formatted = []
             for item in web_sources:
@@ -513,11 +540,10 @@ class ChatView(ttk.Frame):
                     line += f": {snippet}"
                 formatted.append(line)
             if formatted:
-                prompt_sections.append("Web Search Findings:\n" + "\n".join(formatted))
-        prompt_sections.append("User Request:\n" + prompt)
-
-        full_prompt = "\n\n".join(prompt_sections)
-        return full_prompt
+                prompt_sections.append(ContextSection(
+                    "web", formatted, header="Web Search Findings:", priority=35, separator="\n"
+                ))
+        return prompt_sections
 
     def _build_context_metadata(self, knowledge_sources, web_sources, local_sources=None):
         items = []
@@ -615,6 +641,11 @@ class ChatView(ttk.Frame):
     def _start_async_query(self, prompt, user_message, deep_think, internet_available, internet_enabled):
         if self._busy_state:
             return
+        self._cancel_event = threading.Event()
+        with self._stream_lock:
+            self._stream_pending = []
+        self._stream_text = ""
+        self._stream_label = None
         self._set_busy(True)
         thread = threading.Thread(
             target=self._perform_query,
@@ -664,8 +695,7 @@ class ChatView(ttk.Frame):
 
             local_sources = (file_sources or []) + (system_sources or [])
 
-            full_prompt = self._prepare_prompt(
-                prompt=prompt,
+            context_sections = self._prepare_context(
                 knowledge_context=knowledge_context,
                 related_context=related_context,
                 local_context=combined_local_context,
@@ -673,14 +703,82 @@ class ChatView(ttk.Frame):
                 reasoning_notes=reasoning_notes if deep_think else None,
             )
             context_items = self._build_context_metadata(knowledge_sources, web_sources, local_sources)
-            result = self.app_core.ai_handler.query_with_retry(full_prompt)
         except Exception as exc:
             context_items = []
             web_sources = []
             result = {"success": False, "response": None, "error": str(exc)}
+            self.after(0, lambda: self._finalize_query(result, context_items, web_sources, deep_think))
+            return
+
+        cancel_event = self._cancel_event
+        pieces = []
+        try:
+            # Background summaries hold off until this turn finishes.
+            with interactive_session():
+                for text in self.app_core.ai_handler.stream_with_retry(
+                    prompt, cancel_event=cancel_event, context=context_sections
+                ):
+                    pieces.append(text)
+                    self._queue_stream_text(text)
+            response = "".join(pieces).strip()
+            if cancel_event.is_set():
+                result = {"success": False, "response": response, "error": "Response stopped.", "cancelled": True}
+            else:
+                result = {"success": True, "response": response, "error": None}
+        except Exception as exc:
+            result = {"success": False, "response": "".join(pieces).strip(), "error": str(exc)}
         self.after(0, lambda: self._finalize_query(result, context_items, web_sources, deep_think))
 
+    def _cancel_query(self):
+        if self._busy_state:
+            self._cancel_event.set()
+            self.stop_button.configure(state="disabled")
+
+    def _queue_stream_text(self, text):
+        """Called from the worker thread; schedules at most one pending UI flush."""
+        with self._stream_lock:
+            self._stream_pending.append(text)
+            if self._stream_flush_scheduled:
+                return
+            self._stream_flush_scheduled = True
+        self.after(STREAM_FLUSH_MS, self._flush_stream)
+
+    def _flush_stream(self):
+        with self._stream_lock:
+            pending, self._stream_pending = self._stream_pending, []
+            self._stream_flush_scheduled = False
+        if not pending:
+            return
+        self._stream_text += "".join(pending)
+        if self._stream_label is None:
+            self.display_message(self._stream_text, sender="ai")
+            self._stream_label = self.message_labels[-1]
+        else:
+            self._stream_label.configure(text=self._stream_text)
+            self.chat_area.update_idletasks()
+            self.chat_area.yview_moveto(1.0)
+
+    def _discard_stream_bubble(self):
+        """Remove the provisional streaming bubble so the final message replaces it."""
+        with self._stream_lock:
+            self._stream_pending = []
+        label, self._stream_label = self._stream_label, None
+        self._stream_text = ""
+        if label is None or label not in self.message_labels:
+            return
+        idx = self.message_labels.index(label)
+        for items in (
+            self.message_labels,
+            self.message_senders,
+            self.message_bubbles,
+            self.message_context_sections,
+            self.message_badges,
+        ):
+            del items[idx]
+        label.master.master.destroy()
+
     def _finalize_query(self, result, context_items, web_sources, deep_think_used):
+        self._discard_stream_bubble()
         self._set_busy(False)
         context_items = context_items or []
         web_sources = web_sources or []
@@ -691,8 +789,14 @@ class ChatView(ttk.Frame):
             badges = ["Reasoned"] if deep_think_used else []
             self.display_message(message, sender="ai", context=context_items, badges=badges)
         else:
+            partial = result.get("response")
+            if partial:
+                self.display_message(partial, sender="ai", context=context_items)
             error = result.get("error") or "Unknown error"
-            self.display_message(f"Error: {error}", sender="system")
+            if result.get("cancelled"):
+                self.display_message(error, sender="system")
+            else:
+                self.display_message(f"Error: {error}", sender="system")
         self.focus_entry()
 
 
@@ -893,12 +997,15 @@ class ChatView(ttk.Frame):
         if busy:
             self.spinner.grid()
             self.spinner.start(12)
+            self.stop_button.configure(state="normal")
+            self.stop_button.grid()
             self.send_button.configure(state="disabled")
             self.search_button.configure(state="disabled")
             self.user_input.configure(state="disabled")
         else:
             self.spinner.stop()
             self.spinner.grid_remove()
+            self.stop_button.grid_remove()
             self.send_button.configure(state="normal")
             self.search_button.configure(state="normal")
             self.user_input.configure(state="normal")
@@ -944,18 +1051,10 @@ class ChatView(ttk.Frame):
             self.display_message("No files found matching that query.", "system")
             return
 
-        main_data = file_manager.index.get("files", {})
-        test_data = {}
-        if has_test_index:
-            try:
-                test_data = json.loads(test_path.read_text(encoding="utf-8")).get("files", {})
-            except Exception:
-                test_data = {}
-
+        # Results are copies of the index entries, summaries included.
         for entry in results:
             name, path = entry["name"], entry["path"]
-            stored = main_data.get(path) or test_data.get(path) or {}
-            summary = stored.get("summary", "No summary available.")
+            summary = entry.get("summary") or "No summary available."
             self._render_search_result(name, path, summary)
 
         self.chat_area.update_idletasks()
@@ -1,21 +1,27 @@
 import os
 import tkinter as tk
-import fitz
 import sys
 import subprocess
+import threading
 from tkinter import ttk, Menu, scrolledtext, messagebox, simpledialog
 from pathlib import Path
 from typing import Optional
 from PIL import Image, ImageTk
 from mutagen.mp3 import MP3
-from openpyxl import load_workbook
-from pptx import Presentation
-from docx import Document
 
+from modules.extraction_pool import read_document
+from modules.extractors import get_extractor
 from modules.file_manager import FileManager
 from modules.file_state import get_starred
 from theme.themes import THEMES
 
+# Text previews stop here, so opening a huge log never loads all of it into Tk.
+PREVIEW_MAX_CHARS = 200_000
+# A PDF or Office file that takes longer than this to read is not previewed.
+PREVIEW_TIMEOUT_SECONDS = 15
+# Text handed to the chat panel as file context.
+FILE_CONTEXT_CHARS = 4000
+
 class FilesView(ttk.Frame):
     def __init__(self, parent, app_core):
         super().__init__(parent)
@@ -24,6 +30,11 @@ class FilesView(ttk.Frame):
         self.current_directory = os.getcwd()
         self.chat_view = None
         self.current_file = None
+        # False only while a fully loaded plain-text file is shown; saving
+        # anything else would overwrite the file with its preview.
+        self._preview_read_only = True
+        # Bumped per load_file; a background preview for an older load is dropped.
+        self._preview_request = 0
         self.file_chip_var = tk.StringVar(value="No file loaded")
 
         theme = THEMES[self.app_core.current_theme_name]
@@ -304,7 +315,11 @@ class FilesView(ttk.Frame):
 
     def load_file(self, path):
         self.current_file = path
+        self._preview_read_only = True
+        self._preview_request += 1
+        document_text = ""
         self._update_status_chip(path)
+        self.file_manager.note_recently_opened(path)
         ext = Path(path).suffix.lower()
         theme = THEMES[self.app_core.current_theme_name]
         self.file_text.configure(bg=theme["file_bg"], fg=theme["text"], insertbackground=theme["text"])
@@ -324,23 +339,6 @@ class FilesView(ttk.Frame):
                 self.image_preview.configure(text=f"[error] Failed to load image: {e}", image="", background=theme["file_bg"])
                 self.image_preview.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
 
-        # PDF preview (first page text)
-        elif ext == ".pdf":
-            try:
-                doc = fitz.open(path)
-                text = doc[0].get_text() if doc.page_count > 0 else "[PDF file is empty]"
-                self.file_text.configure(state="normal")
-                self.file_text.delete("1.0", tk.END)
-                self.file_text.insert(tk.END, text.strip() or "[No text found on first page.]")
-                self.file_text.configure(state="disabled", bg=theme["file_bg"], fg=theme["text"])
-                self.file_text.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-            except Exception as e:
-                self.file_text.configure(state="normal")
-                self.file_text.delete("1.0", tk.END)
-                self.file_text.insert(tk.END, f"[Error previewing PDF: {e}]")
-                self.file_text.configure(state="disabled", bg=theme["file_bg"], fg=theme["text"])
-                self.file_text.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-
         # MP3 preview (metadata)
         elif ext == ".mp3":
             try:
@@ -378,110 +376,71 @@ class FilesView(ttk.Frame):
                 self.file_text.configure(state="disabled", bg=theme["file_bg"], fg=theme["text"])
                 self.file_text.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
 
-        # Excel (.xlsx) preview (first 10 rows)
-        elif ext == ".xlsx":
-            try:
-                wb = load_workbook(path, read_only=True)
-                ws = wb.active
-                preview = []
-                for i, row in enumerate(ws.iter_rows(values_only=True)):
-                    preview.append("\t".join(str(cell) if cell is not None else "" for cell in row))
-                    if i >= 9:
-                        break
-                content = "\n".join(preview)
-                self.file_text.configure(state="normal")
-                self.file_text.delete("1.0", tk.END)
-                self.file_text.insert(tk.END, content)
-                self.file_text.configure(state="disabled", bg=theme["file_bg"], fg=theme["text"])
-                self.file_text.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-            except Exception as e:
-                self.file_text.configure(state="normal")
-                self.file_text.delete("1.0", tk.END)
-                self.file_text.insert(tk.END, f"[Error previewing Excel: {e}]")
-                self.file_text.configure(state="disabled", bg=theme["file_bg"], fg=theme["text"])
-                self.file_text.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-
-        # PowerPoint (.pptx) preview (slide titles/text)
-        elif ext == ".pptx":
-            try:
-                prs = Presentation(path)
-                slides = []
-                for i, slide in enumerate(prs.slides):
-                    texts = []
-                    for shape in slide.shapes:
-                        if hasattr(shape, "text"):
-                            texts.append(shape.text)
-                    slides.append(f"Slide {i+1}:\n" + "\n".join(texts))
-                    if i >= 9:
-                        break
-                content = "\n\n".join(slides) if slides else "[No slides found]"
-                self.file_text.configure(state="normal")
-                self.file_text.delete("1.0", tk.END)
-                self.file_text.insert(tk.END, content)
-                self.file_text.configure(state="disabled", bg=theme["file_bg"], fg=theme["text"])
-                self.file_text.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-            except Exception as e:
-                self.file_text.configure(state="normal")
-                self.file_text.delete("1.0", tk.END)
-                self.file_text.insert(tk.END, f"[Error previewing PowerPoint: {e}]")
-                self.file_text.configure(state="disabled", bg=theme["file_bg"], fg=theme["text"])
-                self.file_text.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-
-        # Text file preview (common formats)
-        elif ext in {".txt", ".py", ".md", ".json", ".csv", ".log", ".ini", ".xml", ".html", ".css", ".js", ".ts", ".yaml", ".yml"}:
-            try:
-                with open(path, "r", encoding="utf-8", errors="ignore") as f:
-                    content = f.read()
-                self.file_text.configure(state="normal")
-                self.file_text.delete("1.0", tk.END)
-                self.file_text.insert(tk.END, content)
-                self.file_text.configure(state="disabled", bg=theme["file_bg"], fg=theme["text"])
-                self.file_text.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-            except Exception as e:
-                self.file_text.configure(state="normal")
-                self.file_text.delete("1.0", tk.END)
-                self.file_text.insert(tk.END, f"[Error opening file: {e}]")
-                self.file_text.configure(state="disabled", bg=theme["file_bg"], fg=theme["text"])
-                self.file_text.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-
-        elif ext == ".docx":
-            try:
-                doc = Document(path)
-                content = []
-                for para in doc.paragraphs:
-                    content.append(para.text)
-                text = "\n".join(content) or "[No text found in DOCX file.]"
-                self.file_text.configure(state="normal")
-                self.file_text.delete("1.0", tk.END)
-                self.file_text.insert(tk.END, text)
-                self.file_text.configure(state="disabled", bg=theme["file_bg"], fg=theme["text"])
-                self.file_text.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-            except Exception as e:
-                self.file_text.configure(state="normal")
-                self.file_text.delete("1.0", tk.END)
-                self.file_text.insert(tk.END, f"[Error previewing DOCX: {e}]")
-                self.file_text.configure(state="disabled", bg=theme["file_bg"], fg=theme["text"])
-                self.file_text.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
-
+        # Documents: whatever the extractor registry can read, off the UI thread
         else:
             self.file_text.configure(state="normal")
             self.file_text.delete("1.0", tk.END)
-            self.file_text.insert(tk.END, f"[Preview not supported for {ext} files.]")
+            self.file_text.insert(tk.END, "[Loading preview...]")
             self.file_text.configure(state="disabled", bg=theme["file_bg"], fg=theme["text"])
             self.file_text.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+            thread = threading.Thread(
+                target=self._read_preview,
+                args=(self._preview_request, path),
+                daemon=True,
+            )
+            thread.start()
+            return
 
-        # AI chat context for text files only
+        # AI chat context for readable documents only
         if self.chat_view:
-            try:
-                with open(path, "r", encoding="utf-8", errors="ignore") as f:
-                    content = f.read()
-                self.chat_view.set_file_context(path, content)
-            except:
-                self.chat_view.set_file_context(path, "")
+            self.chat_view.set_file_context(path, document_text[:FILE_CONTEXT_CHARS])
+
+    def _read_preview(self, request, path):
+        ext = Path(path).suffix.lower()
+        document_text = ""
+        read_only = True
+        try:
+            extractor = get_extractor(Path(path))
+            result = read_document(Path(path), PREVIEW_MAX_CHARS, timeout=PREVIEW_TIMEOUT_SECONDS)
+            if result is None:
+                content = f"[Preview not supported for {ext} files.]"
+            else:
+                document_text, truncated = result
+                content = document_text
+                # Only plain text shown in full can be saved back to the file.
+                read_only = truncated or extractor.name != "text"
+                if truncated:
+                    content += f"\n\n[Preview limited to the first {PREVIEW_MAX_CHARS:,} characters.]"
+                elif not content.strip() and extractor.name != "text":
+                    content = f"[No text found in {ext or 'this'} file.]"
+        except Exception as e:
+            content = f"[Error previewing {ext or 'file'}: {e}]"
+        self.after(0, lambda: self._show_preview(request, path, content, document_text, read_only))
+
+    def _show_preview(self, request, path, content, document_text, read_only):
+        if request != self._preview_request:
+            # Another file was selected while this one was being read.
+            return
+        theme = THEMES[self.app_core.current_theme_name]
+        self._preview_read_only = read_only
+        self.file_text.configure(state="normal")
+        self.file_text.delete("1.0", tk.END)
+        self.file_text.insert(tk.END, content)
+        self.file_text.configure(state="disabled", bg=theme["file_bg"], fg=theme["text"])
+
+        # AI chat context for readable documents only
+        if self.chat_view:
+            self.chat_view.set_file_context(path, document_text[:FILE_CONTEXT_CHARS])
+            if document_text.strip():
+                # The file is now chat context; its summary jumps the queue.
+                self.file_manager.request_interactive_summary(path)
 
     def save_file(self):
         if not self.current_file:
             return
+        if self._preview_read_only:
+            messagebox.showinfo("Save", "This preview can't be saved back to the file.")
+            return
         try:
             self.file_text.configure(state="normal")
             content = self.file_text.get("1.0", tk.END)